@@ -4,6 +4,8 @@
 (function () {
   // Primary recommended endpoint (Worker on subdomain)
   const API_BASE = "https://search.onetoo.eu";
+  // Static fallback: prefix-sharded token index built by scripts/build_search_index.py
+  const STATIC_ROOT = "/dumps/ai-search/tokens/root.json";
 
   const form = document.getElementById("aiSearchForm");
   const input = document.getElementById("aiSearchQuery");
@@ -14,30 +16,116 @@
 
   function esc(s){ return String(s).replace(/[&<>"']/g, c => ({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}[c])); }
 
+  // Same tokenizer as lib/search.py tokenize (pinned by tests/test_search.py):
+  // NFKD, lowercase (no casefold), strip every mark, letter/digit runs.
+  function tokenize(s){
+    return String(s).normalize("NFKD").toLowerCase().replace(/\p{M}/gu, "").match(/[\p{L}\p{N}]+/gu) || [];
+  }
+
+  function hexId(s){
+    return "_" + Array.from(new TextEncoder().encode(s), b => b.toString(16).padStart(2, "0")).join("");
+  }
+
+  function prefixId(term, n){
+    const p = Array.from(term).slice(0, n).join("");
+    return /^[a-z0-9]+$/.test(p) ? p : hexId(p);
+  }
+
+  // Shards that can hold `term` (exact), or with `partial` any term starting
+  // with it: a partial word shorter than prefix_len continues into every
+  // shard whose prefix starts with it.
+  function shardIds(root, term, partial){
+    if (!partial || Array.from(term).length >= root.prefix_len) {
+      const id = prefixId(term, root.prefix_len);
+      return root.shards[id] ? [id] : [];
+    }
+    const hex = hexId(term);
+    return Object.keys(root.shards).filter(id => id.startsWith(hex) || (id[0] !== "_" && id.startsWith(term)));
+  }
+
+  // Fetch a file listed in the root and check it against its published sha256.
+  async function fetchPinned(ref){
+    const r = await fetch(new URL(ref.url, location.href).pathname, { headers: { "Accept": "application/json" } });
+    if (!r.ok) throw new Error("HTTP " + r.status);
+    const buf = await r.arrayBuffer();
+    if (crypto && crypto.subtle) {
+      const d = new Uint8Array(await crypto.subtle.digest("SHA-256", buf));
+      const hex = Array.from(d, b => b.toString(16).padStart(2, "0")).join("");
+      if (hex !== ref.sha256) throw new Error("sha256 mismatch");
+    }
+    return JSON.parse(new TextDecoder().decode(buf));
+  }
+
+  let staticRoot = null;
+  let staticDocs = null;
+  const staticShards = {};
+
+  async function staticSearch(q){
+    if (!staticRoot) {
+      const r = await fetch(STATIC_ROOT, { headers: { "Accept": "application/json" } });
+      if (!r.ok) throw new Error("HTTP " + r.status);
+      staticRoot = await r.json();
+    }
+    const root = staticRoot;
+    const terms = Array.from(new Set(tokenize(q)));
+    const last = terms[terms.length - 1];
+    const ids = Array.from(new Set(terms.flatMap(t => shardIds(root, t, t === last))));
+    const [docs, ...loaded] = await Promise.all([
+      staticDocs || (staticDocs = fetchPinned(root.docs).catch(e => { staticDocs = null; throw e; })),
+      ...ids.map(id => staticShards[id] || (staticShards[id] = fetchPinned(root.shards[id]).catch(e => { delete staticShards[id]; throw e; })))
+    ]);
+    const shards = {};
+    ids.forEach((id, i) => { shards[id] = loaded[i]; });
+    const k1 = root.bm25.k1, b = root.bm25.b, avgdl = root.bm25.avgdl || 1;
+    const scores = new Map();
+    for (const t of terms) {
+      for (const id of shardIds(root, t, t === last)) {
+        const shard = shards[id];
+        // Exact term, or prefix match for the last (possibly unfinished) word.
+        const keys = t === last ? Object.keys(shard.terms).filter(k => k.startsWith(t)) : (shard.terms[t] ? [t] : []);
+        for (const k of keys) {
+          const p = shard.terms[k];
+          for (let i = 0; i < p.ids.length; i++) {
+            const d = p.ids[i], f = p.tf[i];
+            const norm = k1 * (1 - b + b * docs.len[d] / avgdl);
+            scores.set(d, (scores.get(d) || 0) + p.idf * f * (k1 + 1) / (f + norm));
+          }
+        }
+      }
+    }
+    const results = Array.from(scores.entries())
+      .sort((x, y) => y[1] - x[1] || x[0] - y[0])
+      .map(([d, score]) => Object.assign({ score: score }, docs.docs[d]));
+    return { version: "2.0", query: q, lane: "stable", results: results, static: true };
+  }
+
   async function run(q) {
     out.innerHTML = "";
     meta.textContent = "Searching…";
 
     const url = API_BASE + "/search/v1?q=" + encodeURIComponent(q);
-    let r;
+    let data = null;
+    let status = "network";
     try {
-      r = await fetch(url, { method: "GET", headers: { "Accept": "application/json" } });
+      const r = await fetch(url, { method: "GET", headers: { "Accept": "application/json" } });
+      if (r.ok) data = await r.json(); else status = String(r.status);
     } catch (e) {
-      meta.textContent = "Search failed (network).";
-      return;
+      data = null;
     }
 
-    if (!r.ok) {
-      meta.textContent = "Search API unavailable (" + r.status + ").";
-      out.innerHTML = '<p class="muted">Try later. Trust entrypoints: <a href="/.well-known/ai-trust-hub.json">ai-trust-hub</a> · <a href="/.well-known/ai-search.json">ai-search</a></p>';
-      return;
+    if (!data) {
+      try {
+        data = await staticSearch(q);
+      } catch (e) {
+        meta.textContent = "Search API unavailable (" + status + ").";
+        out.innerHTML = '<p class="muted">Try later. Trust entrypoints: <a href="/.well-known/ai-trust-hub.json">ai-trust-hub</a> · <a href="/.well-known/ai-search.json">ai-search</a></p>';
+        return;
+      }
     }
 
-    const data = await r.json();
-
     const results = Array.isArray(data.results) ? data.results : [];
     const took = data.took_ms != null ? (" · " + data.took_ms + "ms") : "";
-    meta.textContent = "OK · " + results.length + " results" + took;
+    meta.textContent = (data.static ? "OK (static index, API unavailable)" : "OK") + " · " + results.length + " results" + took;
 
     const items = results.slice(0, 12).map(it => {
       const title = esc(it.title || it.url || "result");
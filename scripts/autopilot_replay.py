@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Replay recorded autopilot decisions against candidate heuristics (offline).
+
+Streams the decision records of dumps/autopilot/audit-log.jsonl (all rotated
+segments, via lib.jsonl.iter_records) and dumps/autopilot/decisions.json,
+keeps the latest record per item id, and re-decides each recorded signal
+vector under the baseline heuristics (autopilot/heuristics.json) and a
+candidate. No network: probes are not repeated, only scoring and
+thresholds change. When the candidate changes hard-fail rules or
+allowlist.hosts, item URLs are looked up in the lanes (by
+added_from_pending) so those are re-evaluated too; for items not found
+there the recorded values are used.
+
+Usage:
+  python3 scripts/autopilot_replay.py --candidate /tmp/heuristics.json
+  python3 scripts/autopilot_replay.py --set defaults.min_score_to_accept=50
+  python3 scripts/autopilot_replay.py --set defaults.min_score_to_accept=50 --report /tmp/replay.json
+
+Exit 0; the report (stdout, optionally --report JSON) is the result.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import gc
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "autopilot"))
+
+from lib.heuristics import RuleProgram  # noqa: E402
+from lib.jsonl import iter_records  # noqa: E402
+from lib.lanes import ID_FIELD, LaneStore  # noqa: E402
+from lib.replay import DECISIONS, latest_by_id, replay  # noqa: E402
+
+HEURISTICS = ROOT / "autopilot" / "heuristics.json"
+DECISIONS_JSON = ROOT / "dumps" / "autopilot" / "decisions.json"
+AUDIT_LOG = ROOT / "dumps" / "autopilot" / "audit-log.jsonl"
+LANES_DIR = ROOT / "dumps" / "autopilot" / "lanes"
+
+
+def load_json(path: Path) -> Any:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def apply_overrides(heur: Dict[str, Any], overrides: List[str]) -> Dict[str, Any]:
+    """--set a.b.c=VALUE (VALUE parsed as JSON, else kept as a string)."""
+    out = copy.deepcopy(heur)
+    for ov in overrides:
+        key, sep, raw = ov.partition("=")
+        if not sep:
+            raise SystemExit(f"--set expects KEY=VALUE, got {ov!r}")
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw
+        node = out
+        *parents, leaf = key.split(".")
+        for k in parents:
+            node = node.setdefault(k, {})
+        node[leaf] = value
+    return out
+
+
+def stream_records(audit: Path, decisions: Path, segments: int) -> Iterator[Any]:
+    yield from iter_records(audit, segments)
+    if decisions.exists():
+        # decisions.json holds the last run, which is also the newest audit tail.
+        yield from (load_json(decisions).get("decisions") or [])
+
+
+def lane_urls() -> Dict[str, str]:
+    # Lane specs live with the sync script; importing it has no side effects.
+    sys.path.insert(0, str(ROOT / "scripts"))
+    from autopilot_sync_pending import LANES
+
+    store = LaneStore(LANES_DIR, LANES, repo_root=ROOT)
+    urls: Dict[str, str] = {}
+    for spec in LANES:
+        for it in store.items(spec.name):
+            if it.get(ID_FIELD) and isinstance(it.get("url"), str):
+                urls[it[ID_FIELD]] = it["url"]
+    return urls
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--baseline", default=str(HEURISTICS), help="Heuristics the records are compared from")
+    ap.add_argument("--candidate", default="", help="Candidate heuristics file (default: the baseline)")
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="Override a candidate key (dotted path, JSON value)")
+    ap.add_argument("--audit-log", default=str(AUDIT_LOG))
+    ap.add_argument("--decisions", default=str(DECISIONS_JSON))
+    ap.add_argument("--segments", type=int, default=0, help="Only the last N audit-log files (0 = all)")
+    ap.add_argument("--no-lanes", action="store_true", help="Do not resolve item URLs from the lanes")
+    ap.add_argument("--show", type=int, default=20, help="List up to N changed items")
+    ap.add_argument("--report", default="", help="Write the JSON report here")
+    args = ap.parse_args()
+
+    base_heur = load_json(Path(args.baseline))
+    cand_heur = apply_overrides(load_json(Path(args.candidate)) if args.candidate else base_heur, args.set)
+    baseline = RuleProgram.compile(base_heur)
+    candidate = RuleProgram.compile(cand_heur)
+
+    t0 = time.perf_counter()
+    # Records are only ever added, never form cycles: cyclic GC passes while
+    # loading hundreds of thousands of small dicts are pure overhead.
+    gc.disable()
+    try:
+        records = latest_by_id(stream_records(Path(args.audit_log), Path(args.decisions), args.segments))
+    finally:
+        gc.enable()
+    t_load = time.perf_counter() - t0
+    urls = {} if args.no_lanes else lane_urls()
+    t1 = time.perf_counter()
+    rep = replay(records.values(), baseline, candidate, urls)
+    t_replay = time.perf_counter() - t1
+
+    print(f"replay: {rep.records} items (skipped {rep.skipped}, urls resolved {rep.url_resolved})")
+    print(f"  baseline  {baseline.fingerprint[:12]}  accept>={baseline.accept_at} sandbox>={baseline.sandbox_at}")
+    print(f"  candidate {candidate.fingerprint[:12]}  accept>={candidate.accept_at} sandbox>={candidate.sandbox_at}")
+    print("  %-10s %9s %9s %9s" % ("decision", "recorded", "baseline", "candidate"))
+    for d in DECISIONS:
+        print("  %-10s %9d %9d %9d" % (d, rep.recorded.get(d, 0), rep.baseline.get(d, 0), rep.candidate.get(d, 0)))
+    if rep.drift:
+        print(f"  note: {rep.drift} recorded decisions differ from the baseline replay (heuristics changed since)")
+    if rep.transitions:
+        print("  changes: " + ", ".join(f"{a}->{b}={n}" for (a, b), n in sorted(rep.transitions.items())))
+        for rid, a, b, sa, sb in rep.changed[: args.show]:
+            print(f"    {rid[:16]}  {a} ({sa}) -> {b} ({sb})")
+        if len(rep.changed) > args.show:
+            print(f"    ... {len(rep.changed) - args.show} more")
+    else:
+        print("  changes: none")
+    elapsed = max(t_load + t_replay, 1e-9)
+    print(
+        f"  time: load {t_load * 1000:.1f}ms, replay {t_replay * 1000:.1f}ms "
+        f"({rep.records / max(t_replay, 1e-9):,.0f} records/s replay, {rep.records / elapsed:,.0f} records/s end-to-end)"
+    )
+
+    if args.report:
+        doc = {
+            "schema": "onetoo-autopilot-replay/v1",
+            "baseline": {"path": args.baseline, "fingerprint": baseline.fingerprint},
+            "candidate": {"path": args.candidate or args.baseline, "overrides": args.set, "fingerprint": candidate.fingerprint},
+            **rep.as_dict(max_changed=max(args.show, 0)),
+        }
+        out = Path(args.report)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(doc, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
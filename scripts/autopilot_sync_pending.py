@@ -1,12 +1,29 @@
 #!/usr/bin/env python3
-import os, json, datetime, sys, urllib.parse
-from urllib.request import Request, urlopen
+import os, json, datetime, hashlib, sys, urllib.parse
 from urllib.error import HTTPError
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "autopilot"))
+from lib.httpclient import HttpPool  # noqa: E402
+from lib.probe import BudgetExhausted, ProbeEngine, RequestBudget  # noqa: E402
+from lib.probecache import ProbeCache  # noqa: E402
+from lib.cursor import SyncCursor, item_timestamp  # noqa: E402
+from lib.lanes import LaneSpec, LaneStore  # noqa: E402
+from lib.jsonl import JsonlLog  # noqa: E402
+from lib.heuristics import RuleProgram  # noqa: E402
+from lib.jsoncanon import options_from_config  # noqa: E402
+from lib.transform import served_registry  # noqa: E402
+from lib.instrument import Run  # noqa: E402
+
+DECISION_FILES = ("dumps/autopilot/decisions.json", "public/dumps/autopilot-decisions.json")
+
+# Shared keep-alive pool for every request of a run (replaced in main() with
+# the sizes configured in heuristics.json).
+HTTP = HttpPool()
+
 def now_z():
     return datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
 
-def http_get(url, headers=None, timeout=15):
+def http_get(url, headers=None, timeout=15, budget=None):
     headers = headers or {}
     base_headers = {
         "Accept": "application/json",
@@ -14,14 +31,13 @@ def http_get(url, headers=None, timeout=15):
         "User-Agent": "onetoo-autopilot/0.2",
     }
     base_headers.update(headers)
-    req = Request(url, headers=base_headers, method="GET")
-    with urlopen(req, timeout=timeout) as r:
-        body = r.read()
-        ct = r.headers.get("Content-Type","")
-    return body, ct
-
-def http_get_json(url, headers=None, timeout=15):
-    body, _ct = http_get(url, headers=headers, timeout=timeout)
+    r = HTTP.request("GET", url, headers=base_headers, timeout=timeout, budget=budget)
+    if r.status >= 400:
+        raise HTTPError(url, r.status, r.reason, r.headers, None)
+    return r.body, r.headers.get("Content-Type","")
+
+def http_get_json(url, headers=None, timeout=15, budget=None):
+    body, _ct = http_get(url, headers=headers, timeout=timeout, budget=budget)
     return json.loads(body.decode("utf-8", errors="replace"))
 
 def safe_read_json(path, fallback):
@@ -39,10 +55,23 @@ def safe_write_json(path, obj):
         f.write("\n")
     os.replace(tmp, path)
 
-def append_jsonl(path, obj):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+def export_outcome(run, outcome):
+    """Record what changed and which writes were skipped in the run report,
+    and export the `changed` flag to the workflow."""
+    run.note("outcome", outcome)
+    out = os.getenv("GITHUB_OUTPUT", "")
+    if out:
+        with open(out, "a", encoding="utf-8") as f:
+            f.write("changed=%s\n" % ("true" if outcome["changed"] else "false"))
+
+def open_audit_log(heur):
+    cfg = heur.get("audit_log", {}) or {}
+    return JsonlLog(
+        "dumps/autopilot/audit-log.jsonl",
+        max_bytes=int(cfg.get("max_bytes", 1024 * 1024)),
+        period=str(cfg.get("rotate", "month")),
+        flush_every=int(cfg.get("flush_every", 64)),
+    )
 
 def normalize_base(base):
     base = (base or "").strip()
@@ -62,33 +91,181 @@ def host_of(url):
 def load_heuristics():
     return safe_read_json("autopilot/heuristics.json", {})
 
-def eval_hard_fail(item, heur):
-    url = item.get("url","")
-    parsed = urllib.parse.urlparse(url)
-    scheme = (parsed.scheme or "").lower()
-    host = (parsed.hostname or "").lower()
-
-    for rule in heur.get("hard_fail", []):
-        m = rule.get("match", {})
-        if "url_host_in" in m and host in [h.lower() for h in m["url_host_in"]]:
-            return rule
-        if "url_scheme_in" in m and scheme in [s.lower() for s in m["url_scheme_in"]]:
-            return rule
-        if "url_scheme_not_in" in m and scheme not in [s.lower() for s in m["url_scheme_not_in"]]:
-            return rule
-    return None
-
-def probe(url, timeout=15):
+def load_served_renderer():
+    """How tools/autopilot/run.py renders the public lane files (see LaneStore `served`)."""
+    cfg = safe_read_json("tools/autopilot/config.json", {})
+    sort_keys = (cfg.get("rules", {}) or {}).get("sort_items_by", ["id", "domain", "url"])
+    return served_registry(sort_keys, options_from_config(cfg))
+
+def load_probe_cache(heur):
+    cfg = heur.get("probe_cache", {}) or {}
+    if not cfg.get("enabled", True):
+        return None
+    return ProbeCache(
+        cfg.get("path", "dumps/autopilot/probe-cache.json"),
+        ttl=int(cfg.get("ttl_seconds", 86400)),
+        negative_ttl=int(cfg.get("negative_ttl_seconds", 3600)),
+        max_entries=int(cfg.get("max_entries", 5000)),
+    )
+
+def discover_pending(base, headers, timeout, cursor, want, page_size, max_pages, known=None):
+    """Page through /contrib/v2/pending from the cursor position.
+
+    Sends `since`/`limit` (and the server's `next_cursor`, if any) and also
+    filters client-side, so a server ignoring those parameters still only
+    yields items beyond the cursor. Items without a timestamp cannot be
+    placed relative to the cursor and are returned as well (ts ""). Ids for
+    which `known(pid)` is true (already in a lane, or waiting in the
+    cursor's retry/held sets) are skipped and do not count towards `want`.
+
+    Returns (keys, pages, seen, bound):
+      keys   [(ts, id), ...] to process, sorted, at most `want`
+      seen   timestamped keys the cursor may move across once `keys` are
+             handled (taken or known)
+      bound  exclusive limit for that move (see SyncCursor.advance). The
+             listing is only known to be complete below it: None when the
+             server ran out of pages, or when every page came back in
+             ascending (ts, id) order (later pages then sort after what
+             was seen); otherwise () and the cursor stays put, since an
+             unlisted item may sort anywhere. Items beyond `want` bound it
+             too: they are left for the next run.
+    """
+    found = {}
+    seen = []
+    token = None
+    pages = 0
+    ordered = True
+    last = None
+    exhausted = False
+    while pages < max_pages and len(found) < want:
+        params = {"limit": page_size}
+        if cursor.since:
+            params["since"] = cursor.since
+        if token:
+            params["cursor"] = token
+        url = join_url(base, "/contrib/v2/pending") + "?" + urllib.parse.urlencode(params)
+        pend = http_get_json(url, headers=headers, timeout=timeout)
+        pages += 1
+        for it in (pend.get("items") or []):
+            pid = it.get("id")
+            if not pid or pid in found:
+                continue
+            ts = item_timestamp(it)
+            if ts:
+                if last is not None and (ts, pid) < last:
+                    ordered = False
+                last = (ts, pid)
+                if not cursor.is_after(ts, pid):
+                    continue
+                seen.append((ts, pid))
+            if known is not None and known(pid):
+                continue
+            found[pid] = ts
+        token = pend.get("next_cursor")
+        if not token:
+            exhausted = True
+            break
+    keys = sorted((ts, pid) for pid, ts in found.items())
+    bound = None if exhausted or ordered else ()
+    if len(keys) > want:
+        cut = keys[want]
+        bound = cut if bound is None else min(bound, cut)
+    return keys[:want], pages, seen, bound
+
+def eval_hard_fail(item, program):
+    """First matching hard-fail rule (lib.heuristics.HardRule) or None."""
+    return program.hard_fail(item.get("url",""))
+
+# Statuses after which a HEAD answer is not trusted and we retry with a ranged GET.
+HEAD_FALLBACK_STATUSES = {400, 403, 405, 501}
+
+def _probe_once(url, timeout, mode, max_bytes, extra_headers, budget=None):
+    """One probe (one or two requests plus redirects); returns
+    (ok, code, method, response headers or None).
+
+    The first request is paid for by the caller; the fallback GET and any
+    redirect hops are taken from `budget`, raising BudgetExhausted if refused.
+    """
+    headers = {"User-Agent": "onetoo-autopilot/0.2", "Cache-Control": "no-cache"}
+    headers.update(extra_headers)
+    if mode != "head":
+        try:
+            r = HTTP.request("GET", url, headers={"Accept": "application/json", **headers}, timeout=timeout, budget=budget)
+        except BudgetExhausted:
+            raise
+        except Exception:
+            return False, 0, "GET", None
+        return 200 <= r.status < 300, r.status, "GET", r.headers
+
+    # HEAD first; if the server rejects HEAD, a `Range: bytes=0-0` GET whose
+    # body read is capped at max_bytes (servers ignoring Range still cost at
+    # most that much). 206 counts as 200.
+    method = "HEAD"
     try:
-        http_get(url, headers={}, timeout=timeout)
-        return True, 200
-    except HTTPError as e:
-        return False, int(getattr(e, "code", 0) or 0)
+        r = HTTP.request("HEAD", url, headers=headers, timeout=timeout, max_bytes=0, budget=budget)
+    except BudgetExhausted:
+        raise
     except Exception:
-        return False, 0
-
-def score_item(item, heur):
-    score = 0
+        r = None
+    if r is None or r.status in HEAD_FALLBACK_STATUSES:
+        method = "GET-range"
+        if budget is not None and not budget.take():
+            raise BudgetExhausted(url)
+        try:
+            r = HTTP.request("GET", url, headers={**headers, "Range": "bytes=0-0"}, timeout=timeout, max_bytes=max_bytes, budget=budget)
+        except BudgetExhausted:
+            raise
+        except Exception:
+            return False, 0, method, None
+    status = 200 if r.status == 206 else r.status
+    return 200 <= status < 300, status, method, r.headers
+
+def probe(url, timeout=15, mode="get", max_bytes=1024, cache=None, budget=None):
+    """Probe url; returns (ok, code, method).
+
+    mode "get" downloads the full body (legacy), "head" uses HEAD / ranged GET.
+    With a ProbeCache, fresh entries answer without network and stale ones
+    are revalidated with If-None-Match / If-Modified-Since. Requests beyond
+    the first are charged to `budget` (see _probe_once).
+    """
+    if cache is None:
+        ok, code, method, _hdrs = _probe_once(url, timeout, mode, max_bytes, {}, budget)
+        return ok, code, method
+
+    hit = cache.fresh(url)
+    if hit is not None:
+        return hit
+    ok, code, method, hdrs = _probe_once(url, timeout, mode, max_bytes, cache.conditional_headers(url), budget)
+    if code == 304:
+        hit = cache.revalidate(url)
+        if hit is not None:
+            return hit
+        # 304 without an entry to refresh (evicted meanwhile): that is a miss,
+        # not a result; ask again without validators.
+        if budget is not None and not budget.take():
+            raise BudgetExhausted(url)
+        ok, code, method, hdrs = _probe_once(url, timeout, mode, max_bytes, {}, budget)
+    cache.store(url, ok, code, method, hdrs)
+    return ok, code, method
+
+PROBE_SIGNALS = [
+    ("minisign.pub", "minisign_pub_200"),
+    ("sha256.json", "sha256_json_200"),
+    ("security.txt", "security_txt_200"),
+]
+
+def probe_targets(item):
+    """(signal, url) pairs score_item needs probed for this item, in stable order."""
+    wk = (item.get("wellKnown") or "").strip()
+    if not wk:
+        return []
+    out = [("wellKnown_http_200", wk)]
+    for name, key in PROBE_SIGNALS:
+        out.append((key, wk.rstrip("/") + "/" + name))
+    return out
+
+def item_signals(item, program, probes=None):
+    """Signal vector for one item. `probes` maps url -> (ok, code, method); missing urls are probed inline."""
     signals = {}
 
     url = (item.get("url") or "").strip()
@@ -99,60 +276,98 @@ def score_item(item, heur):
     signals["wellKnown_present"] = bool(wk)
 
     # probe well-known and standard TFWS-ish artifacts
-    if wk:
-        ok, code = probe(wk)
-        signals["wellKnown_http_200"] = bool(ok and code == 200)
-
-        for name, key in [
-            ("minisign.pub", "minisign_pub_200"),
-            ("sha256.json", "sha256_json_200"),
-            ("security.txt", "security_txt_200"),
-        ]:
-            ok2, code2 = probe(wk.rstrip("/") + "/" + name)
-            signals[key] = bool(ok2 and code2 == 200)
-    else:
-        signals["wellKnown_http_200"] = False
-        signals["minisign_pub_200"] = False
-        signals["sha256_json_200"] = False
-        signals["security_txt_200"] = False
+    signals["wellKnown_http_200"] = False
+    for _name, key in PROBE_SIGNALS:
+        signals[key] = False
+    methods = {}
+    for key, target in probe_targets(item):
+        if probes is not None and target in probes:
+            ok, code, method = probes[target]
+        else:
+            ok, code, method = probe(target)
+        signals[key] = bool(ok and code == 200)
+        methods[key] = method
+    if methods:
+        signals["probe_methods"] = methods
 
     # repo signal (very light)
     signals["repo_github"] = bool(repo) and ("github.com/" in repo.lower())
 
     # allowlist host bonus (keeps old behavior from your previous edits)
-    allow = heur.get("allowlist", {}) or {}
-    allow_hosts = [h.lower() for h in (allow.get("hosts") or [])]
     host = host_of(url)
-    if host and host in allow_hosts:
-        score += 20
-        signals["allow_host_bonus"] = True
-    else:
-        signals["allow_host_bonus"] = False
-
-    # soft rules scoring by signals
-    for rule in (heur.get("soft_rules") or []):
-        when = rule.get("when")
-        pts = int(rule.get("score", 0) or 0)
-        if when and signals.get(when):
-            score += pts
-
-    # derived signal: minimal TFWS bundle present
+    signals["allow_host_bonus"] = bool(host) and host in program.allow_hosts
+    return signals
+
+
+def finish_signals(signals):
+    # derived signal: minimal TFWS bundle present (after scoring, see RuleProgram.score)
     signals["tfws_min_bundle"] = bool(signals.get("minisign_pub_200")) and bool(signals.get("sha256_json_200"))
+    return signals
+
 
-    return min(score, 100), signals
+def score_item(item, program, probes=None):
+    """(score, signals) for one item; main() scores whole batches with program.score_batch."""
+    signals = item_signals(item, program, probes)
+    return program.score(signals), finish_signals(signals)
 
 
-def decide(score, hard_fail, heur):
-    if hard_fail:
-        return "reject"
-    d = heur.get("defaults", {})
-    accept_t = int(d.get("min_score_to_accept", 70))
-    sandbox_t = int(d.get("min_score_to_sandbox", 40))
-    if score >= accept_t:
-        return "accept"
-    if score >= sandbox_t:
-        return "sandbox"
-    return "reject"
+def decision_fingerprint(rec):
+    """What makes two decisions for the same id the same (not when, not the
+    exact error text)."""
+    key = {k: rec.get(k) for k in ("decision", "score", "signals", "hard_fail")}
+    key["error"] = str(rec.get("error") or "").split("(", 1)[0]
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def decide(score, hard_fail, program):
+    return program.decide(score, hard_fail)
+
+LANES = [
+    LaneSpec(
+        name="accepted",
+        snapshot="dumps/contrib-accepted.json",
+        deltas="public/dumps/deltas/accepted",
+        mirrors=("public/dumps/contrib-accepted.json",),
+        header={
+            "schema": "onetoo-ai-search-accepted-set/v1",
+            "version": "1.0",
+            "lane": "stable",
+            "note": "Autopilot managed accepted set.",
+        },
+        # force lane identity (do not inherit stale values from existing files)
+        identity={"lane": "stable", "note": "Stable accepted-set used by search (autopilot-managed)."},
+    ),
+    LaneSpec(
+        name="sandbox",
+        snapshot="dumps/contrib-sandbox.json",
+        deltas="public/dumps/deltas/sandbox",
+        # contrib-autopilot.json is the sandbox alias kept for old clients
+        mirrors=(
+            "public/dumps/contrib-sandbox.json",
+            "dumps/contrib-autopilot.json",
+            "public/dumps/contrib-autopilot.json",
+        ),
+        header={
+            "schema": "onetoo-ai-search-sandbox-set/v1",
+            "version": "1.0",
+            "lane": "sandbox",
+            "note": "Autopilot sandbox lane.",
+        },
+        identity={"lane": "sandbox", "note": "Autopilot sandbox set (unsigned)."},
+    ),
+    LaneSpec(
+        name="rejected",
+        snapshot="dumps/contrib-rejected.json",
+        deltas="public/dumps/deltas/rejected",
+        mirrors=("public/dumps/contrib-rejected.json",),
+        header={
+            "schema": "onetoo-ai-search-rejected-set/v1",
+            "version": "1.0",
+            "lane": "rejected",
+            "note": "Autopilot rejected lane.",
+        },
+        identity={"lane": "rejected", "note": "Autopilot rejected set."},
+    ),
+]
 
 def main():
     if os.getenv("ONETOO_AUTOPILOT_ENABLED", "").strip() != "1":
@@ -164,79 +379,108 @@ def main():
         print("autopilot: missing ONETOO_MAINTAINER_TOKEN. No changes.")
         return 0
 
+    with Run("autopilot_sync_pending", ".") as run:
+        return run.exit_code(sync(run, token))
+
+def sync(run, token):
     base = normalize_base(os.getenv("ONETOO_SEARCH_BASE", "https://search.onetoo.eu"))
     heur = load_heuristics()
+    # Compiled once; every item below is scored against the same immutable program.
+    program = RuleProgram.compile(heur)
     limits = heur.get("rate_limits", {}) or {}
+
+    global HTTP
+    pool_cfg = heur.get("http_pool", {}) or {}
+    HTTP = HttpPool(
+        max_idle_per_host=int(pool_cfg.get("max_idle_per_host", 4)),
+        max_hosts=int(pool_cfg.get("max_hosts", 64)),
+    )
     timeout = int(limits.get("http_timeout_seconds", 15))
     max_pending = int(limits.get("max_pending_per_run", 25))
+    write_stable = os.getenv("ONETOO_WRITE_STABLE", "").strip() == "1"
 
-    pending_url = join_url(base, "/contrib/v2/pending")
     headers = {"X-ONETOO-MAINTAINER": token}
 
+    # Lanes are appended through the store's segments and checked against its
+    # id index; the published snapshots are only touched by compaction.
+    deltas_cfg = heur.get("lane_deltas", {}) or {}
+    store = LaneStore(
+        "dumps/autopilot/lanes",
+        LANES,
+        snapshot_every=int(deltas_cfg.get("snapshot_every", 50)),
+        served=load_served_renderer(),
+    )
+
+    # Incremental discovery: only items beyond the persisted cursor are listed,
+    # plus earlier ids that still need a retry. Each run handles one chunk of
+    # at most max_pending ids; the rest of the backlog waits for later runs.
+    # Re-queued ids take at most half of the chunk, so discovery always has
+    # room; held accepts are only re-queued when the stable lane is written.
+    cursor = SyncCursor.load("dumps/autopilot/sync-cursor.json")
+    max_attempts = int(limits.get("max_retry_attempts", 3))
+    requeue = cursor.retry_ids(max_attempts) + (list(cursor.held) if write_stable else [])
+    requeue = requeue[:max_pending // 2]
+
     try:
-        pend = http_get_json(pending_url, headers=headers, timeout=timeout)
+        with run.span("discover"):
+            discovered, pages, seen, bound = discover_pending(
+                base, headers, timeout, cursor,
+                want=max_pending - len(requeue),
+                page_size=int(limits.get("pending_page_size", 100)),
+                max_pages=int(limits.get("max_pending_pages", 5)),
+                known=lambda pid: store.has(pid) or cursor.tracked(pid),
+            )
     except Exception as e:
         print("autopilot: could not discover pending list endpoint (safe exit).")
         print(f"autopilot: last error: {repr(e)}")
         return 0
 
-    items = (pend.get("items") or [])[:max_pending]
-    pending_ids = [x.get("id") for x in items if x.get("id")]
-    print(f"autopilot: discovered {len(pending_ids)} pending ids")
+    pending_ids = requeue + [pid for _ts, pid in discovered if pid not in requeue]
+    print(f"autopilot: discovered {len(discovered)} new pending ids (pages={pages}, requeued={len(requeue)}, held={len(cursor.held)}, cursor={cursor.since or '-'})")
 
-    accepted = safe_read_json(
-        "dumps/contrib-accepted.json",
-        {
-            "schema": "onetoo-ai-search-accepted-set/v1",
-            "version": "1.0",
-            "updated_at": now_z(),
-            "lane": "stable",
-            "note": "Autopilot managed accepted set.",
-            "items": [],
-        },
-    )
-    sandbox = safe_read_json(
-        "dumps/contrib-sandbox.json",
-        {
-            "schema": "onetoo-ai-search-sandbox-set/v1",
-            "version": "1.0",
-            "updated_at": now_z(),
-            "lane": "sandbox",
-            "note": "Autopilot sandbox lane.",
-            "items": [],
-        },
-    )
-    rejected = safe_read_json(
-        "dumps/contrib-rejected.json",
-        {
-            "schema": "onetoo-ai-search-rejected-set/v1",
-            "version": "1.0",
-            "updated_at": now_z(),
-            "lane": "rejected",
-            "note": "Autopilot rejected lane.",
-            "items": [],
-        },
+    todo = []
+    for pid in dict.fromkeys(pending_ids):
+        if store.has(pid):
+            cursor.mark_done(pid)
+        else:
+            todo.append(pid)
+
+    # Detail fetches and well-known probes go through one bounded-concurrency
+    # engine sharing a global request budget (rate_limits.max_http_requests).
+    # The pending-list pages above already spent their share.
+    budget = RequestBudget(int(limits.get("max_http_requests", 0) or 0))
+    budget.take(pages)
+    engine = ProbeEngine(
+        max_workers=int(limits.get("max_concurrency", 8)),
+        per_host=int(limits.get("per_host_concurrency", 2)),
+        budget=budget,
     )
 
-    seen = set()
-    for doc in (accepted, sandbox, rejected):
-        for it in doc.get("items", []) or []:
-            pid = it.get("added_from_pending")
-            if pid:
-                seen.add(pid)
+    detail_calls = []
+    for pid in todo:
+        detail_url = join_url(base, f"/contrib/v2/pending/get?id={urllib.parse.quote(pid)}")
+        detail_calls.append((detail_url, http_get_json, (detail_url, headers, timeout, budget)))
+    with run.span("fetch_details"):
+        details = engine.run(detail_calls)
 
+    audit = open_audit_log(heur)
     decisions = []
-    for pid in pending_ids:
-        if pid in seen:
+    # Decisions differing from the one already recorded for their id (see
+    # SyncCursor.decided); only these are logged and make the run a change.
+    changed_decisions = []
+    deferred = []
+    prepared = []
+    for pid, det in zip(todo, details):
+        if isinstance(det, BudgetExhausted):
+            deferred.append(pid)
             continue
-
-        detail_url = join_url(base, f"/contrib/v2/pending/get?id={urllib.parse.quote(pid)}")
-        try:
-            det = http_get_json(detail_url, headers=headers, timeout=timeout)
-        except Exception as e:
-            rec = {"id": pid, "decision": "sandbox", "score": 0, "error": repr(e), "at": now_z()}
+        if isinstance(det, Exception):
+            rec = {"id": pid, "decision": "sandbox", "score": 0, "error": repr(det), "at": now_z()}
             decisions.append(rec)
-            append_jsonl("dumps/autopilot/audit-log.jsonl", {"event": "decision", **rec})
+            if cursor.record_decision(pid, decision_fingerprint(rec)):
+                changed_decisions.append(rec)
+                audit.append({"event": "decision", **rec})
+            cursor.mark_failed(pid)
             continue
 
         body = det.get("body") or {}
@@ -256,59 +500,123 @@ def main():
             item["wellKnown"] = u + "/.well-known/"
 
         item["added_from_pending"] = pid
-
-        hard = eval_hard_fail(item, heur)
-        score, signals = score_item(item, heur)
-        decision = decide(score, hard, heur)
-
-        rec = {
-            "id": pid,
-            "decision": decision,
-            "score": score,
-            "signals": signals,
-            "hard_fail": (hard.get("id") if hard else None),
-            "at": now_z(),
-        }
-        decisions.append(rec)
-        append_jsonl("dumps/autopilot/audit-log.jsonl", {"event": "decision", **rec})
-
-        if decision == "accept":
-            accepted["items"].append(item)
-        elif decision == "sandbox":
-            sandbox["items"].append(item)
-        else:
-            rejected["items"].append(item)
+        prepared.append((pid, item))
+
+    # Probe every unique URL once, concurrently; map results back per item.
+    # URLs still fresh in the probe cache cost neither network nor budget.
+    probe_cfg = heur.get("probe", {}) or {}
+    probe_mode = str(probe_cfg.get("mode", "head"))
+    probe_max_bytes = int(probe_cfg.get("max_bytes", 1024))
+    with run.span("load_probe_cache"):
+        cache = load_probe_cache(heur)
+
+    probes = {}
+    probe_urls = {}  # insertion-ordered set
+    for _pid, item in prepared:
+        for _key, target in probe_targets(item):
+            if target in probes or target in probe_urls:
+                continue
+            hit = cache.fresh(target) if cache is not None else None
+            if hit is not None:
+                probes[target] = hit
+            else:
+                probe_urls[target] = None
+    with run.span("probe"):
+        probe_results = engine.run([(u, probe, (u, timeout, probe_mode, probe_max_bytes, cache, budget)) for u in probe_urls])
+    probes.update(zip(probe_urls, probe_results))
+    if cache is not None:
+        with run.span("save_probe_cache"):
+            cache.save()
+        run.merge("probe_cache", {"hits": cache.hits, "revalidated": cache.revalidated, "misses": cache.misses})
+        print(f"autopilot: probe cache entries={len(cache)} hits={cache.hits} revalidated={cache.revalidated} misses={cache.misses}")
+
+    with run.span("score"):
+        ready = []
+        for pid, item in prepared:
+            targets = [t for _k, t in probe_targets(item)]
+            if any(isinstance(probes[t], BudgetExhausted) for t in targets):
+                # Never decide on a partial signal vector; retry next run.
+                deferred.append(pid)
+                continue
+            ready.append((pid, item, eval_hard_fail(item, program), item_signals(item, program, probes)))
+
+        scores = program.score_batch([signals for _pid, _item, _hard, signals in ready])
+        verdicts = program.decide_batch(scores, [hard for _pid, _item, hard, _signals in ready])
+
+    with run.span("record"):
+        for (pid, item, hard, signals), score, decision in zip(ready, scores, verdicts):
+            rec = {
+                "id": pid,
+                "decision": decision,
+                "score": score,
+                "signals": finish_signals(signals),
+                "hard_fail": (hard.id if hard else None),
+                "at": now_z(),
+            }
+            decisions.append(rec)
+            if cursor.record_decision(pid, decision_fingerprint(rec)):
+                changed_decisions.append(rec)
+                audit.append({"event": "decision", **rec})
+
+            if decision == "accept" and not write_stable:
+                # Stable lane is not written this run: hold the id (decided, not
+                # an attempt) until a run that writes it.
+                cursor.hold(pid)
+            else:
+                cursor.mark_done(pid)
+
+            if decision == "accept":
+                if write_stable:
+                    store.append("accepted", item)
+            elif decision == "sandbox":
+                store.append("sandbox", item)
+            else:
+                store.append("rejected", item)
+
+        audit.close()
+
+    if deferred:
+        print(f"autopilot: request budget exhausted, deferred {len(deferred)} ids to next run")
+    # A deferred id was never fetched or probed: that is not a failed attempt
+    # (it must not be pruned for it), and a held accept simply stays held.
+    for pid in deferred:
+        if pid not in cursor.held:
+            cursor.mark_failed(pid, count=False)
+    for pid in cursor.prune(max_attempts):
+        print(f"autopilot: giving up on {pid} after {max_attempts} failed attempts")
+    # Every discovered id is now done, retried or held; move across the
+    # contiguous prefix of the listing that is known to be complete.
+    cursor.advance(seen, bound)
 
     ts = now_z()
-    for doc in (accepted, sandbox, rejected):
-        doc["updated_at"] = ts
-
-    # force lane identity (do not inherit stale values from existing files)
-    accepted["lane"] = "stable"
-    accepted["note"] = "Stable accepted-set used by search (autopilot-managed)."
-    sandbox["lane"] = "sandbox"
-    sandbox["note"] = "Autopilot sandbox set (unsigned)."
-    rejected["lane"] = "rejected"
-    rejected["note"] = "Autopilot rejected set."
-
-    if os.getenv("ONETOO_WRITE_STABLE", "").strip() == "1":
-        safe_write_json("dumps/contrib-accepted.json", accepted)
-        safe_write_json("public/dumps/contrib-accepted.json", accepted)
-    else:
+    if not write_stable:
         print("autopilot: ONETOO_WRITE_STABLE!=1, not touching contrib-accepted.json (stable lane).")
-
-    safe_write_json("dumps/contrib-sandbox.json", sandbox)
-    safe_write_json("public/dumps/contrib-sandbox.json", sandbox)
-
-    # publish sandbox alias for convenience (keeps old clients working)
-    safe_write_json("dumps/contrib-autopilot.json", sandbox)
-    safe_write_json("public/dumps/contrib-autopilot.json", sandbox)
-
-    safe_write_json("dumps/contrib-rejected.json", rejected)
-    safe_write_json("public/dumps/contrib-rejected.json", rejected)
-
-    safe_write_json("dumps/autopilot/decisions.json", {"schema": "onetoo-autopilot-decisions/v1", "updated_at": ts, "decisions": decisions})
-    safe_write_json("public/dumps/autopilot-decisions.json", {"schema": "onetoo-autopilot-decisions/v1", "updated_at": ts, "decisions": decisions})
+    with run.span("compact"):
+        rewritten = store.compact(ts)
+    print(f"autopilot: lanes rewritten={','.join(rewritten) or '-'} published={','.join(f'{k}:{v}' for k, v in store.published.items()) or '-'}")
+
+    with run.span("write"):
+        # Only move the cursor once the lanes it accounts for are on disk.
+        cursor_saved = cursor.save(ts)
+
+        # A run that decided nothing new leaves the previous run's decisions
+        # (and their updated_at) in place; they are also in the audit log.
+        if changed_decisions:
+            doc = {"schema": "onetoo-autopilot-decisions/v1", "updated_at": ts, "decisions": decisions}
+            for path in DECISION_FILES:
+                safe_write_json(path, doc)
+
+    written = list(rewritten) + list(store.published) + (["cursor"] if cursor_saved else []) + (["decisions"] if changed_decisions else [])
+    skipped = [n for n in store.specs if n not in rewritten] + ([] if cursor_saved else ["cursor"]) + ([] if changed_decisions else ["decisions"])
+    changed = bool(written)
+    export_outcome(run, {
+        "changed": changed,
+        "written": sorted(set(written)),
+        "skipped": skipped,
+        "lanes": {name: {"items_sha256_before": b, "items_sha256": a} for name, (b, a) in store.digests.items()},
+    })
+    if not changed:
+        print("autopilot: no-op run (lanes, cursor and decisions unchanged); nothing rewritten")
 
     print("autopilot: decisions=%d accept=%d sandbox=%d reject=%d" % (
         len(decisions),
@@ -316,6 +624,16 @@ def main():
         sum(1 for d in decisions if d["decision"] == "sandbox"),
         sum(1 for d in decisions if d["decision"] == "reject"),
     ))
+    st = HTTP.stats
+    run.merge("http", st.as_dict())
+    run.count("pending.discovered", len(discovered))
+    run.count("pending.deferred", len(deferred))
+    for d in decisions:
+        run.count("decisions." + d["decision"])
+    print("autopilot: http requests=%d handshakes=%d reused=%d retries=%d bytes=%d" % (
+        st.requests, st.handshakes, st.reused, st.retries, st.bytes_read,
+    ))
+    HTTP.close()
     return 0
 
 
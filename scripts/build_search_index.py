@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Build the sharded AI search index (ai-search-index v2) from the accepted set.
+
+Reads dumps/contrib-accepted.json, partitions its items into size-bounded
+shards (by language, topic or domain), writes each shard as canonical JSON to
+public/dumps/ai-search/shards/<name>.json and the v2 manifest (shard urls,
+sha256, counts, Merkle root over the shards) to public/dumps/ai-search-index.json.
+
+It also compiles the static token index used by assets/ai-search.js when the
+search API is down: public/dumps/ai-search/tokens/root.json (BM25 parameters,
+prefix id -> shard url/sha256), docs.json (result metadata, doc lengths) and
+one <prefix>.json per token prefix holding that prefix's postings (lib.search).
+A client fetches root, docs and only the shard(s) its query terms fall in.
+
+Items are taken in the order the accepted set is served, and
+accepted_set_ref.sha256 is the hash of the served bytes: the file the bot
+canonicalizer (tools/autopilot/run.py) leaves in public/dumps, rendered here
+with lib.transform.served_registry. Running before or after the bot gives
+the same result.
+
+Deterministic: the output depends only on the accepted set (generated_at is
+its updated_at), so an unchanged set rewrites nothing. Stale shard files are
+removed.
+
+Usage:
+  python3 scripts/build_search_index.py
+  python3 scripts/build_search_index.py --by topic --max-items 200
+  python3 scripts/build_search_index.py --prefix-len 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "autopilot"))
+
+from lib.fsatomic import atomic_write_text  # noqa: E402
+from lib.jsoncanon import CanonicalJsonOptions, dumps_canonical, options_from_config  # noqa: E402
+from lib.search import SearchIndex, static_index, static_root  # noqa: E402
+from lib.searchindex import PARTITIONS, build_manifest, partition  # noqa: E402
+from lib.transform import compile_sort_key, served_order  # noqa: E402
+
+BASE_URL = "https://www.onetoo.eu"
+ACCEPTED = "dumps/contrib-accepted.json"
+SERVED_ACCEPTED = "public/dumps/contrib-accepted.json"
+MANIFEST = "public/dumps/ai-search-index.json"
+SHARD_DIR = "public/dumps/ai-search/shards"
+TOKEN_DIR = "public/dumps/ai-search/tokens"
+
+
+def load_bot_config() -> Dict[str, Any]:
+    # Same encoding and item order as the autopilot canonicalizer, so it leaves
+    # these files alone and the served accepted set hashes as computed here.
+    return json.loads((ROOT / "tools" / "autopilot" / "config.json").read_text(encoding="utf-8"))
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    if path.exists() and path.read_text(encoding="utf-8") == text:
+        return False
+    atomic_write_text(path, text)
+    return True
+
+
+def sync_dir(d: Path, files: Dict[str, str]) -> Tuple[int, int]:
+    """Write `files` (name -> text) into `d`, delete other *.json there; (written, removed)."""
+    written = sum(write_if_changed(d / name, text) for name, text in sorted(files.items()))
+    removed = 0
+    if d.is_dir():
+        for p in d.glob("*.json"):
+            if p.name not in files:
+                p.unlink()
+                removed += 1
+    return written, removed
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def token_index_files(items: List[Dict[str, Any]], *, base: str, prefix_len: int, generated_at: str, accepted_ref: Dict[str, str], opt: CanonicalJsonOptions) -> Dict[str, str]:
+    index = SearchIndex(items)
+    docs, shards = static_index(index, prefix_len=prefix_len)
+    url = f"{base}/dumps/ai-search/tokens"
+    files = {f"{sid}.json": dumps_canonical(doc, opt=opt) for sid, doc in shards.items()}
+    files["docs.json"] = dumps_canonical(docs, opt=opt)
+    root = static_root(
+        index,
+        prefix_len=prefix_len,
+        generated_at=generated_at,
+        accepted_ref=accepted_ref,
+        docs_ref={"url": f"{url}/docs.json", "sha256": sha256_text(files["docs.json"])},
+        shard_refs={
+            sid: {"url": f"{url}/{sid}.json", "sha256": sha256_text(files[f"{sid}.json"]), "terms": len(doc["terms"])}
+            for sid, doc in shards.items()
+        },
+    )
+    files["root.json"] = dumps_canonical(root, opt=opt)
+    return files
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--by", choices=PARTITIONS, default="language", help="Partition key (default: language)")
+    ap.add_argument("--max-items", type=int, default=500, help="Max items per shard")
+    ap.add_argument("--max-bytes", type=int, default=256 * 1024, help="Max encoded item bytes per shard")
+    ap.add_argument("--prefix-len", type=int, default=2, help="Token prefix length per static token shard")
+    ap.add_argument("--base-url", default=BASE_URL)
+    args = ap.parse_args()
+
+    cfg = load_bot_config()
+    opt = options_from_config(cfg)
+    sort_key = compile_sort_key(cfg.get("rules", {}).get("sort_items_by", ["id", "domain", "url"]), fallback="none")
+    accepted = served_order(json.loads((ROOT / ACCEPTED).read_text(encoding="utf-8")), sort_key)
+    items = accepted.get("items") or []
+
+    shards = partition(items, by=args.by, max_items=args.max_items, max_bytes=args.max_bytes, opt=opt)
+
+    base = args.base_url.rstrip("/")
+    sig_path = ROOT / (SERVED_ACCEPTED + ".minisig")
+    manifest_sig = ROOT / (MANIFEST + ".minisig")
+    accepted_ref = {
+        "url": f"{base}/dumps/contrib-accepted.json",
+        "sha256": sha256_text(dumps_canonical(accepted, opt=opt)),
+        "sig_url": f"{base}/dumps/contrib-accepted.json.minisig",
+    }
+    if not sig_path.exists():
+        print(f"WARN: {sig_path.relative_to(ROOT)} missing; accepted_set_ref.sig_url will not resolve")
+    # The manifest itself is signed detached (minisign) after generation, if at all.
+    signature = (
+        {"alg": "minisign", "value": f"{base}/dumps/ai-search-index.json.minisig"}
+        if manifest_sig.exists()
+        else {"alg": "none", "value": ""}
+    )
+    manifest = build_manifest(
+        shards,
+        shard_url=lambda name: f"{base}/dumps/ai-search/shards/{name}.json",
+        accepted_ref=accepted_ref,
+        generated_at=accepted.get("updated_at") or "1970-01-01T00:00:00Z",
+        signature=signature,
+    )
+
+    written, removed = sync_dir(ROOT / SHARD_DIR, {f"{s.name}.json": s.text for s in shards})
+    changed = write_if_changed(ROOT / MANIFEST, dumps_canonical(manifest, opt=opt))
+
+    tokens = token_index_files(
+        items, base=base, prefix_len=args.prefix_len, generated_at=manifest["generated_at"], accepted_ref=accepted_ref, opt=opt
+    )
+    t_written, t_removed = sync_dir(ROOT / TOKEN_DIR, tokens)
+
+    print(
+        f"search index: {len(items)} items -> {len(shards)} shards (by {args.by}); "
+        f"shards written={written} removed={removed}; manifest {'updated' if changed else 'unchanged'}; "
+        f"merkle_root={manifest['merkle_root']}"
+    )
+    print(f"token index: {len(tokens) - 2} prefix shards (prefix {args.prefix_len}); written={t_written} removed={t_removed}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
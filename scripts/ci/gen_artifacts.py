@@ -2,28 +2,58 @@
 """Generate:
 - public/_deploy.txt  (served marker)
 - public/.well-known/deploy.txt (canonical trust location)
-- public/.well-known/sha256.json (served inventory)
+- public/.well-known/sha256.json (served inventory; lists neither itself nor the merkle proofs)
 - dumps/sha256.json (legacy mirror)
 - .well-known/sha256.json (root mirror, for repos that expose it)
 - .well-known/deploy.txt (root mirror for tooling parity)
+- dumps/sha256.txt (repo-wide `sha256sum` listing; this script is its only writer)
+- dumps/targets.json and .well-known/tfws/v2/inventory.sha256 (both signed: checked
+  on every run, rewritten only with --write-signed, then re-sign their .minisig)
+- public/.well-known/merkle/{index,<shard>}.json (Merkle root over the served
+  inventory + per-file inclusion proofs, sharded by top-level directory; the
+  root is also embedded in sha256.json as `merkle`)
+
+All formats are rendered from one walk of the repo in which every file is
+hashed at most once (tools/autopilot/lib/inventory.py).
 
 Design goals:
 - Deterministic ordering
 - No external deps
 - Works in GitHub Actions (ubuntu-latest)
+- Inventory digests come from the shared hash cache (see tools/autopilot/lib/hashcache.py);
+  --verify-all rehashes everything; misses are hashed on a thread pool (--jobs),
+  --bench prints MB/s and files/s
+- Per-phase timings and cache counters go to dumps/autopilot/runs/gen_artifacts.json
+  (tools/autopilot/lib/instrument.py; ONETOO_PROFILE=1 adds a cProfile dump)
 """
 
 from __future__ import annotations
 
-import hashlib
+import argparse
 import json
 import os
-import shutil
 import subprocess
+import sys
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools" / "autopilot"))
+
+from lib.fsatomic import atomic_write_text  # noqa: E402
+from lib.hashcache import HashCache, default_cache_path  # noqa: E402
+from lib.instrument import Run, is_report_path  # noqa: E402
+from lib.merkle import ALGORITHM as MERKLE_ALGORITHM, MerkleTree, proof_shards  # noqa: E402
+from lib.mirror import sync_tree  # noqa: E402
+from lib.inventory import (  # noqa: E402
+    Inventory,
+    json_text,
+    render_inventory_v1,
+    render_sha256sum,
+    render_targets,
+    render_tfws_inventory,
+)
 
 PUBLIC_DIR = REPO_ROOT / "public"
 ROOT_WELLKNOWN = REPO_ROOT / ".well-known"
@@ -33,6 +63,21 @@ DUMPS_DIR = REPO_ROOT / "dumps"
 EXCLUDE_DIRS = {".git", ".github", "node_modules", ".wrangler"}
 EXCLUDE_FILES = {".DS_Store"}
 
+# Walk-level exclusions for the single repo scan (views add their own).
+SCAN_EXCLUDE_DIRS = {".git", ".cache"}
+
+TFWS_DIR = ".well-known/tfws/v2"
+TFWS_INVENTORY = f"{TFWS_DIR}/inventory.sha256"
+TARGETS = "dumps/targets.json"
+SHA256_TXT = "dumps/sha256.txt"
+MERKLE_DIR = PUBLIC_WELLKNOWN / "merkle"
+MERKLE_SITE_DIR = "/.well-known/merkle/"
+SERVED_INVENTORY = "public/.well-known/sha256.json"
+
+# Written on both sides by this script, so never mirrored (or pruned).
+WELLKNOWN_GENERATED = {"deploy.txt", "sha256.json"}
+PUBLIC_WELLKNOWN_GENERATED = {"merkle/"}
+
 
 def git_short_head() -> str:
     try:
@@ -46,64 +91,125 @@ def utc_now() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
-def sha256_file(p: Path) -> tuple[str, int]:
-    h = hashlib.sha256()
-    size = 0
-    with p.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-            size += len(chunk)
-    return h.hexdigest(), size
-
-
-def should_exclude(path: Path) -> bool:
-    parts = set(path.parts)
-    if parts & EXCLUDE_DIRS:
-        return True
-    if path.name in EXCLUDE_FILES:
-        return True
-    return False
-
-
 def sync_root_wellknown_into_public() -> None:
-    """Mirror root .well-known into public/.well-known so Pages output contains trust-root."""
+    """Mirror root .well-known into public/.well-known so Pages output contains trust-root.
+
+    Incremental: only files whose size/mtime/content differ are replaced
+    (hardlink, else reflink, else copy); files without a source are removed,
+    except the outputs this script generates in public/.well-known.
+    """
     if not ROOT_WELLKNOWN.is_dir():
         return
     PUBLIC_WELLKNOWN.mkdir(parents=True, exist_ok=True)
-    for src in ROOT_WELLKNOWN.rglob("*"):
-        if src.is_dir():
-            continue
-        rel = src.relative_to(ROOT_WELLKNOWN)
-        dst = PUBLIC_WELLKNOWN / rel
-        dst.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(src, dst)
-
-
-def build_inventory_for_public() -> dict:
-    items = []
-    for f in sorted(PUBLIC_DIR.rglob("*")):
-        if f.is_dir():
-            continue
-        if should_exclude(f):
-            continue
-        rel = f.relative_to(PUBLIC_DIR).as_posix()
-        digest, size = sha256_file(f)
-        items.append({
-            "path": f"/{rel}",
-            "sha256": digest,
-            "bytes": size,
+    report = sync_tree(ROOT_WELLKNOWN, PUBLIC_WELLKNOWN, skip=WELLKNOWN_GENERATED, keep=PUBLIC_WELLKNOWN_GENERATED)
+    print(f"sync .well-known: {report.summary()}")
+    for rel in report.removed:
+        print(f"  removed stale public/.well-known/{rel}")
+
+
+def public_view(inv: Inventory) -> list[str]:
+    # The served inventory and the Merkle proofs are rendered from this view
+    # (after it was hashed), so they cannot list themselves.
+    merkle = "public" + MERKLE_SITE_DIR
+    rels = inv.select("public", exclude_dirs=EXCLUDE_DIRS, exclude_names=EXCLUDE_FILES, exclude={SERVED_INVENTORY})
+    return [r for r in rels if not r.startswith(merkle)]
+
+
+def build_inventory_for_public(inv: Inventory) -> dict:
+    return render_inventory_v1(inv.entries(public_view(inv), "public"), updated_at=utc_now(), commit=git_short_head())
+
+
+def write_json(p: Path, data: dict, inv: Inventory | None = None) -> None:
+    write_text(p, json_text(data), inv)
+
+
+def write_text(p: Path, text: str, inv: Inventory | None = None) -> None:
+    """Write an output atomically (never through a hardlinked mirror); with `inv`,
+    record its digest from the rendered bytes."""
+    atomic_write_text(p, text)
+    data = text.encode("utf-8")
+    if inv is not None:
+        inv.put_bytes(p.relative_to(REPO_ROOT).as_posix(), data)
+
+
+def refresh_tfws_inventory(inv: Inventory, write: bool) -> bool:
+    """Compare (and with `write`, rewrite + mirror) the TFWS v2 inventory; True if it drifted."""
+    rels = inv.select(TFWS_DIR, exclude={TFWS_INVENTORY, TFWS_INVENTORY + ".minisig"})
+    text = render_tfws_inventory(inv.entries(rels, TFWS_DIR))
+    path = REPO_ROOT / TFWS_INVENTORY
+    current = path.read_text(encoding="utf-8") if path.exists() else ""
+    if text == current:
+        return False
+    if write:
+        write_text(path, text, inv)
+        write_text(PUBLIC_DIR / TFWS_INVENTORY, text, inv)
+        print(f"Rewrote {TFWS_INVENTORY}: re-sign {TFWS_INVENTORY}.minisig before release.")
+    else:
+        print(f"WARN: {TFWS_INVENTORY} is out of date (run with --write-signed, then re-sign).")
+    return True
+
+
+def refresh_targets(inv: Inventory, write: bool) -> list[str]:
+    """Compare (and with `write`, rewrite) the target digests; returns drifted paths."""
+    path = REPO_ROOT / TARGETS
+    if not path.exists():
+        return []
+    prev = json.loads(path.read_text(encoding="utf-8"))
+
+    def lookup(site_path: str) -> str | None:
+        rel = site_path.lstrip("/")
+        if rel == TARGETS:
+            return None  # cannot list its own digest
+        d = inv.digest(rel)
+        return d[0] if d else None
+
+    doc, changed = render_targets(prev, lookup, generated_at=utc_now())
+    if not changed:
+        return []
+    if write:
+        write_json(path, doc, inv)
+        print(f"Updated {TARGETS} ({', '.join(changed)}): re-sign dumps/sigs for it before release.")
+    else:
+        print(f"WARN: {TARGETS} is out of date for {', '.join(changed)} (run with --write-signed, then re-sign).")
+    return changed
+
+
+def build_merkle(inventory: dict) -> MerkleTree:
+    return MerkleTree((it["path"], it["sha256"]) for it in inventory["items"])
+
+
+def write_merkle(tree: MerkleTree, inventory: dict, inv: Inventory) -> None:
+    """Write one proof file per shard plus index.json; drop shards that no longer exist."""
+    header = {
+        "schema": "onetoo:sha256-merkle:v1",
+        "algorithm": MERKLE_ALGORITHM,
+        "root": tree.root,
+        "count": len(tree),
+    }
+    shards = []
+    names = set()
+    for name, items in sorted(proof_shards(tree).items()):
+        doc = {**header, "shard": name, "items": items}
+        text = json.dumps(doc, ensure_ascii=False, separators=(",", ":")) + "\n"
+        write_text(MERKLE_DIR / f"{name}.json", text, inv)
+        names.add(f"{name}.json")
+        shards.append({
+            "name": name,
+            "url": f"{MERKLE_SITE_DIR}{name}.json",
+            "sha256": inv.digest((MERKLE_DIR / f"{name}.json").relative_to(REPO_ROOT).as_posix())[0],
+            "count": len(items),
         })
-    return {
-        "schema": "onetoo:sha256-inventory:v1",
-        "updated_at": utc_now(),
-        "commit": git_short_head(),
-        "items": items,
+    for stale in MERKLE_DIR.glob("*.json"):
+        if stale.name not in names and stale.name != "index.json":
+            stale.unlink()
+    index = {
+        **header,
+        "updated_at": inventory["updated_at"],
+        "commit": inventory["commit"],
+        "leaf": "sha256(0x00 || path || 0x00 || sha256-hex); node = sha256(0x01 || left || right); odd node promoted",
+        "shards": shards,
     }
-
-
-def write_json(p: Path, data: dict) -> None:
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    write_json(MERKLE_DIR / "index.json", index, inv)
 
 
 def write_deploy_marker() -> None:
@@ -133,23 +239,68 @@ def write_deploy_marker() -> None:
 
 
 def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--verify-all", action="store_true", help="Rehash every file, ignoring (but checking) the hash cache")
+    ap.add_argument("--jobs", type=int, default=0, help="Hashing threads (0 = all cores)")
+    ap.add_argument("--bench", action="store_true", help="Print hashing throughput (MB/s, files/s)")
+    ap.add_argument("--write-signed", action="store_true", help=f"Also rewrite {TARGETS} and {TFWS_INVENTORY} (need re-signing)")
+    args = ap.parse_args()
+    with Run("gen_artifacts", REPO_ROOT) as run:
+        generate(args, run)
+
+
+def generate(args: argparse.Namespace, run: Run) -> None:
     # Mini-polish: allow local runs even if public/ didn't exist yet.
     PUBLIC_DIR.mkdir(parents=True, exist_ok=True)
 
     # Ensure trust-root ends up in published output
-    sync_root_wellknown_into_public()
+    with run.span("sync_wellknown"):
+        sync_root_wellknown_into_public()
 
     # Deploy marker(s)
     write_deploy_marker()
 
-    inv = build_inventory_for_public()
-
-    # Served canonical inventory
-    write_json(PUBLIC_WELLKNOWN / "sha256.json", inv)
-
-    # Mirrors (optional but useful for tooling parity)
-    write_json(DUMPS_DIR / "sha256.json", inv)
-    write_json(ROOT_WELLKNOWN / "sha256.json", inv)
+    cache = HashCache(default_cache_path(REPO_ROOT), REPO_ROOT, verify_all=args.verify_all)
+    t0 = time.perf_counter()
+    with run.span("scan"):
+        inv = Inventory.scan(REPO_ROOT, SCAN_EXCLUDE_DIRS)
+    # Run reports change on every run: never part of the inventory.
+    repo_rels = [r for r in inv.select(exclude={"dumps/sha256.json", SHA256_TXT}) if not is_report_path(r)]
+    with run.span("hash"):
+        inv.hash(cache, repo_rels, args.jobs)
+    elapsed = time.perf_counter() - t0
+    with run.span("save_cache"):
+        cache.save()
+    run.merge("hash_cache", cache.as_dict())
+    run.count("files", len(repo_rels))
+    print(cache.report())
+    if args.bench:
+        print(cache.bench_report(len(repo_rels), sum(inv.digest(r)[1] for r in repo_rels), elapsed))
+
+    with run.span("tfws_inventory"):
+        refresh_tfws_inventory(inv, args.write_signed)
+
+    with run.span("merkle"):
+        inventory = build_inventory_for_public(inv)
+        tree = build_merkle(inventory)
+        inventory["merkle"] = {"algorithm": MERKLE_ALGORITHM, "root": tree.root, "proofs": f"{MERKLE_SITE_DIR}index.json"}
+        write_merkle(tree, inventory, inv)
+    run.count("served_files", len(inventory["items"]))
+
+    with run.span("write_inventory"):
+        # Served canonical inventory
+        write_json(REPO_ROOT / SERVED_INVENTORY, inventory, inv)
+
+        # Mirrors (optional but useful for tooling parity)
+        write_json(DUMPS_DIR / "sha256.json", inventory, inv)
+        write_json(ROOT_WELLKNOWN / "sha256.json", inventory, inv)
+
+    with run.span("targets"):
+        refresh_targets(inv, args.write_signed)
+
+    # Repo-wide sha256sum listing, last so it sees this run's outputs.
+    with run.span("write_sha256sum"):
+        write_text(REPO_ROOT / SHA256_TXT, render_sha256sum(inv.entries(repo_rels)))
 
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-"""Regenerate dumps/sha256.{json,txt} deterministically.
+"""Regenerate dumps/sha256.json deterministically.
 
 Design goals:
 - Deterministic ordering (stable across platforms)
@@ -10,45 +10,50 @@ Usage:
   python3 scripts/generate_dumps.py
   python3 scripts/generate_dumps.py --ci
   python3 scripts/generate_dumps.py --generated-at 2025-12-19T18:00:00Z
+  python3 scripts/generate_dumps.py --verify-all
+  python3 scripts/generate_dumps.py --verify-all --bench --jobs 8
 
 Notes:
 - By default, we hash *everything* that ships to Cloudflare Pages.
-- Exclusions are only for self-generated dump targets (and .git).
+- Exclusions are only for self-generated dump targets (and .git / .cache).
+- dumps/sha256.txt (the same listing as `sha256sum` text) has one writer:
+  scripts/ci/gen_artifacts.py, which renders it from its single inventory
+  pass after all of its other outputs.
+- Digests come from the shared hash cache (.cache/sha256-cache.json, or
+  $ONETOO_HASH_CACHE); only changed files are re-read. --verify-all rehashes
+  everything and reports cache entries that disagree.
+- One pruned walk; cache misses are hashed on a thread pool (--jobs, default
+  all cores), results keep the sorted path order. --bench prints MB/s, files/s.
+- Per-phase timings and cache counters go to dumps/autopilot/runs/generate_dumps.json
+  (lib.instrument; ONETOO_PROFILE=1 adds a cProfile dump).
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
 from pathlib import Path
 import argparse
-import hashlib
 import json
 import os
 import subprocess
-from typing import Dict, List, Tuple
+import sys
+import time
+from typing import List, Tuple
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "autopilot"))
+
+from lib.hashcache import HashCache, default_cache_path  # noqa: E402
+from lib.instrument import Run, is_report_path  # noqa: E402
+from lib.inventory import Entry, Inventory, render_dumps_sha256  # noqa: E402
+
 DUMPS_DIR = ROOT / "dumps"
 
 EXCLUDE_FILES = {
-    DUMPS_DIR / "sha256.json",
-    DUMPS_DIR / "sha256.txt",
+    "dumps/sha256.json",
+    "dumps/sha256.txt",
 }
 
-EXCLUDE_DIR_NAMES = {".git"}
-
-@dataclass(frozen=True)
-class FileHash:
-    rel: str
-    sha256: str
-
-
-def sha256_file(p: Path) -> str:
-    h = hashlib.sha256()
-    with p.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
+EXCLUDE_DIR_NAMES = {".git", ".cache"}
 
 
 def try_git(cmd: List[str]) -> str:
@@ -59,35 +64,39 @@ def try_git(cmd: List[str]) -> str:
         return ""
 
 
-def iter_files() -> List[Path]:
-    out: List[Path] = []
-    for p in ROOT.rglob("*"):
-        if not p.is_file():
-            continue
-        if any(part in EXCLUDE_DIR_NAMES for part in p.parts):
-            continue
-        if p in EXCLUDE_FILES:
-            continue
-        out.append(p)
-    return out
-
-
-def build_hashes() -> List[FileHash]:
-    files = iter_files()
-    # stable ordering: POSIX relative path
-    rels: List[Tuple[str, Path]] = [(p.relative_to(ROOT).as_posix(), p) for p in files]
-    rels.sort(key=lambda x: x[0])
-    return [FileHash(rel=rel, sha256=sha256_file(p)) for rel, p in rels]
+def build_hashes(cache: HashCache, run: Run, jobs: int = 0) -> Tuple[List[Entry], int]:
+    with run.span("scan"):
+        inv = Inventory.scan(ROOT, EXCLUDE_DIR_NAMES)
+    # Run reports change on every run: never part of the inventory.
+    rels = [r for r in inv.select(exclude_names=EXCLUDE_DIR_NAMES, exclude=EXCLUDE_FILES) if not is_report_path(r)]
+    with run.span("hash"):
+        inv.hash(cache, rels, jobs)
+    entries = inv.entries(rels)
+    return entries, sum(e.size for e in entries)
 
 
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--generated-at", default="", help="RFC3339 timestamp (e.g. 2025-12-19T18:00:00Z)")
     ap.add_argument("--ci", action="store_true", help="Fill metadata from CI env vars when possible")
+    ap.add_argument("--verify-all", action="store_true", help="Rehash every file, ignoring (but checking) the hash cache")
+    ap.add_argument("--jobs", type=int, default=0, help="Hashing threads (0 = all cores)")
+    ap.add_argument("--bench", action="store_true", help="Print hashing throughput (MB/s, files/s)")
     args = ap.parse_args()
+    with Run("generate_dumps", ROOT) as run:
+        generate(args, run)
+
 
-    hashes = build_hashes()
-    files_map: Dict[str, str] = {h.rel: h.sha256 for h in hashes}
+def generate(args: argparse.Namespace, run: Run) -> None:
+    cache = HashCache(default_cache_path(ROOT), ROOT, verify_all=args.verify_all)
+    t0 = time.perf_counter()
+    hashes, total_bytes = build_hashes(cache, run, args.jobs)
+    elapsed = time.perf_counter() - t0
+    with run.span("save_cache"):
+        cache.save()
+    run.merge("hash_cache", cache.as_dict())
+    run.count("files", len(hashes))
+    run.count("bytes", total_bytes)
 
     generated_at = args.generated_at
     if args.ci and not generated_at:
@@ -100,33 +109,24 @@ def main() -> None:
     if not generated_at:
         generated_at = "REPLACE_IN_CI"
 
-    commit = try_git(["git", "rev-parse", "HEAD"]) or ""
-    dirty = "" if not commit else ("dirty" if try_git(["git", "status", "--porcelain"]) else "clean")
-
-    out_json = {
-        "$schema": "/schemas/dumps-sha256.schema.json",
-        "platform": "cloudflare-pages",
-        "operator": "onetoo.eu",
-        "generated_at": generated_at,
-        "algorithm": "sha256",
-        "git": {
-            "commit": commit,
-            "working_tree": dirty,
-        },
-        "count": len(files_map),
-        "files": files_map,
-    }
-
-    DUMPS_DIR.mkdir(exist_ok=True)
-    (DUMPS_DIR / "sha256.json").write_text(
-        json.dumps(out_json, indent=2, ensure_ascii=False, sort_keys=True) + "\n",
-        encoding="utf-8",
-    )
-    (DUMPS_DIR / "sha256.txt").write_text(
-        "".join(f"{sha}  {rel}\n" for rel, sha in files_map.items()),
-        encoding="utf-8",
-    )
-    print(f"Wrote {len(files_map)} hashes.")
+    with run.span("git"):
+        commit = try_git(["git", "rev-parse", "HEAD"]) or ""
+        dirty = "" if not commit else ("dirty" if try_git(["git", "status", "--porcelain"]) else "clean")
+
+    with run.span("write"):
+        out_json = render_dumps_sha256(hashes, generated_at=generated_at, commit=commit, working_tree=dirty)
+
+        DUMPS_DIR.mkdir(exist_ok=True)
+        (DUMPS_DIR / "sha256.json").write_text(
+            json.dumps(out_json, indent=2, ensure_ascii=False, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+    print(f"Wrote {out_json['count']} hashes.")
+    print(cache.report())
+    if args.bench:
+        print(cache.bench_report(len(hashes), total_bytes, elapsed))
+    for rel in cache.mismatches:
+        print(f"  stale cache entry: {rel}")
 
 
 if __name__ == "__main__":
@@ -2,10 +2,16 @@
 from __future__ import annotations
 
 import json
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 from xml.sax.saxutils import escape
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "autopilot"))
+
+from lib.instrument import Run  # noqa: E402
+
 BASE_URL = "https://onetoo.eu"  # canonical public base
 
 
@@ -91,38 +97,47 @@ def write_atom(
 
 
 def main() -> None:
+    with Run("generate_feeds", ROOT) as run:
+        generate(run)
+
+
+def generate(run: Run) -> None:
     root = Path(".")
     now = utc_now_iso()
 
     # Changelog
-    c = json.loads((root / "changelog/index.json").read_text(encoding="utf-8"))
-    c_items = c.get("entries", []) if isinstance(c.get("entries"), list) else []
-    c_gen = c.get("generated_at", now)
-    write_atom(
-        root / "changelog/feed.xml",
-        feed_id=f"{BASE_URL}/changelog/feed.xml",
-        title="ONETOO Changelog (Atom)",
-        self_href="/changelog/feed.xml",
-        home_href="/changelog/",
-        items=c_items,
-        generated_at=c_gen,
-        item_kind="changelog",
-    )
+    with run.span("changelog"):
+        c = json.loads((root / "changelog/index.json").read_text(encoding="utf-8"))
+        c_items = c.get("entries", []) if isinstance(c.get("entries"), list) else []
+        c_gen = c.get("generated_at", now)
+        write_atom(
+            root / "changelog/feed.xml",
+            feed_id=f"{BASE_URL}/changelog/feed.xml",
+            title="ONETOO Changelog (Atom)",
+            self_href="/changelog/feed.xml",
+            home_href="/changelog/",
+            items=c_items,
+            generated_at=c_gen,
+            item_kind="changelog",
+        )
+    run.count("changelog_entries", len(c_items))
 
     # Incidents
-    i = json.loads((root / "incidents/index.json").read_text(encoding="utf-8"))
-    i_items = i.get("items", []) if isinstance(i.get("items"), list) else []
-    i_gen = i.get("generated_at", now)
-    write_atom(
-        root / "incidents/feed.xml",
-        feed_id=f"{BASE_URL}/incidents/feed.xml",
-        title="ONETOO Incidents (Atom)",
-        self_href="/incidents/feed.xml",
-        home_href="/incidents/",
-        items=i_items,
-        generated_at=i_gen,
-        item_kind="incidents",
-    )
+    with run.span("incidents"):
+        i = json.loads((root / "incidents/index.json").read_text(encoding="utf-8"))
+        i_items = i.get("items", []) if isinstance(i.get("items"), list) else []
+        i_gen = i.get("generated_at", now)
+        write_atom(
+            root / "incidents/feed.xml",
+            feed_id=f"{BASE_URL}/incidents/feed.xml",
+            title="ONETOO Incidents (Atom)",
+            self_href="/incidents/feed.xml",
+            home_href="/incidents/",
+            items=i_items,
+            generated_at=i_gen,
+            item_kind="incidents",
+        )
+    run.count("incident_items", len(i_items))
 
     print("Generated changelog/feed.xml and incidents/feed.xml ✅")
 
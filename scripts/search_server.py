@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Local search engine over the contrib lanes (search-response-v2), plus benchmark.
+
+Builds an in-memory BM25 inverted index (lib.search) for the stable lane
+(dumps/contrib-accepted.json) and the sandbox lane (dumps/contrib-sandbox.json)
+and answers queries in search-response-v2 shape. Each response carries a
+proof-bundle-v2 for the lane file: its sha256, its detached minisign
+signature, and the result of verifying that signature against the published
+trust root (lib.minisign).
+
+Serve (stand-in for the remote worker; same paths as ai-search.js uses):
+  python3 scripts/search_server.py --port 8787
+  curl 'http://127.0.0.1:8787/search/v1?q=physics&lane=stable&limit=5'
+
+Benchmark (in-process, no HTTP; prints latency percentiles):
+  python3 scripts/search_server.py --bench 10000
+  python3 scripts/search_server.py --bench 10000 --queries queries.txt
+
+One-off query:
+  python3 scripts/search_server.py --query "hgp research"
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "autopilot"))
+
+from lib.minisign import MinisignError, load_keyring, parse_signature, verify_file  # noqa: E402
+from lib.search import SearchIndex, item_fields, percentiles, search_response  # noqa: E402
+
+BASE_URL = "https://www.onetoo.eu"
+LANES = {"stable": "contrib-accepted.json", "sandbox": "contrib-sandbox.json"}
+MAX_LIMIT = 50
+
+
+def lane_path(name: str) -> Path:
+    served = ROOT / "public" / "dumps" / name
+    return served if served.exists() else ROOT / "dumps" / name
+
+
+def signature_check(path: Path) -> str:
+    sig_path = path.with_name(path.name + ".minisig")
+    if not sig_path.exists():
+        return "minisign:missing"
+    try:
+        sig = parse_signature(sig_path.read_text(encoding="utf-8"))
+    except (OSError, UnicodeDecodeError, MinisignError):
+        return "minisign:malformed"
+    entry = load_keyring(ROOT).get(sig.kid)
+    if entry is None:
+        return f"minisign:unknown-key:{sig.kid}"
+    if entry["key"] is None:
+        return f"minisign:key-unavailable:{sig.kid}"
+    err = verify_file(path, sig, entry["key"])
+    return f"minisign:ok:{sig.kid}" if err is None else "minisign:invalid"
+
+
+def load_lane(lane: str, base_url: str) -> Tuple[SearchIndex, Dict[str, Any]]:
+    """(index, proof-bundle-v2) for one lane file."""
+    name = LANES[lane]
+    path = lane_path(name)
+    raw = path.read_bytes()
+    doc = json.loads(raw.decode("utf-8"))
+    index = SearchIndex(doc.get("items") or [])
+    sha = hashlib.sha256(raw).hexdigest()
+    proof = {
+        "version": "2.0",
+        "generated_at": doc.get("updated_at") or "1970-01-01T00:00:00Z",
+        "accepted_set": {
+            "url": f"{base_url}/dumps/{name}",
+            "sha256": sha,
+            "sig_url": f"{base_url}/dumps/{name}.minisig",
+        },
+        "verified_sources": [],
+        "checks": [f"sha256:{sha}", signature_check(path)],
+    }
+    return index, proof
+
+
+class Engine:
+    def __init__(self, base_url: str) -> None:
+        self.lanes: Dict[str, Tuple[SearchIndex, Dict[str, Any]]] = {}
+        for lane in LANES:
+            try:
+                self.lanes[lane] = load_lane(lane, base_url)
+            except (OSError, ValueError) as e:
+                print(f"WARN: lane {lane} not loaded: {e}", file=sys.stderr)
+
+    def query(self, q: str, lane: str = "stable", limit: int = 10) -> Dict[str, Any]:
+        index, proof = self.lanes[lane]
+        return search_response(index, q, lane=lane, proof=proof, limit=max(1, min(limit, MAX_LIMIT)))
+
+
+def make_handler(engine: Engine):
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "onetoo-search-local/1"
+
+        def _send(self, status: int, body: Dict[str, Any], extra: Dict[str, str] | None = None) -> None:
+            data = (json.dumps(body, ensure_ascii=False) + "\n").encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            for k, v in (extra or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:  # noqa: N802
+            url = urlsplit(self.path)
+            if url.path == "/health":
+                self._send(200, {"ok": True, "lanes": {k: ix.stats() for k, (ix, _p) in engine.lanes.items()}})
+                return
+            if url.path not in ("/search/v1", "/search/v2"):
+                self._send(404, {"error": "not found"})
+                return
+            qs = parse_qs(url.query)
+            q = (qs.get("q") or [""])[0].strip()
+            lane = (qs.get("lane") or ["stable"])[0]
+            if not q:
+                self._send(400, {"error": "missing q"})
+                return
+            if lane not in engine.lanes:
+                self._send(400, {"error": f"unknown lane: {lane}"})
+                return
+            try:
+                limit = int((qs.get("limit") or ["10"])[0])
+            except ValueError:
+                limit = 10
+            t0 = time.perf_counter()
+            body = engine.query(q, lane, limit)
+            took = (time.perf_counter() - t0) * 1000
+            # search-response-v2 is closed (additionalProperties: false); timing goes in a header.
+            self._send(200, body, {"Server-Timing": f"search;dur={took:.3f}"})
+
+        def log_message(self, fmt: str, *args: Any) -> None:
+            sys.stderr.write(f"{self.address_string()} {fmt % args}\n")
+
+    return Handler
+
+
+def sample_queries(engine: Engine, n: int, seed: int = 0) -> List[str]:
+    """Deterministic 1-3 term queries drawn from the indexed vocabulary."""
+    vocab = sorted({t for ix, _p in engine.lanes.values() for it in ix.docs for toks in item_fields(it).values() for t in toks})
+    if not vocab:
+        return []
+    rnd = random.Random(seed)
+    return [" ".join(rnd.choice(vocab) for _ in range(rnd.randint(1, 3))) for _ in range(n)]
+
+
+def bench(engine: Engine, queries: List[str], lane: str) -> int:
+    if not queries:
+        print("bench: no queries (empty index)")
+        return 1
+    for q in queries[:100]:  # warm-up
+        engine.query(q, lane)
+    samples = []
+    t_all = time.perf_counter()
+    for q in queries:
+        t0 = time.perf_counter()
+        engine.query(q, lane)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    elapsed = time.perf_counter() - t_all
+    pct = percentiles(samples, (50, 90, 99, 100))
+    ix = engine.lanes[lane][0]
+    print(
+        f"bench: lane={lane} docs={len(ix)} terms={ix.stats()['terms']} queries={len(queries)} "
+        f"in {elapsed:.3f}s -> {len(queries) / max(elapsed, 1e-9):.0f} q/s; latency us "
+        + " ".join(f"{k}={v:.1f}" for k, v in pct.items())
+    )
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8787)
+    ap.add_argument("--base-url", default=BASE_URL, help="Public base URL used in proof bundles")
+    ap.add_argument("--lane", choices=sorted(LANES), default="stable")
+    ap.add_argument("--query", default="", help="Run one query, print the search-response-v2 JSON and exit")
+    ap.add_argument("--bench", type=int, default=0, metavar="N", help="Run N queries in-process and print latency percentiles")
+    ap.add_argument("--queries", default="", help="Query file for --bench (one per line; default: sampled from the index)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    engine = Engine(args.base_url.rstrip("/"))
+    if args.lane not in engine.lanes:
+        print(f"ERROR: lane {args.lane} unavailable", file=sys.stderr)
+        return 1
+    print(
+        f"index: built in {(time.perf_counter() - t0) * 1000:.1f}ms; "
+        + "; ".join(f"{k} " + " ".join(f"{s}={v}" for s, v in ix.stats().items()) for k, (ix, _p) in engine.lanes.items()),
+        file=sys.stderr,
+    )
+
+    if args.query:
+        print(json.dumps(engine.query(args.query, args.lane), ensure_ascii=False, indent=2))
+        return 0
+    if args.bench:
+        if args.queries:
+            pool = [ln.strip() for ln in Path(args.queries).read_text(encoding="utf-8").splitlines() if ln.strip()]
+            queries = [pool[i % len(pool)] for i in range(args.bench)] if pool else []
+        else:
+            queries = sample_queries(engine, args.bench)
+        return bench(engine, queries, args.lane)
+
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(engine))
+    print(f"serving search-response-v2 on http://{args.host}:{args.port}/search/v1?q=...", file=sys.stderr)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,63 +3,217 @@
 
 This keeps ONETOO Trust Hub machine endpoints predictable and safe for agents.
 
+- every schema in schemas/ and api/v1/schemas/ is loaded and compiled once,
+  into one registry, so `$ref`s between `$id`-linked schemas resolve
+- artifacts are mapped to schemas by scripts/schema-manifest.json (globs)
+- files are validated on a process pool (--jobs); each worker compiles the
+  registry once
+- files whose content and schema set are unchanged since their last
+  successful validation are skipped (.cache/schema-validation.json);
+  --all revalidates everything
+- phase timings and counters go to dumps/autopilot/runs/validate_schemas.json
+  (lib.instrument; ONETOO_PROFILE=1 adds a cProfile dump)
+
 Exit non-zero on validation errors.
 """
 
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import sys
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "autopilot"))
+
+from lib.fsatomic import atomic_write_text  # noqa: E402
+from lib.hashcache import HashCache, default_cache_path  # noqa: E402
+from lib.instrument import Run  # noqa: E402
+
+SCHEMA_DIRS = ("schemas", "api/v1/schemas")
+MANIFEST = ROOT / "scripts" / "schema-manifest.json"
+STATE = ROOT / ".cache" / "schema-validation.json"
+SITE = "https://onetoo.eu/"
+
+# Per-process compiled validators: schema URI -> validator.
+_VALIDATORS: Dict[str, object] = {}
 
 
 def load_json(path: Path):
     return json.loads(path.read_text(encoding="utf-8"))
 
 
+def schema_files() -> List[Path]:
+    out: List[Path] = []
+    for d in SCHEMA_DIRS:
+        out.extend(sorted((ROOT / d).glob("*.schema.json")))
+    return out
+
+
+def schema_uri(path: Path, schema: dict) -> str:
+    return schema.get("$id") or SITE + path.relative_to(ROOT).as_posix()
+
+
+def compile_registry() -> Dict[str, object]:
+    """Compile every schema once against a shared registry; URI (and repo path) -> validator."""
+    from jsonschema import Draft202012Validator
+
+    loaded: List[Tuple[str, str, dict]] = []
+    for p in schema_files():
+        schema = load_json(p)
+        Draft202012Validator.check_schema(schema)
+        loaded.append((schema_uri(p, schema), p.relative_to(ROOT).as_posix(), schema))
+
+    try:
+        from referencing import Registry, Resource
+        from referencing.jsonschema import DRAFT202012
+
+        registry = Registry().with_resources(
+            (uri, Resource.from_contents(schema, default_specification=DRAFT202012)) for uri, _rel, schema in loaded
+        )
+
+        def make(uri: str, schema: dict):
+            return Draft202012Validator(schema, registry=registry)
+
+    except ImportError:  # jsonschema < 4.18
+        from jsonschema import RefResolver
+
+        store = {uri: schema for uri, _rel, schema in loaded}
+
+        def make(uri: str, schema: dict):
+            return Draft202012Validator(schema, resolver=RefResolver(uri, schema, store=store))
+
+    out: Dict[str, object] = {}
+    for uri, rel, schema in loaded:
+        out[uri] = out[rel] = make(uri, schema)
+    return out
+
+
+def _init_worker() -> None:
+    _VALIDATORS.update(compile_registry())
+
+
+def validate_one(job: Tuple[str, str]) -> Tuple[str, str, Optional[List[str]]]:
+    """(artifact, schema, None if valid else error lines)."""
+    rel, schema = job
+    if not _VALIDATORS:
+        _init_worker()
+    v = _VALIDATORS.get(schema)
+    if v is None:
+        return rel, schema, [f"schema not found: {schema}"]
+    try:
+        data = load_json(ROOT / rel)
+    except ValueError as e:
+        return rel, schema, [f"invalid JSON: {e}"]
+    errors = sorted(v.iter_errors(data), key=lambda e: list(e.absolute_path))
+    if not errors:
+        return rel, schema, None
+    return rel, schema, [f"at {'/'.join(str(p) for p in e.absolute_path) or '/'}: {e.message}" for e in errors[:20]]
+
+
+def resolve_targets(manifest: dict) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """[(artifact, schema)] in manifest order (deduplicated), plus patterns that matched nothing."""
+    jobs: Dict[str, str] = {}
+    missing: List[str] = []
+    for t in manifest.get("targets", []):
+        for pat in t.get("patterns", []):
+            hits = sorted(p for p in ROOT.glob(pat) if p.is_file())
+            if not hits and not t.get("optional"):
+                missing.append(pat)
+            for p in hits:
+                jobs.setdefault(p.relative_to(ROOT).as_posix(), t["schema"])
+    return list(jobs.items()), missing
+
+
+def schema_set_fingerprint(cache: HashCache) -> str:
+    import jsonschema
+
+    h = hashlib.sha256()
+    try:
+        from importlib.metadata import version
+
+        h.update(version("jsonschema").encode())
+    except Exception:
+        h.update(getattr(jsonschema, "__name__", "").encode())
+    for p, (sha, _size) in zip(schema_files(), cache.hash_many(schema_files())):
+        h.update(f"{p.relative_to(ROOT).as_posix()}\0{sha}\n".encode())
+    return h.hexdigest()
+
+
 def main() -> int:
     try:
-        from jsonschema import Draft202012Validator
+        import jsonschema  # noqa: F401
     except Exception as e:
         print("Missing dependency: jsonschema. Install via `pip install jsonschema`.", file=sys.stderr)
         print(str(e), file=sys.stderr)
         return 2
 
-    root = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--all", action="store_true", help="Revalidate files even if unchanged since their last pass")
+    ap.add_argument("--jobs", type=int, default=0, help="Worker processes (0 = all cores, 1 = in-process)")
+    args = ap.parse_args()
+    with Run("validate_schemas", ROOT) as run:
+        return run.exit_code(validate(args, run))
 
-    targets = [
-        (root / ".well-known" / "ai-trust-hub.json", root / "schemas" / "ai-trust-hub.schema.json"),
-        (root / ".well-known" / "sigstore.json", root / "schemas" / "sigstore-meta.schema.json"),
-        (root / "dumps" / "sha256.json", root / "schemas" / "sha256-inventory.schema.json"),
-        (root / "dumps" / "release.json", root / "schemas" / "release.schema.json"),
-        (root / "dumps" / "release-mega.json", root / "schemas" / "release.schema.json"),
-        (root / "dumps" / "attestations" / "index.json", root / "schemas" / "sigstore-attestations.schema.json"),
-        (root / "incidents" / "index.json", root / "schemas" / "incidents-index.schema.json"),
-    ]
 
-    ok = True
-    for data_path, schema_path in targets:
-        if not data_path.exists():
-            print(f"SKIP: {data_path.relative_to(root)} (missing)")
-            continue
-        if not schema_path.exists():
-            print(f"ERROR: schema missing: {schema_path.relative_to(root)}", file=sys.stderr)
-            ok = False
-            continue
+def validate(args: argparse.Namespace, run: Run) -> int:
+    try:
+        with run.span("compile"):
+            _init_worker()  # compile (and check) every schema up front, in this process too
+    except Exception as e:
+        print(f"ERROR: schema registry: {e}", file=sys.stderr)
+        return 1
+
+    with run.span("resolve"):
+        jobs, missing = resolve_targets(load_json(MANIFEST))
+    for pat in missing:
+        print(f"SKIP: {pat} (missing)")
 
-        data = load_json(data_path)
-        schema = load_json(schema_path)
-        v = Draft202012Validator(schema)
-        errors = sorted(v.iter_errors(data), key=lambda e: list(e.absolute_path))
+    with run.span("hash"):
+        cache = HashCache(default_cache_path(ROOT), ROOT)
+        fp = schema_set_fingerprint(cache)
+        digests = dict(zip((rel for rel, _s in jobs), (d for d, _ in cache.hash_many([ROOT / rel for rel, _s in jobs]))))
+        cache.save()
+    run.merge("hash_cache", cache.as_dict())
+    try:
+        state = load_json(STATE)
+        passed = state.get("passed", {}) if state.get("schemas") == fp else {}
+    except Exception:
+        passed = {}
+
+    todo = [(rel, schema) for rel, schema in jobs if args.all or passed.get(rel) != [schema, digests[rel]]]
+    workers = args.jobs or os.cpu_count() or 1
+    with run.span("validate"):
+        if workers == 1 or len(todo) < 8:
+            results = [validate_one(j) for j in todo]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as ex:
+                results = list(ex.map(validate_one, todo, chunksize=max(1, len(todo) // (workers * 4))))
+
+    ok = True
+    fresh = {rel: [schema, digests[rel]] for rel, schema in jobs if passed.get(rel) == [schema, digests[rel]]}
+    for rel, schema, errors in results:
         if errors:
             ok = False
-            print(f"\n❌ INVALID: {data_path.relative_to(root)}")
-            for err in errors[:20]:
-                path = "/".join([str(p) for p in err.absolute_path])
-                print(f"  - at {path or '/'}: {err.message}")
+            run.count("invalid")
+            print(f"\n❌ INVALID: {rel}")
+            for line in errors:
+                print(f"  - {line}")
         else:
-            print(f"✅ VALID: {data_path.relative_to(root)}")
+            fresh[rel] = [schema, digests[rel]]
+            print(f"✅ VALID: {rel}")
+    skipped = len(jobs) - len(todo)
+    run.count("artifacts", len(jobs))
+    run.count("validated", len(todo))
+    run.count("unchanged", skipped)
+    print(f"schemas: {len(schema_files())} compiled; artifacts: {len(jobs)} ({len(todo)} validated, {skipped} unchanged)")
 
+    atomic_write_text(STATE, json.dumps({"schemas": fp, "passed": dict(sorted(fresh.items()))}, indent=1) + "\n")
     return 0 if ok else 1
 
 
@@ -35,6 +35,10 @@ if command -v minisign >/dev/null 2>&1; then
 else
   warn "minisign not found; skipping signature verification"
 fi
+if command -v python >/dev/null 2>&1; then
+  # Batch check of every *.minisig against the published keys (no minisign binary needed).
+  python scripts/verify_signatures.py > /dev/null && ok "All detached signatures verify" || warn "Some signatures did not verify (run: python scripts/verify_signatures.py)"
+fi
 
 log "Step 4/4 — policy parity check"
 if [ -f "scripts/policy.sh" ] && [ -f ".well-known/policy.sh" ]; then
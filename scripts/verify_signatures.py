@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Verify every detached minisign signature (*.minisig) in the repo, in parallel.
+
+For each signature:
+- parse the .minisig (legacy "Ed" or prehashed "ED" signatures)
+- resolve the signed file: the sibling without `.minisig`, or for
+  dumps/sigs/<name>.minisig -> dumps/<name> and
+  dumps/sigs/targets/a__b.minisig -> a/b
+- pick the public key by key id from the published trust root
+  (.well-known/minisign.pub, .well-known/keys/minisign/*.pub, status from
+  .well-known/key-history.json)
+- verify the Ed25519 signature and the trusted-comment (global) signature
+
+Verification runs on a process pool (--jobs). Uses the optional
+`cryptography` package when installed, else a pure-Python Ed25519.
+
+Usage:
+  python3 scripts/verify_signatures.py
+  python3 scripts/verify_signatures.py --report dumps/autopilot/signatures.json --bench
+  python3 scripts/verify_signatures.py .well-known schemas
+
+Exit non-zero when a signature is invalid, malformed, made by an unknown
+(or unpublished) key, or its signed file is missing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "autopilot"))
+
+from lib.minisign import BACKEND, MinisignError, load_keyring, parse_signature, verify_file  # noqa: E402
+
+EXCLUDE_DIR_NAMES = {".git", ".cache", "node_modules", ".wrangler"}
+
+SIG_DIRS = {
+    "dumps/sigs/targets": lambda name: name.replace("__", "/"),
+    "dumps/sigs": lambda name: f"dumps/{name}",
+}
+
+
+def iter_signatures(paths: List[Path]) -> List[Path]:
+    out = []
+    for base in paths:
+        if base.is_file():
+            out.append(base)
+            continue
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames[:] = [d for d in dirnames if d not in EXCLUDE_DIR_NAMES]
+            out.extend(Path(dirpath) / n for n in filenames if n.endswith(".minisig"))
+    return sorted(set(out))
+
+
+def signed_file_for(sig_path: Path) -> Path:
+    rel = sig_path.relative_to(ROOT).as_posix()
+    parent, _, name = rel.rpartition("/")
+    name = name[: -len(".minisig")]
+    sibling = sig_path.with_name(name)
+    if sibling.exists() or parent not in SIG_DIRS:
+        return sibling
+    return ROOT / SIG_DIRS[parent](name)
+
+
+def check_one(job: Tuple[str, str, Dict[str, Dict[str, object]]]) -> Dict[str, object]:
+    sig_rel, file_rel, ring = job
+    res: Dict[str, object] = {"signature": sig_rel, "file": file_rel}
+    try:
+        sig = parse_signature((ROOT / sig_rel).read_text(encoding="utf-8"))
+    except (OSError, UnicodeDecodeError, MinisignError) as e:
+        res.update(status="malformed", error=str(e))
+        return res
+    res.update(kid=sig.kid, algorithm=sig.algorithm.decode(), trusted_comment=sig.trusted_comment)
+    entry = ring.get(sig.kid)
+    if entry is None:
+        res.update(status="unknown-key")
+        return res
+    res["key_status"] = entry["status"]
+    if entry["key"] is None:
+        res.update(status="key-unavailable")  # in key-history, but no public key published
+        return res
+    path = ROOT / file_rel
+    if not path.is_file():
+        res.update(status="missing-file")
+        return res
+    res["bytes"] = path.stat().st_size
+    err: Optional[str] = verify_file(path, sig, entry["key"])
+    res.update(status="ok" if err is None else "invalid", **({"error": err} if err else {}))
+    return res
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("paths", nargs="*", help="Files or directories to scan (default: whole repo)")
+    ap.add_argument("--jobs", type=int, default=0, help="Worker processes (0 = all cores, 1 = in-process)")
+    ap.add_argument("--report", default="", help="Write the machine-readable JSON report here")
+    ap.add_argument("--bench", action="store_true", help="Print throughput (signatures/s, MB/s)")
+    args = ap.parse_args()
+
+    ring = load_keyring(ROOT)
+    sigs = iter_signatures([Path(p).resolve() for p in args.paths] or [ROOT])
+    jobs = [(s.relative_to(ROOT).as_posix(), signed_file_for(s).relative_to(ROOT).as_posix(), ring) for s in sigs]
+
+    t0 = time.perf_counter()
+    workers = args.jobs or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 2:
+        results = [check_one(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(check_one, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    elapsed = time.perf_counter() - t0
+
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+        if r["status"] != "ok":
+            print(f"{r['status'].upper()}: {r['signature']} -> {r['file']}" + (f" ({r['error']})" if r.get("error") else ""))
+        elif r.get("key_status") == "retired":
+            print(f"OK (retired key {r['kid']}): {r['signature']}")
+
+    total_bytes = sum(int(r.get("bytes", 0)) for r in results)
+    summary = {
+        "total": len(results),
+        "counts": dict(sorted(counts.items())),
+        "backend": BACKEND,
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 3),
+    }
+    print("signatures: " + " ".join(f"{k}={v}" for k, v in summary["counts"].items()) + f" total={len(results)}")
+    if args.bench:
+        el = max(elapsed, 1e-9)
+        print(
+            f"bench: {len(results)} signatures, {total_bytes} bytes in {elapsed:.3f}s "
+            f"-> {len(results) / el:.1f} sig/s, {total_bytes / el / 1e6:.1f} MB/s "
+            f"(backend={BACKEND}, workers={workers})"
+        )
+    if args.report:
+        report = {
+            "schema": "onetoo:signature-report:v1",
+            "keys": {kid: {"status": e["status"], "source": e["source"]} for kid, e in sorted(ring.items())},
+            "summary": summary,
+            "results": results,
+        }
+        out = Path(args.report)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+    return 0 if counts.get("ok", 0) == len(results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
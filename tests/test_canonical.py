@@ -1,7 +1,17 @@
-from tools.autopilot.lib.jsoncanon import CanonicalJsonOptions, dumps_canonical
+from tools.autopilot.lib.jsoncanon import CanonicalJsonOptions, dump_canonical_json, dumps_canonical, iter_canonical_chunks
 
 
 def test_canonical_newline():
     s = dumps_canonical({"b": 1, "a": 2}, opt=CanonicalJsonOptions(sort_keys=True, compact=True, ensure_ascii=False, newline=True))
     assert s.endswith("\n")
     assert s.strip() == '{"a":2,"b":1}'
+
+
+def test_streamed_chunks_match_dumps(tmp_path):
+    obj = {"z": {"b": [1, 2]}, "items": [{"id": "b", "t": "ž"}, {"id": "a"}], "empty": []}
+    opt = CanonicalJsonOptions()
+    assert "".join(iter_canonical_chunks(obj, opt=opt)) == dumps_canonical(obj, opt=opt)
+
+    p = tmp_path / "out.json"
+    dump_canonical_json(p, obj)
+    assert p.read_text(encoding="utf-8") == dumps_canonical(obj, opt=opt)
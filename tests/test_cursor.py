@@ -0,0 +1,64 @@
+from tools.autopilot.lib.cursor import SyncCursor
+
+
+def test_cursor_roundtrip_and_retry(tmp_path):
+    c = SyncCursor.load(tmp_path / "cursor.json")
+    assert c.empty
+    c.advance([("2026-01-01T00:00:00Z", "b"), ("2026-01-01T00:00:00Z", "a")])
+    assert c.position() == ("2026-01-01T00:00:00Z", "b")
+    assert c.is_after("2026-01-01T00:00:00Z", "c")
+    assert not c.is_after("2026-01-01T00:00:00Z", "a")
+
+    c.mark_failed("x")
+    c.mark_failed("y", count=False)
+    c.mark_failed("x")
+    assert c.retry_ids(2) == ["y"]
+    assert c.prune(2) == ["x"]
+    c.save("2026-01-02T00:00:00Z")
+
+    again = SyncCursor.load(tmp_path / "cursor.json")
+    assert again.position() == c.position()
+    assert again.retry == {"y": 0}
+
+
+def test_cursor_save_skips_unchanged_state(tmp_path):
+    c = SyncCursor.load(tmp_path / "cursor.json")
+    c.advance([("2026-01-01T00:00:00Z", "a")])
+    assert c.save("2026-01-02T00:00:00Z")
+
+    again = SyncCursor.load(tmp_path / "cursor.json")
+    assert not again.save("2026-01-03T00:00:00Z")
+    assert SyncCursor.load(tmp_path / "cursor.json").updated_at == "2026-01-02T00:00:00Z"
+    again.mark_failed("b")
+    assert again.save("2026-01-03T00:00:00Z")
+
+
+def test_advance_stops_at_bound_and_held_ids(tmp_path):
+    c = SyncCursor.load(tmp_path / "cursor.json")
+    keys = [("t1", "a"), ("t3", "c"), ("t2", "b")]
+    c.advance(keys, bound=("t3", "c"))
+    assert c.position() == ("t2", "b")
+    c.advance(keys, bound=())
+    assert c.position() == ("t2", "b")
+
+    c.hold("x")
+    assert c.tracked("x") and c.retry_ids(3) == []
+    c.save("2026-01-01T00:00:00Z")
+    assert SyncCursor.load(tmp_path / "cursor.json").held == ["x"]
+    c.mark_failed("x")
+    assert c.held == [] and c.retry == {"x": 1}
+    c.mark_done("x")
+    assert not c.tracked("x")
+
+
+def test_repeated_decision_is_not_a_change(tmp_path):
+    c = SyncCursor.load(tmp_path / "cursor.json")
+    c.mark_failed("x")
+    assert c.record_decision("x", "sandbox:0")
+    c.save("2026-01-02T00:00:00Z")
+
+    again = SyncCursor.load(tmp_path / "cursor.json")
+    assert not again.record_decision("x", "sandbox:0")
+    assert again.record_decision("x", "reject:1")
+    again.mark_done("x")
+    assert "x" not in again.decided
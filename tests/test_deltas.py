@@ -0,0 +1,111 @@
+import hashlib
+import json
+
+from tools.autopilot.lib.deltas import DeltaPublisher
+from tools.autopilot.lib.jsoncanon import CanonicalJsonOptions
+from tools.autopilot.lib.lanes import LaneSpec, LaneStore
+from tools.autopilot.lib.transform import served_registry
+
+
+def _store(tmp_path, snapshot_every=3, served=None):
+    spec = LaneSpec(
+        name="sandbox",
+        snapshot="dumps/contrib-sandbox.json",
+        mirrors=("public/dumps/contrib-sandbox.json",),
+        header={"schema": "s", "lane": "sandbox"},
+        deltas="public/dumps/deltas/sandbox",
+    )
+    return LaneStore(tmp_path / "lanes", [spec], repo_root=tmp_path, snapshot_every=snapshot_every, served=served)
+
+
+def _sha(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _head(tmp_path):
+    return DeltaPublisher(tmp_path / "public/dumps/deltas/sandbox", "sandbox", url_base="/dumps/deltas/sandbox").head()
+
+
+def _file(tmp_path, url):
+    return json.loads((tmp_path / "public" / url.lstrip("/")).read_text(encoding="utf-8"))
+
+
+def _run(tmp_path, ids, ts, served=None):
+    store = _store(tmp_path, served=served)
+    for i in ids:
+        store.append("sandbox", {"added_from_pending": i, "url": f"https://{i}"})
+    store.compact(ts)
+    return store.published.get("sandbox", "")
+
+
+def test_snapshot_then_chained_deltas(tmp_path):
+    assert _run(tmp_path, ["a"], "t1") == "snapshot"
+    head = _head(tmp_path)
+    assert head["seq"] == 1 and head["deltas"] == []
+    assert _file(tmp_path, head["snapshot"]["url"])["items"][0]["added_from_pending"] == "a"
+
+    assert _run(tmp_path, ["b", "c"], "t2") == "delta"
+    head2 = _head(tmp_path)
+    delta = _file(tmp_path, head2["deltas"][0]["url"])
+    assert delta["base_sha256"] == head["sha256"] and delta["sha256"] == head2["sha256"]
+    assert [it["added_from_pending"] for it in delta["added"]] == ["b", "c"] and delta["removed"] == []
+
+    # nothing new: no seq, no files
+    assert _run(tmp_path, [], "t3") == ""
+    assert _head(tmp_path)["seq"] == 2
+
+
+def test_out_of_band_edit_and_retention(tmp_path):
+    _run(tmp_path, ["a"], "t1")
+    lane = tmp_path / "dumps/contrib-sandbox.json"
+    lane.write_text(lane.read_text(encoding="utf-8").replace('"t1"', '"edited"'), encoding="utf-8")
+    assert _run(tmp_path, ["b"], "t2") == "snapshot"
+
+    for n, i in enumerate("cdef"):
+        _run(tmp_path, [i], f"t{n + 3}")
+    head = _head(tmp_path)
+    assert head["seq"] == 6 and head["snapshot"]["seq"] == 5
+    assert [d["seq"] for d in head["deltas"]] == [3, 4, 5, 6]
+    files = sorted(p.name for p in (tmp_path / "public/dumps/deltas/sandbox").iterdir())
+    assert files == ["000003.delta.json", "000004.delta.json", "000005.delta.json", "000006.delta.json",
+                     "head.json", "snapshot-000005.json"]
+
+
+def test_bootstrap_existing_lane(tmp_path):
+    lane = tmp_path / "dumps/contrib-sandbox.json"
+    lane.parent.mkdir(parents=True)
+    lane.write_text(json.dumps({"schema": "s", "updated_at": "t0", "items": [{"url": "https://x"}]}), encoding="utf-8")
+    store = _store(tmp_path)
+    assert store.compact("t1") == []
+    assert store.published == {"sandbox": "snapshot"}
+    head = _head(tmp_path)
+    assert head["updated_at"] == "t0" and head["count"] == 1
+
+
+def test_bootstrap_hashes_the_published_bytes(tmp_path):
+    lane = tmp_path / "dumps/contrib-sandbox.json"
+    lane.parent.mkdir(parents=True)
+    lane.write_bytes(b'{\r\n  "schema": "s",\r\n  "items": [{"url": "https://x"}]\r\n}\r\n')
+    _store(tmp_path).compact("t1")
+    head = _head(tmp_path)
+    snapshot = tmp_path / "public" / head["snapshot"]["url"].lstrip("/")
+    assert snapshot.read_bytes() == lane.read_bytes()
+    assert head["sha256"] == head["snapshot"]["sha256"] == _sha(snapshot)
+
+
+def test_served_rendering_is_what_deltas_hash(tmp_path):
+    served = served_registry(["url"], CanonicalJsonOptions())
+    _run(tmp_path, ["b"], "t1", served)
+    mirror = tmp_path / "public/dumps/contrib-sandbox.json"
+    first = _sha(mirror)
+    assert _head(tmp_path)["sha256"] == first
+
+    _run(tmp_path, ["a"], "t2", served)
+    head = _head(tmp_path)
+    delta = _file(tmp_path, head["deltas"][0]["url"])
+    assert delta["base_sha256"] == first and delta["sha256"] == head["sha256"] == _sha(mirror)
+    # the served file is canonical and sorted; the primary keeps append order
+    assert mirror.read_text(encoding="utf-8") == served(json.loads(mirror.read_text(encoding="utf-8")))
+    primary = json.loads((tmp_path / "dumps/contrib-sandbox.json").read_text(encoding="utf-8"))
+    assert [it["url"] for it in primary["items"]] == ["https://b", "https://a"]
+    assert [it["url"] for it in _file(tmp_path, "/dumps/contrib-sandbox.json")["items"]] == ["https://a", "https://b"]
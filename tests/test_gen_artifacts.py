@@ -0,0 +1,49 @@
+import argparse
+import hashlib
+import importlib.util
+import json
+import shutil
+from pathlib import Path
+
+from tools.autopilot.lib.instrument import Run
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _scratch(tmp_path):
+    """Copy of the generator and its libs over a tiny site, so generate() writes under tmp_path."""
+    (tmp_path / "scripts" / "ci").mkdir(parents=True)
+    shutil.copy(ROOT / "scripts" / "ci" / "gen_artifacts.py", tmp_path / "scripts" / "ci")
+    shutil.copytree(ROOT / "tools" / "autopilot" / "lib", tmp_path / "tools" / "autopilot" / "lib")
+    (tmp_path / "public" / "docs").mkdir(parents=True)
+    (tmp_path / "public" / "index.html").write_text("<h1>hi</h1>\n", encoding="utf-8")
+    (tmp_path / "public" / "docs" / "a.txt").write_text("a\n", encoding="utf-8")
+    (tmp_path / ".well-known").mkdir()
+    (tmp_path / ".well-known" / "security.txt").write_text("Contact: x\n", encoding="utf-8")
+    spec = importlib.util.spec_from_file_location("gen_artifacts_scratch", tmp_path / "scripts" / "ci" / "gen_artifacts.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def test_served_digests_match_disk_after_repeated_runs(tmp_path, monkeypatch):
+    monkeypatch.delenv("ONETOO_HASH_CACHE", raising=False)
+    gen = _scratch(tmp_path)
+    args = argparse.Namespace(verify_all=False, jobs=1, bench=False, write_signed=False)
+    for _ in range(2):
+        with Run("gen_artifacts", tmp_path, quiet=True) as run:
+            gen.generate(args, run)
+
+    public = tmp_path / "public"
+    inventory = json.loads((public / ".well-known" / "sha256.json").read_text(encoding="utf-8"))
+    paths = [it["path"] for it in inventory["items"]]
+    assert "/.well-known/sha256.json" not in paths
+    assert not any(p.startswith("/.well-known/merkle/") for p in paths)
+    assert "/docs/a.txt" in paths and "/.well-known/security.txt" in paths
+    for it in inventory["items"]:
+        assert hashlib.sha256((public / it["path"].lstrip("/")).read_bytes()).hexdigest() == it["sha256"], it["path"]
+
+    index = json.loads((public / ".well-known" / "merkle" / "index.json").read_text(encoding="utf-8"))
+    assert index["root"] == inventory["merkle"]["root"]
+    for shard in index["shards"]:
+        assert hashlib.sha256((public / shard["url"].lstrip("/")).read_bytes()).hexdigest() == shard["sha256"]
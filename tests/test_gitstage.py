@@ -0,0 +1,52 @@
+import shutil
+import subprocess
+
+import pytest
+
+from tools.autopilot.lib.gitstage import StatusEntry, parse_porcelain_v2, stage, status
+
+
+def test_parse_records_with_renames_and_odd_paths():
+    data = (
+        b"1 .M N... 100644 100644 100644 aaa bbb dir/with space.json\0"
+        b"2 R. N... 100644 100644 100644 aaa aaa R100 new name.json\0old\nname.json\0"
+        b"? caf\xc3\xa9 \"quoted\".json\0"
+        b"u UU N... 100644 100644 100644 100644 a b c conflict.json\0"
+    )
+    assert parse_porcelain_v2(data) == [
+        StatusEntry("1", ".M", "dir/with space.json"),
+        StatusEntry("2", "R.", "new name.json", "old\nname.json"),
+        StatusEntry("?", "??", 'café "quoted".json'),
+        StatusEntry("u", "UU", "conflict.json"),
+    ]
+    assert parse_porcelain_v2(data)[1].paths == ["new name.json", "old\nname.json"]
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+def test_status_and_single_call_stage(tmp_path):
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True).stdout
+
+    git("init", "-q")
+    git("config", "user.email", "t@example.invalid")
+    git("config", "user.name", "t")
+    (tmp_path / "a b.json").write_text("1")
+    (tmp_path / "gone.json").write_text("1")
+    git("add", "-A")
+    git("commit", "-qm", "init")
+
+    (tmp_path / "a b.json").write_text("2")
+    (tmp_path / "gone.json").unlink()
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "[new]*.json").write_text("3")
+
+    changed = sorted(p for e in status(tmp_path) for p in e.paths)
+    assert changed == ["a b.json", "gone.json", "sub/[new]*.json"]
+    assert [e.path for e in status(tmp_path, ["sub"])] == ["sub/[new]*.json"]
+
+    assert stage(tmp_path, changed) == 3
+    assert git("diff", "--cached", "--name-status").decode().splitlines() == [
+        "M\ta b.json",
+        "D\tgone.json",
+        "A\tsub/[new]*.json",
+    ]
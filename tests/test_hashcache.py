@@ -0,0 +1,38 @@
+import hashlib
+import os
+from pathlib import Path
+
+from tools.autopilot.lib.hashcache import HashCache
+
+
+def _old(p: Path) -> None:
+    os.utime(p, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+
+
+def test_hash_cache_rehashes_only_changed_files(tmp_path: Path):
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    a.write_bytes(b"alpha")
+    b.write_bytes(b"beta")
+    _old(a)
+    _old(b)
+    cache_file = tmp_path / ".cache" / "c.json"
+
+    c1 = HashCache(cache_file, tmp_path)
+    assert c1.sha256(a) == (hashlib.sha256(b"alpha").hexdigest(), 5)
+    c1.sha256(b)
+    c1.save()
+    assert (c1.misses, c1.stat_hits) == (2, 0)
+
+    b.write_bytes(b"beta!")
+    _old(b)
+    c2 = HashCache(cache_file, tmp_path)
+    assert c2.sha256(a)[0] == hashlib.sha256(b"alpha").hexdigest()
+    assert c2.sha256(b) == (hashlib.sha256(b"beta!").hexdigest(), 5)
+    assert (c2.misses, c2.stat_hits) == (1, 1)
+    c2.save()
+
+    # A poisoned entry is served normally, but --verify-all catches it.
+    c3 = HashCache(cache_file, tmp_path, verify_all=True)
+    c3._stat["a.txt"][3] = "0" * 64
+    assert c3.sha256(a)[0] == hashlib.sha256(b"alpha").hexdigest()
+    assert c3.mismatches == ["a.txt"]
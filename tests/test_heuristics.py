@@ -0,0 +1,50 @@
+import dataclasses
+import itertools
+import json
+from pathlib import Path
+
+import pytest
+
+from tools.autopilot.lib.heuristics import RuleProgram
+
+ROOT = Path(__file__).resolve().parents[1]
+
+HEUR = json.loads((ROOT / "autopilot" / "heuristics.json").read_text(encoding="utf-8"))
+PROGRAM = RuleProgram.compile(HEUR)
+
+
+def test_hard_fail_rules_in_order():
+    assert PROGRAM.hard_fail("https://LOCALHOST/x").id == "deny_private_ips"
+    assert PROGRAM.hard_fail("http://example.org/").id == "require_https"
+    # file: also fails require_https first, as rules are checked in file order
+    assert PROGRAM.hard_fail("file:///etc/passwd").id == "require_https"
+    assert PROGRAM.hard_fail("HTTPS://example.org/") is None
+
+
+def test_points_table_and_thresholds():
+    assert PROGRAM.points["wellKnown_http_200"] == 15
+    assert PROGRAM.points["allow_host_bonus"] == 20
+    assert (PROGRAM.accept_at, PROGRAM.sandbox_at) == (35, 10)
+    assert "www.hgpedu.eu" in PROGRAM.allow_hosts
+    with pytest.raises(TypeError):
+        PROGRAM.points["repo_github"] = 99
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        PROGRAM.accept_at = 0
+
+
+def test_batch_matches_single_scoring():
+    names = ["wellKnown_present", "wellKnown_http_200", "minisign_pub_200", "sha256_json_200",
+             "security_txt_200", "repo_github", "allow_host_bonus", "tfws_min_bundle"]
+    vectors = [dict(zip(names, bits)) for bits in itertools.product([False, True], repeat=len(names))]
+    scores = PROGRAM.score_batch(vectors)
+    assert scores == [PROGRAM.score(v) for v in vectors]
+    assert max(scores) == 75  # tfws_min_bundle is derived after scoring and never adds points
+    assert PROGRAM.decide_batch([75, 20, 5, 90], [None, None, None, PROGRAM.hard[0]]) == [
+        "accept", "sandbox", "reject", "reject",
+    ]
+
+
+def test_fingerprint_tracks_scoring_sections_only():
+    changed = dict(HEUR, defaults=dict(HEUR["defaults"], min_score_to_accept=50))
+    assert RuleProgram.compile(changed).fingerprint != PROGRAM.fingerprint
+    assert RuleProgram.compile(dict(HEUR, rate_limits={})).fingerprint == PROGRAM.fingerprint
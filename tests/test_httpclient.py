@@ -0,0 +1,34 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tools.autopilot.lib.httpclient import HttpPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_connections_are_reused():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        pool = HttpPool(max_idle_per_host=2)
+        url = f"http://127.0.0.1:{srv.server_address[1]}/x"
+        for _ in range(5):
+            assert pool.request("GET", url).body == b"ok"
+        assert pool.stats.handshakes == 1
+        assert pool.stats.reused == 4
+        pool.close()
+    finally:
+        srv.shutdown()
+        srv.server_close()
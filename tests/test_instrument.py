@@ -0,0 +1,51 @@
+import json
+import threading
+
+import pytest
+
+from tools.autopilot.lib.instrument import REPORT_DIR, Run, is_report_path, summary_table
+
+
+def test_spans_counters_and_report(tmp_path, capsys):
+    with Run("demo", tmp_path, profile=False) as run:
+        with run.span("outer"):
+            with run.span("inner"):
+                pass
+            with run.span("inner"):
+                pass
+        workers = [threading.Thread(target=run.count, args=("hits", 2)) for _ in range(4)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        run.merge("http", {"requests": 3, "ok": True})
+        run.note("changed", False)
+
+    doc = json.loads((tmp_path / REPORT_DIR / "demo.json").read_text(encoding="utf-8"))
+    assert doc["status"] == "ok"
+    assert [(s["name"], s["calls"]) for s in doc["spans"]] == [("outer", 1), ("outer/inner", 2)]
+    assert doc["counters"] == {"hits": 8, "http.requests": 3}
+    assert doc["info"] == {"changed": False}
+    assert "outer/inner" in capsys.readouterr().out
+    assert is_report_path(f"{REPORT_DIR}/demo.json")
+
+
+def test_report_written_when_run_raises(tmp_path):
+    with pytest.raises(ValueError):
+        with Run("boom", tmp_path, profile=False, quiet=True) as run:
+            with run.span("work"):
+                raise ValueError("x")
+    doc = json.loads((tmp_path / REPORT_DIR / "boom.json").read_text(encoding="utf-8"))
+    assert doc["status"] == "error" and doc["spans"][0]["calls"] == 1
+    assert summary_table(doc).startswith("run boom: error")
+
+
+def test_nonzero_exit_code_is_an_error(tmp_path):
+    with Run("fails", tmp_path, profile=False, quiet=True) as run:
+        assert run.exit_code(1) == 1
+    doc = json.loads((tmp_path / REPORT_DIR / "fails.json").read_text(encoding="utf-8"))
+    assert doc["status"] == "error" and doc["info"] == {"exit_code": 1}
+
+    with Run("passes", tmp_path, profile=False, quiet=True) as run:
+        run.exit_code(0)
+    assert json.loads((tmp_path / REPORT_DIR / "passes.json").read_text(encoding="utf-8"))["status"] == "ok"
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from tools.autopilot.lib.hashcache import HashCache
+from tools.autopilot.lib.inventory import Inventory, render_inventory_v1, render_sha256sum, render_tfws_inventory
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_single_scan_renders_every_view(tmp_path: Path):
+    for rel, data in {
+        "public/a-b/x.txt": b"1",
+        "public/a/x.txt": b"2",
+        "public/node_modules/m.js": b"3",
+        "top.txt": b"4",
+    }.items():
+        p = tmp_path / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(data)
+
+    cache = HashCache(tmp_path / ".cache" / "c.json", tmp_path)
+    inv = Inventory.scan(tmp_path, {".git", ".cache"})
+    everything = inv.select()
+    public = inv.select("public", exclude_dirs={"node_modules"})
+    inv.hash(cache, everything)
+    inv.hash(cache, public)
+    assert cache.misses == 4  # each file read once
+
+    doc = render_inventory_v1(inv.entries(public, "public"), updated_at="t", commit="c")
+    assert [it["path"] for it in doc["items"]] == ["/a/x.txt", "/a-b/x.txt"]  # Path order
+    assert render_sha256sum(inv.entries(everything)).splitlines()[-1].endswith("  top.txt")
+
+    inv.put_bytes("top.txt", b"changed")
+    assert inv.digest("top.txt")[1] == 7
+
+
+def test_tfws_inventory_matches_published_file():
+    cache = HashCache(Path("/nonexistent/cache.json"), ROOT)
+    inv = Inventory.scan(ROOT / ".well-known" / "tfws", ())
+    rels = inv.select("v2", exclude={"v2/inventory.sha256", "v2/inventory.sha256.minisig"})
+    inv.hash(cache, rels)
+    text = render_tfws_inventory(inv.entries(rels, "v2"))
+    assert text == (ROOT / ".well-known/tfws/v2/inventory.sha256").read_text(encoding="utf-8")
@@ -0,0 +1,23 @@
+from datetime import datetime, timezone
+
+from tools.autopilot.lib.jsonl import JsonlLog, iter_records, recent_segments
+
+
+def test_size_and_period_rotation(tmp_path):
+    path = tmp_path / "audit-log.jsonl"
+    jan = datetime(2026, 1, 5, tzinfo=timezone.utc)
+    with JsonlLog(path, max_bytes=40, period="month", now=jan) as log:
+        for i in range(3):
+            log.append({"i": i, "pad": "x" * 10})
+    assert [p.name for p in recent_segments(path, 0)] == [
+        "audit-log.2026-01.1.jsonl",
+        "audit-log.2026-01.2.jsonl",
+        "audit-log.jsonl",
+    ]
+
+    feb = datetime(2026, 2, 1, tzinfo=timezone.utc)
+    with JsonlLog(path, max_bytes=0, period="month", now=feb) as log:
+        log.append({"i": 3})
+    assert recent_segments(path, 2)[0].name == "audit-log.2026-01.3.jsonl"
+    assert [r["i"] for r in iter_records(path)] == [0, 1, 2, 3]
+    assert [r["i"] for r in iter_records(path, segments=1)] == [3]
@@ -0,0 +1,51 @@
+import json
+
+from tools.autopilot.lib.lanes import LaneSpec, LaneStore
+
+
+def _store(tmp_path):
+    spec = LaneSpec(
+        name="sandbox",
+        snapshot="dumps/contrib-sandbox.json",
+        mirrors=("public/dumps/contrib-sandbox.json",),
+        header={"schema": "s", "lane": "sandbox"},
+        identity={"lane": "sandbox"},
+    )
+    return LaneStore(tmp_path / "lanes", [spec], repo_root=tmp_path)
+
+
+def test_append_compact_and_index(tmp_path):
+    store = _store(tmp_path)
+    assert store.append("sandbox", {"added_from_pending": "a", "url": "https://a"})
+    assert not store.append("sandbox", {"added_from_pending": "a"})
+    assert store.compact("2026-01-01T00:00:00Z") == ["sandbox"]
+
+    primary = tmp_path / "dumps/contrib-sandbox.json"
+    mirror = tmp_path / "public/dumps/contrib-sandbox.json"
+    doc = json.loads(primary.read_text(encoding="utf-8"))
+    assert [it["added_from_pending"] for it in doc["items"]] == ["a"]
+    assert mirror.read_bytes() == primary.read_bytes()
+
+    # reopened store knows the id from its index and has nothing to compact
+    again = _store(tmp_path)
+    assert again.has("a")
+    assert again.compact("2026-01-02T00:00:00Z") == []
+    assert json.loads(primary.read_text(encoding="utf-8"))["updated_at"] == "2026-01-01T00:00:00Z"
+
+
+def test_replayed_segment_leaves_lane_untouched(tmp_path):
+    store = _store(tmp_path)
+    store.append("sandbox", {"added_from_pending": "a", "url": "https://a"})
+    store.compact("2026-01-01T00:00:00Z")
+    primary = tmp_path / "dumps/contrib-sandbox.json"
+    before = primary.read_bytes()
+
+    # an interrupted run left a segment whose items are already in the snapshot
+    seg = tmp_path / "lanes/sandbox.segment.jsonl"
+    seg.write_text(json.dumps({"added_from_pending": "a", "url": "https://a"}) + "\n", encoding="utf-8")
+    again = _store(tmp_path)
+    assert again.compact("2026-01-02T00:00:00Z") == []
+    assert primary.read_bytes() == before
+    assert not seg.exists()
+    b, a = again.digests["sandbox"]
+    assert a == b
@@ -0,0 +1,30 @@
+import hashlib
+
+from tools.autopilot.lib.merkle import MerkleTree, proof_shards, shard_dir, shard_of, verify
+
+
+def test_every_leaf_proves_against_root():
+    for n in (1, 2, 3, 5, 8, 13):
+        leaves = [(f"/d{i % 3}/f{i}.json", hashlib.sha256(str(i).encode()).hexdigest()) for i in range(n)]
+        tree = MerkleTree(leaves)
+        for path, sha in leaves:
+            i = tree.index[path]
+            proof = tree.proof(path)
+            assert len(proof) <= max(1, n).bit_length()
+            assert verify(path, sha, i, n, proof, tree.root)
+            assert not verify(path, "0" * 64, i, n, proof, tree.root)
+            if n > 1:
+                assert not verify(path, sha, i, n, proof[:-1], tree.root)
+
+
+def test_shards_group_by_top_level_directory():
+    tree = MerkleTree([("/.well-known/a.json", "a" * 64), ("/index.html", "b" * 64), ("/en/x.html", "c" * 64)])
+    assert sorted(proof_shards(tree)) == ["dir-.well-known", "dir-en", "root"]
+    assert shard_of("/index.html") == "root"
+
+
+def test_shard_ids_are_reversible():
+    paths = ["/.well-known/x", "/well-known/x", "/root/x", "/index.html"]
+    ids = [shard_of(p) for p in paths]
+    assert len(set(ids)) == len(paths)
+    assert [shard_dir(i) for i in ids] == [".well-known", "well-known", "root", ""]
@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from tools.autopilot.lib import ed25519
+from tools.autopilot.lib.minisign import load_keyring, parse_signature, verify_file
+
+ROOT = Path(__file__).resolve().parents[1]
+
+RFC8032_PK = bytes.fromhex("d75a980182b10ab7d54bfed3c964073a0ee172f3daa62325af021a68f707511a")
+RFC8032_SIG = bytes.fromhex(
+    "e5564300c360ac729086e2cc806e828a84877f1eb8e5d974d873e065224901555fb8821590a33bacc61e39701cf9b46bd25bf5f0595bbe24655141438e7a100b"
+)
+
+
+def test_pure_python_ed25519_rfc8032_vector():
+    assert ed25519.verify(RFC8032_PK, b"", RFC8032_SIG)
+    assert not ed25519.verify(RFC8032_PK, b"x", RFC8032_SIG)
+
+
+def test_verifies_published_signature_with_key_from_trust_root(tmp_path: Path):
+    ring = load_keyring(ROOT)
+    sig = parse_signature((ROOT / ".well-known/llms.txt.minisig").read_text(encoding="utf-8"))
+    key = ring[sig.kid]["key"]
+    assert ring[sig.kid]["status"] == "active"
+    assert verify_file(ROOT / ".well-known/llms.txt", sig, key) is None
+
+    tampered = tmp_path / "llms.txt"
+    tampered.write_bytes((ROOT / ".well-known/llms.txt").read_bytes() + b" ")
+    assert verify_file(tampered, sig, key) == "signature mismatch"
@@ -0,0 +1,29 @@
+import os
+from pathlib import Path
+
+from tools.autopilot.lib.mirror import sync_tree
+
+
+def test_sync_tree_touches_only_changes(tmp_path: Path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    (src / "sub").mkdir(parents=True)
+    (src / "a.txt").write_text("a")
+    (src / "sub" / "b.txt").write_text("b")
+    (src / "gen.txt").write_text("src side")
+    (dst / "merkle").mkdir(parents=True)
+    (dst / "merkle" / "x.json").write_text("{}")
+    (dst / "old.txt").write_text("stale")
+
+    r1 = sync_tree(src, dst, skip={"gen.txt"}, keep={"merkle/"})
+    assert sorted(r1.linked + r1.reflinked + r1.copied) == ["a.txt", "sub/b.txt"]
+    assert r1.removed == ["old.txt"]
+    assert (dst / "merkle" / "x.json").exists() and not (dst / "gen.txt").exists()
+
+    r2 = sync_tree(src, dst, skip={"gen.txt"}, keep={"merkle/"})
+    assert not r2.changed and r2.unchanged == 2
+
+    # Replacing the source never writes through a hardlinked mirror in place.
+    os.replace(src / "a.txt", src / "a.old")
+    (src / "a.txt").write_text("A")
+    sync_tree(src, dst, skip={"gen.txt"}, keep={"merkle/"})
+    assert (dst / "a.txt").read_text() == "A" and (src / "a.old").read_text() == "a"
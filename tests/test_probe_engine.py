@@ -0,0 +1,34 @@
+import threading
+import time
+
+from tools.autopilot.lib.probe import BudgetExhausted, ProbeEngine, RequestBudget
+
+
+def test_results_keep_input_order_and_budget():
+    def slow(n):
+        time.sleep(0.01 * (5 - n))
+        return n
+
+    engine = ProbeEngine(max_workers=4, per_host=4, budget=RequestBudget(4))
+    calls = [(f"https://h{n % 2}.example/x", slow, (n,)) for n in range(6)]
+    out = engine.run(calls)
+    assert out[:4] == [0, 1, 2, 3]
+    assert all(isinstance(r, BudgetExhausted) for r in out[4:])
+
+
+def test_per_host_limit():
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+        return True
+
+    engine = ProbeEngine(max_workers=8, per_host=2)
+    engine.run([("https://same.example/", call, ()) for _ in range(8)])
+    assert active["peak"] <= 2
@@ -0,0 +1,61 @@
+from tools.autopilot.lib.probecache import ProbeCache
+
+
+def test_positive_and_negative_ttl(tmp_path):
+    c = ProbeCache(tmp_path / "probe.json", ttl=100, negative_ttl=10, now=1000)
+    c.store("https://a/ok", True, 200, "HEAD", {})
+    c.store("https://a/missing", False, 404, "HEAD", {})
+    c.store("https://a/down", False, 0, "HEAD", None)
+    assert c.fresh("https://a/ok") == (True, 200, "cache")
+    assert c.fresh("https://a/missing") == (False, 404, "cache")
+    assert c.fresh("https://a/down") is None
+    c.save()
+
+    later = ProbeCache(tmp_path / "probe.json", ttl=100, negative_ttl=10, now=1050)
+    assert later.fresh("https://a/ok") == (True, 200, "cache")
+    assert later.fresh("https://a/missing") is None
+    assert len(later) == 2
+
+    expired = ProbeCache(tmp_path / "probe.json", ttl=100, negative_ttl=10, now=1100)
+    assert expired.fresh("https://a/ok") is None
+
+
+def test_conditional_headers_and_304_revalidation(tmp_path):
+    c = ProbeCache(tmp_path / "probe.json", ttl=100, now=1000)
+    assert c.conditional_headers("https://a/x") == {}
+    assert c.revalidate("https://a/x") is None
+    c.store("https://a/x", True, 200, "HEAD", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2026 00:00:00 GMT"})
+    c.save()
+
+    later = ProbeCache(tmp_path / "probe.json", ttl=100, now=1200)
+    assert later.fresh("https://a/x") is None
+    assert later.conditional_headers("https://a/x") == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 01 Jan 2026 00:00:00 GMT",
+    }
+    assert later.revalidate("https://a/x") == (True, 200, "cache-304")
+    assert later.fresh("https://a/x") == (True, 200, "cache")
+    assert later.revalidated == 1
+
+
+def test_304_is_never_stored(tmp_path):
+    c = ProbeCache(tmp_path / "probe.json", now=1000)
+    c.store("https://a/x", False, 304, "HEAD", {})
+    assert c.fresh("https://a/x") is None
+    assert len(c) == 0
+
+
+def test_save_evicts_oldest_and_skips_clean_cache(tmp_path):
+    path = tmp_path / "probe.json"
+    for now, url in ((1000, "https://a/1"), (2000, "https://a/2"), (3000, "https://a/3")):
+        c = ProbeCache(path, max_entries=2, now=now)
+        c.store(url, True, 200, "HEAD", {})
+        c.save()
+
+    c = ProbeCache(path, max_entries=2, now=3000)
+    assert c.fresh("https://a/1") is None
+    assert c.fresh("https://a/2") is not None and c.fresh("https://a/3") is not None
+
+    mtime = path.stat().st_mtime_ns
+    c.save()
+    assert path.stat().st_mtime_ns == mtime
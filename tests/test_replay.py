@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+from tools.autopilot.lib.heuristics import RuleProgram
+from tools.autopilot.lib.replay import latest_by_id, replay
+
+ROOT = Path(__file__).resolve().parents[1]
+
+HEUR = json.loads((ROOT / "autopilot" / "heuristics.json").read_text(encoding="utf-8"))
+BASE = RuleProgram.compile(HEUR)
+
+FULL = {"wellKnown_present": True, "wellKnown_http_200": True, "minisign_pub_200": True, "sha256_json_200": True}
+RECORDS = [
+    {"event": "decision", "id": "a", "decision": "reject", "score": 0, "signals": {}, "hard_fail": None},
+    {"event": "run", "id": "a"},
+    {"event": "decision", "id": "a", "decision": "accept", "score": 45, "signals": FULL, "hard_fail": None},
+    {"event": "decision", "id": "b", "decision": "sandbox", "score": 15, "signals": {"wellKnown_http_200": True}, "hard_fail": None},
+    {"event": "decision", "id": "c", "decision": "reject", "score": 45, "signals": FULL, "hard_fail": "require_https"},
+]
+
+
+def test_latest_record_per_id_wins():
+    recs = latest_by_id(RECORDS)
+    assert sorted(recs) == ["a", "b", "c"] and recs["a"]["decision"] == "accept"
+
+
+def test_threshold_change_moves_items():
+    cand = RuleProgram.compile(dict(HEUR, defaults=dict(HEUR["defaults"], min_score_to_accept=50)))
+    rep = replay(latest_by_id(RECORDS).values(), BASE, cand)
+    assert rep.records == 3 and rep.drift == 0
+    assert rep.baseline == {"accept": 1, "sandbox": 1, "reject": 1}
+    assert rep.transitions == {("accept", "sandbox"): 1}
+    assert rep.changed == [("a", "accept", "sandbox", 45, 45)]
+    assert replay(latest_by_id(RECORDS).values(), BASE, BASE).changed == []
+
+
+def test_url_rules_reevaluated_only_when_changed():
+    urls = {"a": "https://new.example/", "b": "https://www.onetoo.eu/", "c": "http://old.example/"}
+    cand = RuleProgram.compile(dict(HEUR, allowlist={"hosts": ["new.example"]}, hard_fail=[]))
+    rep = replay(latest_by_id(RECORDS).values(), BASE, cand, urls)
+    assert rep.url_resolved == 3
+    # a gains the host bonus (stays accept), b loses it, c no longer hard-fails
+    assert sorted(rep.changed) == [("b", "accept", "sandbox", 35, 15), ("c", "reject", "accept", 45, 45)]
+    assert replay(latest_by_id(RECORDS).values(), BASE, BASE, urls).url_resolved == 0
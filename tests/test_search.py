@@ -0,0 +1,69 @@
+from tools.autopilot.lib.search import SearchIndex, percentiles, prefix_id, search_response, static_index, tokenize
+
+ITEMS = [
+    {"url": "https://www.hgpedu.eu/", "title": "HGP EDU Portal", "topics": ["research", "physics"], "languages": ["sk"], "description": "Research portal"},
+    {"url": "https://physics.example/", "title": "Physics notes", "topics": ["physics"], "languages": ["en"]},
+    {"url": "https://cooking.example/recipes", "title": "Recipes", "topics": ["food"], "languages": ["en"]},
+]
+PROOF = {
+    "version": "2.0",
+    "generated_at": "2026-01-01T00:00:00Z",
+    "accepted_set": {"url": "https://x/a.json", "sha256": "0" * 64, "sig_url": "https://x/a.json.minisig"},
+    "verified_sources": [],
+    "checks": [],
+}
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize("Výskum & FYZIKA_2") == ["vyskum", "fyzika", "2"]
+
+
+def test_tokenize_matches_the_static_client():
+    # Pinned against tokenize() in assets/ai-search.js (NFKD, toLowerCase,
+    # strip \p{M}, [\p{L}\p{N}]+): no casefold, every mark dropped.
+    text = "Straße ΣΟΦΟΣ ǄEMAL Ünïcode ﬁle ½ İstanbul हिन्दी Ａｂｃ１２"
+    assert tokenize(text) == ["straße", "σοφος", "dzemal", "unicode", "file", "1", "2", "istanbul", "हनद", "abc12"]
+    assert prefix_id("straße", 2) == "st" and prefix_id("ßa", 2) == "_c39f61"
+
+
+def test_bm25_ranking_and_postings():
+    ix = SearchIndex(ITEMS)
+    assert ix.postings["physics"][0].tolist() == [0, 1]
+    hits = ix.search("physics notes")
+    assert [h.doc for h in hits] == [1, 0]
+    assert hits[0].score > hits[1].score > 0
+    assert [h.doc for h in ix.search("hgpedu.eu")] == [0]
+    assert ix.search("recipes", limit=1)[0].doc == 2
+    assert ix.search("nothing-matches-this") == []
+
+
+def test_search_response_shape():
+    r = search_response(SearchIndex(ITEMS), "research", lane="stable", proof=PROOF)
+    assert r["version"] == "2.0" and r["lane"] == "stable" and r["proof"] is PROOF
+    (hit,) = r["results"]
+    assert hit["url"] == "https://www.hgpedu.eu/" and hit["snippet"] == "Research portal"
+    assert hit["trust_state"]["state"] == "verified" and hit["trust_state"]["subject"] == hit["url"]
+    assert set(hit) <= {"url", "title", "snippet", "score", "trust_state"}
+
+
+def test_percentiles_nearest_rank():
+    assert percentiles(range(1, 101)) == {"p50": 50, "p90": 90, "p99": 99}
+    assert percentiles([]) == {"p50": 0.0, "p90": 0.0, "p99": 0.0}
+
+
+def test_static_index_reproduces_bm25_scores():
+    ix = SearchIndex(ITEMS)
+    docs, shards = static_index(ix, prefix_len=2)
+    assert docs["len"] == ix.doc_len.tolist() and len(docs["docs"]) == 3
+    assert set(shards["ph"]["terms"]) == {"physics", "physics.example"}
+    assert prefix_id("žena", 2) == "_" + "že".encode("utf-8").hex() and prefix_id("7", 2) == "7"
+
+    # Score from the shards alone, as the static client does.
+    scores = {}
+    for t in tokenize("physics notes"):
+        p = shards[prefix_id(t, 2)]["terms"][t]
+        for d, f in zip(p["ids"], p["tf"]):
+            norm = ix.k1 * (1 - ix.b + ix.b * docs["len"][d] / ix.avgdl)
+            scores[d] = scores.get(d, 0.0) + p["idf"] * f * (ix.k1 + 1) / (f + norm)
+    for hit in ix.search("physics notes"):
+        assert abs(scores[hit.doc] - hit.score) < 1e-5
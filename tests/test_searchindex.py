@@ -0,0 +1,39 @@
+import json
+
+from tools.autopilot.lib.merkle import MerkleTree
+from tools.autopilot.lib.searchindex import build_manifest, partition
+
+
+def _items(n):
+    return [
+        {"url": f"https://www.site{i % 4}.example/p{i}", "title": f"T{i}", "languages": ["sk" if i % 2 else "en"], "topics": [f"t{i % 3}"]}
+        for i in range(n)
+    ]
+
+
+def test_partition_is_deterministic_and_bounded():
+    items = _items(40)
+    a = partition(items, by="language", max_items=7)
+    b = partition(list(reversed(items)), by="language", max_items=7)
+    assert [(s.name, s.text) for s in a] == [(s.name, s.text) for s in b]
+    assert all(len(s.items) <= 7 for s in a)
+    assert sum(len(s.items) for s in a) == 40
+    assert {s.key for s in a} == {"en", "sk"}
+    assert a[0].name == "en-001"
+
+    small = partition(items, by="domain", max_bytes=300)
+    assert all(len(s.items) == 1 or len(s.text) < 600 for s in small)
+    assert {json.loads(s.text)["partition"]["key"] for s in small} == {f"site{i}-example" for i in range(4)}
+
+
+def test_manifest_commits_to_shards():
+    shards = partition(_items(10), by="topic")
+    m = build_manifest(
+        shards,
+        shard_url=lambda n: f"https://x/{n}.json",
+        accepted_ref={"url": "https://x/a.json", "sha256": "0" * 64, "sig_url": "https://x/a.json.minisig"},
+        generated_at="2026-01-01T00:00:00Z",
+        signature={"alg": "none", "value": ""},
+    )
+    assert [e["name"] for e in m["shards"]] == ["t0-001", "t1-001", "t2-001"]
+    assert m["merkle_root"] == MerkleTree((e["url"], e["sha256"]) for e in m["shards"]).root
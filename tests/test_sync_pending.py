@@ -0,0 +1,195 @@
+import importlib.util
+import json
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from tools.autopilot.lib.cursor import SyncCursor
+from tools.autopilot.lib.instrument import Run
+from tools.autopilot.lib.probecache import ProbeCache
+
+ROOT = Path(__file__).resolve().parents[1]
+spec = importlib.util.spec_from_file_location("autopilot_sync_pending", ROOT / "scripts" / "autopilot_sync_pending.py")
+sp = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sp)
+
+
+def _serve(monkeypatch, pages):
+    """Fake /contrib/v2/pending: `pages` is a list of item-id lists, ts = "t" + id."""
+    def get_json(url, headers=None, timeout=15):
+        n = int(url.split("cursor=")[1]) if "cursor=" in url else 0
+        doc = {"items": [{"id": i, "created_at": "t" + i} for i in pages[n]]}
+        if n + 1 < len(pages):
+            doc["next_cursor"] = str(n + 1)
+        return doc
+    monkeypatch.setattr(sp, "http_get_json", get_json)
+
+
+def _discover(tmp_path, want, known=None, max_pages=5):
+    cursor = SyncCursor.load(tmp_path / "cursor.json")
+    keys, pages, seen, bound = sp.discover_pending("https://x", {}, 1, cursor, want, 10, max_pages, known=known)
+    cursor.advance(seen, bound)
+    return [pid for _ts, pid in keys], cursor.position()
+
+
+def test_known_ids_do_not_use_up_the_chunk(monkeypatch, tmp_path):
+    _serve(monkeypatch, [["1", "2", "3", "4"]])
+    ids, pos = _discover(tmp_path, 2, known=lambda pid: pid in {"1", "2"})
+    assert ids == ["3", "4"]
+    assert pos == ("t4", "4")
+
+
+def test_items_beyond_the_chunk_stop_the_cursor(monkeypatch, tmp_path):
+    _serve(monkeypatch, [["1", "2", "3"]])
+    ids, pos = _discover(tmp_path, 2)
+    assert ids == ["1", "2"] and pos == ("t2", "2")
+
+
+def test_unordered_incomplete_listing_keeps_the_cursor(monkeypatch, tmp_path):
+    # Page 2 is never fetched and could hold anything: no move at all.
+    _serve(monkeypatch, [["3", "1"], ["2"]])
+    ids, pos = _discover(tmp_path, 2)
+    assert ids == ["1", "3"] and pos == ("", "")
+
+    # Ascending pages: unfetched pages sort after what was seen.
+    _serve(monkeypatch, [["1", "3"], ["4"]])
+    ids, pos = _discover(tmp_path, 2)
+    assert ids == ["1", "3"] and pos == ("t3", "3")
+
+
+def test_decision_fingerprint_ignores_time_and_error_detail():
+    a = {"id": "x", "decision": "sandbox", "score": 0, "error": "URLError('timed out')", "at": "t1"}
+    b = dict(a, error="URLError('reset')", at="t2")
+    assert sp.decision_fingerprint(a) == sp.decision_fingerprint(b)
+    assert sp.decision_fingerprint(a) != sp.decision_fingerprint(dict(a, error="ValueError('bad')"))
+
+
+class _ProbeHandler(BaseHTTPRequestHandler):
+    """/ok answers HEAD and GET, /nohead refuses HEAD (405) and honours Range
+    with a 206, /moved redirects to /ok."""
+
+    protocol_version = "HTTP/1.1"
+    ranges = []
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b"", **headers):
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k.replace("_", "-"), v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        if self.path == "/nohead":
+            self._reply(405)
+        elif self.path == "/moved":
+            self._reply(302, Location="/ok")
+        else:
+            self._reply(200)
+
+    def do_GET(self):
+        if self.path == "/nohead" and self.headers.get("Range"):
+            _ProbeHandler.ranges.append(self.headers["Range"])
+            self._reply(206, b"{", Content_Range="bytes 0-0/42")
+        else:
+            self._reply(200, b"{}")
+
+
+@pytest.fixture
+def probe_server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _ProbeHandler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    _ProbeHandler.ranges = []
+    try:
+        yield f"http://127.0.0.1:{srv.server_address[1]}"
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def test_head_probe_costs_no_extra_budget(probe_server):
+    budget = sp.RequestBudget(0)
+    assert sp.probe(probe_server + "/ok", 5, "head", budget=budget) == (True, 200, "HEAD")
+    assert budget.used == 0
+
+
+def test_rejected_head_falls_back_to_a_charged_range_get(probe_server):
+    budget = sp.RequestBudget(0)
+    assert sp.probe(probe_server + "/nohead", 5, "head", budget=budget) == (True, 200, "GET-range")
+    assert _ProbeHandler.ranges == ["bytes=0-0"]
+    assert budget.used == 1
+
+    spent = sp.RequestBudget(1)
+    spent.take()
+    with pytest.raises(sp.BudgetExhausted):
+        sp.probe(probe_server + "/nohead", 5, "head", budget=spent)
+    assert _ProbeHandler.ranges == ["bytes=0-0"]
+
+
+def test_redirect_hops_are_charged(probe_server):
+    budget = sp.RequestBudget(0)
+    assert sp.probe(probe_server + "/moved", 5, "head", budget=budget) == (True, 200, "HEAD")
+    assert budget.used == 1
+
+
+def test_304_without_cache_entry_refetches_without_validators(monkeypatch, tmp_path):
+    cache = ProbeCache(tmp_path / "probe.json", now=1000)
+    calls = []
+
+    def probe_once(url, timeout, mode, max_bytes, extra_headers, budget=None):
+        calls.append(dict(extra_headers))
+        if extra_headers:
+            return False, 304, "HEAD", {}
+        return True, 200, "HEAD", {"ETag": '"v2"'}
+
+    # The entry is gone by the time the 304 comes back (evicted meanwhile).
+    monkeypatch.setattr(cache, "conditional_headers", lambda url: {"If-None-Match": '"v1"'})
+    monkeypatch.setattr(sp, "_probe_once", probe_once)
+    assert sp.probe("https://a/x", 5, "head", cache=cache) == (True, 200, "HEAD")
+    assert calls == [{"If-None-Match": '"v1"'}, {}]
+    assert cache.fresh("https://a/x") == (True, 200, "cache")
+
+
+def _sync_tree(tmp_path, monkeypatch, max_http_requests):
+    """Minimal repo layout for sync(): real heuristics and bot config, fake network."""
+    heur = json.loads((ROOT / "autopilot" / "heuristics.json").read_text(encoding="utf-8"))
+    heur["rate_limits"].update(max_http_requests=max_http_requests, max_retry_attempts=2)
+    heur["probe_cache"] = {"enabled": False}
+    (tmp_path / "autopilot").mkdir(exist_ok=True)
+    (tmp_path / "autopilot" / "heuristics.json").write_text(json.dumps(heur), encoding="utf-8")
+    (tmp_path / "tools" / "autopilot").mkdir(parents=True, exist_ok=True)
+    shutil.copy(ROOT / "tools" / "autopilot" / "config.json", tmp_path / "tools" / "autopilot" / "config.json")
+    monkeypatch.chdir(tmp_path)
+
+    def get_json(url, headers=None, timeout=15, budget=None):
+        if "/pending/get" in url:
+            return {"body": {"url": "https://site.example/", "title": "Site"}}
+        return {"items": [{"id": "p1", "created_at": "t1"}]}
+
+    monkeypatch.setattr(sp, "http_get_json", get_json)
+    monkeypatch.setattr(sp, "probe", lambda url, *a, **kw: (False, 404, "HEAD"))
+
+
+def test_budget_deferrals_are_not_attempts(tmp_path, monkeypatch):
+    # One request: the listing page; every detail fetch is refused.
+    _sync_tree(tmp_path, monkeypatch, max_http_requests=1)
+    for _ in range(4):
+        with Run("sync", tmp_path, quiet=True) as run:
+            sp.sync(run, "token")
+        cursor = SyncCursor.load(tmp_path / "dumps/autopilot/sync-cursor.json")
+        assert cursor.retry == {"p1": 0}
+
+    _sync_tree(tmp_path, monkeypatch, max_http_requests=0)
+    with Run("sync", tmp_path, quiet=True) as run:
+        sp.sync(run, "token")
+    cursor = SyncCursor.load(tmp_path / "dumps/autopilot/sync-cursor.json")
+    assert not cursor.tracked("p1")
+    decisions = json.loads((tmp_path / "dumps/autopilot/decisions.json").read_text(encoding="utf-8"))
+    assert [d["id"] for d in decisions["decisions"]] == ["p1"]
@@ -0,0 +1,31 @@
+import random
+
+from tools.autopilot.lib.jsoncanon import CanonicalJsonOptions
+from tools.autopilot.lib.transform import compile_sort_key, normalize_registry, served_registry, sort_items
+
+
+def test_merge_sort_matches_stable_sort():
+    rng = random.Random(7)
+    key = compile_sort_key(["id", "domain", "url"])
+    base = sorted(({"id": f"{i:05d}"} for i in range(500)), key=key)
+    for _ in range(20):
+        items = list(base)
+        for _ in range(rng.randint(1, 30)):
+            items.insert(rng.randrange(len(items) + 1), rng.choice([{"id": f"{rng.randint(0, 600):05d}"}, {"domain": "x"}, {"z": 1}]))
+        assert sort_items(items, key) == sorted(items, key=key)
+
+
+def test_sorted_input_is_returned_as_is():
+    key = compile_sort_key(["id"], fallback="none")
+    items = [{"id": "a"}, {"id": "b"}]
+    assert sort_items(items, key) is items
+    unkeyed = [{"x": 2}, {"x": 1}]
+    assert sort_items(unkeyed, key, require_key=True) is unkeyed
+    assert normalize_registry({"items": [{"id": "b"}, {"id": "a"}]}, sort_items_by=["id"], max_items=10)["items"] == [{"id": "a"}, {"id": "b"}]
+
+
+def test_served_registry_matches_the_bot_rendering():
+    render = served_registry(["id", "url"], CanonicalJsonOptions())
+    assert render({"z": 1, "items": [{"url": "b"}, {"id": "a", "x": "é"}]}) == '{"items":[{"id":"a","x":"é"},{"url":"b"}],"z":1}\n'
+    # no item has a sort key: order is kept
+    assert render({"items": [{"k": 2}, {"k": 1}]}) == '{"items":[{"k":2},{"k":1}]}\n'
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .fsatomic import atomic_write_text
+
+SCHEMA = "onetoo-autopilot-canonical-hashes/v1"
+
+
+def sha256_bytes(b: bytes) -> str:
+    return hashlib.sha256(b).hexdigest()
+
+
+def fingerprint(settings: Any) -> str:
+    """Stable hash of the settings that shape canonical output."""
+    return sha256_bytes(json.dumps(settings, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+
+class CanonicalHashes:
+    """Recorded sha256 of each file's last known canonical content.
+
+    A file whose current bytes hash to the recorded value is already
+    canonical and can be skipped without parsing. Entries are only trusted
+    while the settings fingerprint (canonical options, sort keys, ...) is
+    unchanged.
+    """
+
+    def __init__(self, path: Path, settings_fp: str) -> None:
+        self.path = Path(path)
+        self.settings_fp = settings_fp
+        self.files: Dict[str, str] = {}
+        self.dirty = False
+        try:
+            doc = json.loads(self.path.read_text(encoding="utf-8"))
+            if doc.get("settings") == settings_fp and isinstance(doc.get("files"), dict):
+                self.files = {str(k): str(v) for k, v in doc["files"].items()}
+        except Exception:
+            pass
+
+    def get(self, rel: str) -> Optional[str]:
+        return self.files.get(rel)
+
+    def put(self, rel: str, digest: str) -> None:
+        if self.files.get(rel) != digest:
+            self.files[rel] = digest
+            self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        doc = {"schema": SCHEMA, "settings": self.settings_fp, "files": dict(sorted(self.files.items()))}
+        atomic_write_text(self.path, json.dumps(doc, indent=2) + "\n")
+        self.dirty = False
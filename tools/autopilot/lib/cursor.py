@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .fsatomic import atomic_write_text
+
+SCHEMA = "onetoo-autopilot-sync-cursor/v1"
+
+# Pending list items may expose their submission time under any of these keys.
+TIMESTAMP_KEYS = ("created_at", "submitted_at", "received_at")
+
+
+def item_timestamp(item: Dict[str, Any]) -> str:
+    for k in TIMESTAMP_KEYS:
+        v = item.get(k)
+        if isinstance(v, str) and v.strip():
+            return v.strip()
+    return ""
+
+
+@dataclass
+class SyncCursor:
+    """Persisted position in the pending stream.
+
+    Items are ordered by (timestamp, id); everything at or before
+    (`since`, `last_id`) has already been handled. Ids that were discovered
+    but could not be decided (budget exhausted, detail fetch failed) are kept
+    in `retry` with their attempt count so the cursor can move past them;
+    every attempt counts, so they are dropped after max_attempts runs.
+
+    Accepts that could not be written because stable writes are off are
+    kept in `held` instead: they are decided, do not count as attempts and
+    are only re-queued by a run that writes the stable lane.
+
+    `decided` keeps the fingerprint of the last decision recorded for each
+    id still in `retry` or `held`, so re-deciding one the same way is not
+    reported as a change.
+    """
+
+    path: Path
+    since: str = ""
+    last_id: str = ""
+    retry: Dict[str, int] = field(default_factory=dict)
+    held: List[str] = field(default_factory=list)
+    decided: Dict[str, str] = field(default_factory=dict)
+    updated_at: str = ""
+
+    @classmethod
+    def load(cls, path: Path) -> "SyncCursor":
+        path = Path(path)
+        try:
+            doc = json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            return cls(path=path)
+        retry = doc.get("retry") if isinstance(doc.get("retry"), dict) else {}
+        held = doc.get("held") if isinstance(doc.get("held"), list) else []
+        decided = doc.get("decided") if isinstance(doc.get("decided"), dict) else {}
+        return cls(
+            path=path,
+            since=str(doc.get("since") or ""),
+            last_id=str(doc.get("last_id") or ""),
+            retry={str(k): int(v) for k, v in retry.items()},
+            held=sorted({str(pid) for pid in held}),
+            decided={str(k): str(v) for k, v in decided.items()},
+            updated_at=str(doc.get("updated_at") or ""),
+        )
+
+    @property
+    def empty(self) -> bool:
+        return not self.since and not self.last_id
+
+    def position(self) -> Tuple[str, str]:
+        return (self.since, self.last_id)
+
+    def is_after(self, ts: str, pid: str) -> bool:
+        """True if an item with (ts, pid) lies beyond the cursor."""
+        return (ts, pid) > self.position()
+
+    def advance(self, keys: Iterable[Tuple[str, str]], bound: Optional[Tuple[str, ...]] = None) -> None:
+        """Move past `keys` (all handled) in order, stopping at the first key
+        not below `bound` (exclusive; None = no bound). Callers pass a bound
+        where unlisted or unhandled items may sort, so the cursor only ever
+        moves across a contiguous, fully handled prefix."""
+        for key in sorted(keys):
+            if bound is not None and not key < bound:
+                break
+            if key > self.position():
+                self.since, self.last_id = key
+
+    def retry_ids(self, max_attempts: int) -> List[str]:
+        return sorted(pid for pid, n in self.retry.items() if n < max_attempts)
+
+    def mark_failed(self, pid: str, *, count: bool = True) -> None:
+        # A held id that fails when re-queued becomes an ordinary retry.
+        if pid in self.held:
+            self.held = [p for p in self.held if p != pid]
+        self.retry[pid] = self.retry.get(pid, 0) + (1 if count else 0)
+
+    def hold(self, pid: str) -> None:
+        self.retry.pop(pid, None)
+        if pid not in self.held:
+            self.held = sorted(self.held + [pid])
+
+    def tracked(self, pid: str) -> bool:
+        """True if pid is waiting in `retry` or `held` (so discovery can skip it)."""
+        return pid in self.retry or pid in self.held
+
+    def record_decision(self, pid: str, fingerprint: str) -> bool:
+        """Remember the decision for pid; False if it repeats the recorded one."""
+        if self.decided.get(pid) == fingerprint:
+            return False
+        self.decided[pid] = fingerprint
+        return True
+
+    def mark_done(self, pid: str) -> None:
+        self.retry.pop(pid, None)
+        self.decided.pop(pid, None)
+        if pid in self.held:
+            self.held = [p for p in self.held if p != pid]
+
+    def prune(self, max_attempts: int) -> List[str]:
+        """Drop ids that exhausted their attempts; returns them (for logging)."""
+        dropped = sorted(pid for pid, n in self.retry.items() if n >= max_attempts)
+        for pid in dropped:
+            del self.retry[pid]
+            if pid not in self.held:
+                self.decided.pop(pid, None)
+        return dropped
+
+    def save(self, updated_at: Optional[str] = None) -> bool:
+        """Persist the cursor; False (and no write, no updated_at bump) when
+        its position, retry and held sets are what the file already holds."""
+        state = {
+            "since": self.since,
+            "last_id": self.last_id,
+            "retry": dict(sorted(self.retry.items())),
+            "held": sorted(self.held),
+            "decided": dict(sorted(self.decided.items())),
+        }
+        try:
+            on_disk = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            on_disk = None
+        if (
+            isinstance(on_disk, dict)
+            and on_disk.get("schema") == SCHEMA
+            and all(on_disk.get(k, type(v)()) == v for k, v in state.items())
+        ):
+            return False
+        if updated_at:
+            self.updated_at = updated_at
+        doc = {"schema": SCHEMA, "updated_at": self.updated_at, **state}
+        atomic_write_text(self.path, json.dumps(doc, ensure_ascii=False, indent=2) + "\n")
+        return True
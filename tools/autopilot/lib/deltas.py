@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .fsatomic import atomic_write_bytes, atomic_write_text
+
+HEAD_SCHEMA = "onetoo-lane-head/v1"
+DELTA_SCHEMA = "onetoo-lane-delta/v1"
+
+# Item field linking a lane entry back to its pending submission.
+ID_FIELD = "added_from_pending"
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def item_key(it: Dict[str, Any]) -> str:
+    """Stable identity of a lane item: its pending id, else a hash of its content."""
+    pid = it.get(ID_FIELD)
+    if isinstance(pid, str) and pid:
+        return pid
+    return "sha256:" + sha256_text(json.dumps(it, sort_keys=True, ensure_ascii=False, separators=(",", ":")))
+
+
+def items_sha256(items: Sequence[Dict[str, Any]]) -> str:
+    """Hash of a lane's semantic content: its items in order, canonically encoded
+    (header fields and formatting do not count)."""
+    return sha256_text(json.dumps(list(items), sort_keys=True, ensure_ascii=False, separators=(",", ":")))
+
+
+def _render(doc: Dict[str, Any]) -> str:
+    return json.dumps(doc, ensure_ascii=False, indent=2) + "\n"
+
+
+class DeltaPublisher:
+    """Numbered, hashed deltas plus periodic full snapshots for one lane.
+
+    Layout of `root` (e.g. public/dumps/deltas/accepted/):
+      head.json                  current seq, lane sha256, latest snapshot,
+                                 retained deltas (seq, file, sha256, sizes)
+      snapshot-<seq>.json        the published lane bytes at <seq>
+      <seq>.delta.json           items added / item keys removed at <seq>,
+                                 with the lane sha256 before and after
+
+    Every lane sha256 is taken over the exact bytes published for the lane
+    (the served file, see LaneStore `served`); snapshots are those bytes.
+
+    Every lane rewrite is one seq. A full snapshot is taken on the first
+    publication, every `snapshot_every` seqs, and whenever the lane file on
+    disk no longer matches head (edited out of band), so a consumer never
+    applies a delta to a base it does not have. Deltas older than the
+    previous snapshot are pruned: a consumer at most one snapshot period
+    behind still catches up with deltas alone.
+    """
+
+    def __init__(self, root: Path, lane: str, *, url_base: str, snapshot_every: int = 50) -> None:
+        self.root = Path(root)
+        self.lane = lane
+        self.url_base = url_base.rstrip("/")
+        self.snapshot_every = max(1, int(snapshot_every))
+
+    def head(self) -> Optional[Dict[str, Any]]:
+        try:
+            doc = json.loads((self.root / "head.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return doc if isinstance(doc, dict) and doc.get("schema") == HEAD_SCHEMA else None
+
+    def publish(
+        self,
+        old_data: Optional[bytes],
+        old_items: Sequence[Dict[str, Any]],
+        new_data: bytes,
+        new_items: Sequence[Dict[str, Any]],
+        updated_at: str,
+    ) -> str:
+        """Record one lane rewrite from the published bytes before and after;
+        returns "snapshot" or "delta", or "" when the items did not change."""
+        head = self.head()
+        old_sha = sha256_bytes(old_data) if old_data is not None else ""
+        new_sha = sha256_bytes(new_data)
+        old_keys = {item_key(it): it for it in old_items}
+        new_keys = {item_key(it): it for it in new_items}
+        added = [it for k, it in new_keys.items() if k not in old_keys]
+        removed = sorted(k for k in old_keys if k not in new_keys)
+        chained = head is not None and head.get("sha256") == old_sha
+        if chained and not added and not removed:
+            return ""
+
+        seq = int(head.get("seq", 0)) + 1 if head else 1
+        deltas: List[Dict[str, Any]] = list(head.get("deltas", [])) if chained else []
+        snapshot = head.get("snapshot") if chained else None
+        prev_snapshot_seq = int(snapshot["seq"]) if snapshot else 0
+
+        if chained:
+            delta = {
+                "schema": DELTA_SCHEMA,
+                "lane": self.lane,
+                "seq": seq,
+                "updated_at": updated_at,
+                "base_sha256": old_sha,
+                "sha256": new_sha,
+                "count": len(new_items),
+                "added": added,
+                "removed": removed,
+            }
+            text = _render(delta)
+            name = f"{seq:06d}.delta.json"
+            atomic_write_text(self.root / name, text)
+            deltas.append(
+                {
+                    "seq": seq,
+                    "url": f"{self.url_base}/{name}",
+                    "sha256": sha256_text(text),
+                    "bytes": len(text.encode("utf-8")),
+                    "added": len(added),
+                    "removed": len(removed),
+                }
+            )
+
+        kind = "delta"
+        if snapshot is None or seq - int(snapshot["seq"]) >= self.snapshot_every:
+            name = f"snapshot-{seq:06d}.json"
+            atomic_write_bytes(self.root / name, new_data)
+            snapshot = {"seq": seq, "url": f"{self.url_base}/{name}", "sha256": new_sha, "count": len(new_items)}
+            kind = "snapshot"
+
+        # Keep deltas newer than the previous snapshot (one full period of history).
+        keep_after = prev_snapshot_seq if kind == "snapshot" else int(head.get("retain_after", 0)) if head else 0
+        deltas = [d for d in deltas if int(d["seq"]) > keep_after]
+        new_head = {
+            "schema": HEAD_SCHEMA,
+            "lane": self.lane,
+            "seq": seq,
+            "updated_at": updated_at,
+            "sha256": new_sha,
+            "count": len(new_items),
+            "snapshot": snapshot,
+            "retain_after": keep_after,
+            "deltas": deltas,
+        }
+        atomic_write_text(self.root / "head.json", _render(new_head))
+        self._prune(snapshot, deltas)
+        return kind
+
+    def _prune(self, snapshot: Dict[str, Any], deltas: List[Dict[str, Any]]) -> None:
+        keep = {"head.json", snapshot["url"].rsplit("/", 1)[-1]} | {d["url"].rsplit("/", 1)[-1] for d in deltas}
+        for p in self.root.glob("*.json"):
+            if p.name not in keep:
+                p.unlink()
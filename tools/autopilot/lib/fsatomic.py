@@ -2,16 +2,36 @@ from __future__ import annotations
 
 import os
 import tempfile
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator, TextIO
 
 
-def atomic_write_text(path: Path, text: str) -> None:
-    """Write text atomically (tmp file + rename) to avoid partial writes."""
+def _target_mode(path: Path) -> int:
+    # Keep the existing file's mode; new files get the usual umask-derived
+    # mode instead of mkstemp's 0600 (these files are published).
+    try:
+        return path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+@contextmanager
+def atomic_write_stream(path: Path) -> Iterator[TextIO]:
+    """Yield a text handle whose content atomically replaces `path` on success.
+
+    Lets callers stream large outputs chunk by chunk; on error the target is
+    left untouched and the tmp file is removed.
+    """
+    path = Path(path)
     path.parent.mkdir(parents=True, exist_ok=True)
     fd, tmp_name = tempfile.mkstemp(prefix=path.name + ".", dir=str(path.parent))
     try:
+        os.fchmod(fd, _target_mode(path))
         with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
-            f.write(text)
+            yield f
             f.flush()
             os.fsync(f.fileno())
         os.replace(tmp_name, path)
@@ -21,3 +41,26 @@ def atomic_write_text(path: Path, text: str) -> None:
                 os.remove(tmp_name)
         except Exception:
             pass
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write text atomically (tmp file + rename) to avoid partial writes."""
+    with atomic_write_stream(path) as f:
+        f.write(text)
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write bytes atomically (tmp file + rename), exactly as given."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=path.name + ".", dir=str(path.parent))
+    try:
+        os.fchmod(fd, _target_mode(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+
+class GitError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class StatusEntry:
+    """One `git status --porcelain=v2` record.
+
+    kind: "1" (changed), "2" (renamed/copied), "u" (unmerged), "?" (untracked),
+    "!" (ignored). xy is the two-letter index/worktree status ("??" / "!!" for
+    untracked / ignored). orig_path is set for renames and copies only.
+    """
+
+    kind: str
+    xy: str
+    path: str
+    orig_path: Optional[str] = None
+
+    @property
+    def paths(self) -> List[str]:
+        return [self.path] + ([self.orig_path] if self.orig_path is not None else [])
+
+
+# Number of space-separated fields before the path, per record kind.
+_FIELDS = {"1": 8, "2": 9, "u": 10}
+
+
+def parse_porcelain_v2(data: bytes) -> List[StatusEntry]:
+    """Parse `git status --porcelain=v2 -z` output.
+
+    Records are NUL-terminated and paths are verbatim (never quoted), so any
+    byte but NUL may appear in them; a rename/copy record ("2") is followed by
+    one more NUL-terminated field holding the original path.
+    """
+    out: List[StatusEntry] = []
+    fields = data.split(b"\0")
+    i = 0
+    while i < len(fields):
+        rec = fields[i]
+        i += 1
+        if not rec or rec.startswith(b"#"):
+            continue
+        kind = rec[:1].decode("ascii")
+        if kind in ("?", "!"):
+            out.append(StatusEntry(kind, kind * 2, os.fsdecode(rec[2:])))
+            continue
+        n = _FIELDS.get(kind)
+        if n is None:
+            raise GitError(f"unexpected porcelain v2 record: {rec[:40]!r}")
+        parts = rec.split(b" ", n)
+        if len(parts) != n + 1:
+            raise GitError(f"truncated porcelain v2 record: {rec[:40]!r}")
+        orig = None
+        if kind == "2":
+            if i >= len(fields):
+                raise GitError("rename record without original path")
+            orig = os.fsdecode(fields[i])
+            i += 1
+        out.append(StatusEntry(kind, parts[1].decode("ascii"), os.fsdecode(parts[n]), orig))
+    return out
+
+
+def _git(repo_root: Path, args: Sequence[str], stdin: bytes | None = None) -> bytes:
+    # Pathspecs are literal paths here: no globbing, no magic.
+    env = dict(os.environ, GIT_LITERAL_PATHSPECS="1")
+    p = subprocess.run(
+        ["git", *args], cwd=repo_root, input=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env
+    )
+    if p.returncode != 0:
+        raise GitError(f"git {' '.join(args[:2])} failed: {p.stderr.decode('utf-8', 'replace').strip()}")
+    return p.stdout
+
+
+def status(repo_root: Path, pathspec: Sequence[str] = ()) -> List[StatusEntry]:
+    """Changed and untracked (not ignored) paths under `pathspec`, in one git call."""
+    args = ["status", "--porcelain=v2", "-z", "--untracked-files=all", "--no-renames"]
+    return parse_porcelain_v2(_git(repo_root, [*args, "--", *pathspec]) if pathspec else _git(repo_root, args))
+
+
+def stage(repo_root: Path, paths: Iterable[str]) -> int:
+    """Stage additions, modifications and deletions of `paths` with a single `git add`."""
+    uniq = sorted(set(paths))
+    if not uniq:
+        return 0
+    payload = b"".join(os.fsencode(p) + b"\0" for p in uniq)
+    _git(repo_root, ["add", "--all", "--pathspec-from-file=-", "--pathspec-file-nul"], stdin=payload)
+    return len(uniq)
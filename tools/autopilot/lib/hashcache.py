@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .fsatomic import atomic_write_text
+
+SCHEMA = "onetoo-sha256-cache/v1"
+
+# Entries whose mtime is this close to the moment they were hashed are not
+# trusted later: the file may have been modified again within the same
+# timestamp granularity ("racily clean", same problem git's index has).
+RACY_WINDOW_NS = 2_000_000_000
+
+# Upper bound for the content-addressed (git blob id) tier.
+MAX_BLOB_ENTRIES = 200_000
+
+
+def sha256_file(p: Path) -> Tuple[str, int]:
+    with p.open("rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            # readinto() a reused buffer, hashed with the GIL released.
+            return hashlib.file_digest(f, "sha256").hexdigest(), f.tell()
+        h = hashlib.sha256()
+        size = 0
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+            size += len(chunk)
+        return h.hexdigest(), size
+
+
+def default_workers() -> int:
+    env = os.environ.get("ONETOO_HASH_WORKERS", "").strip()
+    if env.isdigit() and int(env) > 0:
+        return int(env)
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def walk_files(root: Path, exclude_dirs: frozenset = frozenset()) -> List[Path]:
+    """All files under root, pruning excluded directory names during the walk."""
+    out: List[Path] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in exclude_dirs]
+        base = Path(dirpath)
+        out.extend(base / name for name in filenames)
+    return out
+
+
+class _Lookup(NamedTuple):
+    rel: str
+    ident: List[int]
+    mtime_ns: int
+    cached: Optional[str]
+    blob: Optional[str]
+
+
+def default_cache_path(repo_root: Path) -> Path:
+    env = os.environ.get("ONETOO_HASH_CACHE", "").strip()
+    return Path(env) if env else Path(repo_root) / ".cache" / "sha256-cache.json"
+
+
+class HashCache:
+    """Persistent sha256 cache shared by the inventory generators.
+
+    Two tiers, checked in order:
+      - stat tier: repo-relative path -> (size, mtime_ns, inode, sha256);
+        answers local re-runs without reading a byte
+      - content tier: git blob id -> sha256, for tracked files whose working
+        copy matches the index; survives fresh CI checkouts (new inodes and
+        mtimes) because the blob id is content-addressed
+
+    Misses are hashed and recorded. `verify_all` rehashes every file and
+    counts cached digests that disagree (`mismatches`), as an escape hatch
+    when the cache itself is suspected.
+
+    `hash_many` resolves cache hits inline and fans the misses out to a
+    thread pool (hashlib hashes without holding the GIL), returning results
+    in input order.
+    """
+
+    def __init__(self, path: Path, repo_root: Path, *, verify_all: bool = False) -> None:
+        self.path = Path(path)
+        self.repo_root = Path(repo_root)
+        self.verify_all = verify_all
+        self.stat_hits = 0
+        self.blob_hits = 0
+        self.misses = 0
+        self.bytes_hashed = 0
+        self.hash_seconds = 0.0
+        self.mismatches: List[str] = []
+        self._stat: Dict[str, list] = {}
+        self._blob: Dict[str, str] = {}
+        self._index: Optional[Dict[str, str]] = None
+        self._started_ns = time.time_ns()
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            doc = json.loads(self.path.read_text(encoding="utf-8"))
+            if doc.get("schema") == SCHEMA:
+                self._stat = dict(doc.get("stat") or {})
+                self._blob = dict(doc.get("blob") or {})
+        except Exception:
+            pass
+
+    # -- git content tier ------------------------------------------------------
+
+    def _git(self, *args: str) -> Optional[bytes]:
+        try:
+            return subprocess.check_output(["git", *args], cwd=self.repo_root, stderr=subprocess.DEVNULL)
+        except Exception:
+            return None
+
+    def _git_index(self) -> Dict[str, str]:
+        """path -> blob id for tracked files whose working copy matches the index."""
+        if self._index is not None:
+            return self._index
+        self._index = {}
+        # Blob ids only equal file content when git applies no conversion.
+        if (self.repo_root / ".gitattributes").exists():
+            return self._index
+        autocrlf = (self._git("config", "--get", "core.autocrlf") or b"").strip().lower()
+        if autocrlf in (b"true", b"input"):
+            return self._index
+        staged = self._git("ls-files", "-s", "-z")
+        dirty = self._git("diff", "--name-only", "-z")
+        if staged is None or dirty is None:
+            return self._index
+        modified = set(dirty.decode("utf-8", "surrogateescape").split("\0"))
+        for rec in staged.decode("utf-8", "surrogateescape").split("\0"):
+            if not rec:
+                continue
+            meta, _tab, rel = rec.partition("\t")
+            parts = meta.split()
+            if len(parts) == 3 and parts[0].startswith("100") and parts[2] == "0" and rel not in modified:
+                self._index[rel] = parts[1]
+        return self._index
+
+    # -- lookups ---------------------------------------------------------------
+
+    def _lookup(self, p: Path) -> _Lookup:
+        rel = p.relative_to(self.repo_root).as_posix()
+        st = p.stat()
+        ident = [st.st_size, st.st_mtime_ns, st.st_ino]
+        with self._lock:
+            e = self._stat.get(rel)
+            if e and e[:3] == ident:
+                if not self.verify_all:
+                    self.stat_hits += 1
+                return _Lookup(rel, ident, st.st_mtime_ns, e[3], None)
+        blob = self._git_index().get(rel)
+        cached = None
+        if blob:
+            with self._lock:
+                cached = self._blob.get(blob)
+                if cached is not None and not self.verify_all:
+                    self.blob_hits += 1
+        return _Lookup(rel, ident, st.st_mtime_ns, cached, blob)
+
+    def _record(self, lk: _Lookup, digest: str) -> None:
+        with self._lock:
+            entry = lk.ident + [digest]
+            if lk.mtime_ns < self._started_ns - RACY_WINDOW_NS and self._stat.get(lk.rel) != entry:
+                self._stat[lk.rel] = entry
+                self._dirty = True
+            if lk.blob and self._blob.get(lk.blob) != digest:
+                self._blob[lk.blob] = digest
+                self._dirty = True
+
+    def hash_many(self, paths: Sequence[Path], workers: int = 0) -> List[Tuple[str, int]]:
+        """[(sha256 hex, size)] for paths, in order; only cache misses are read."""
+        looked = [self._lookup(p) for p in paths]
+        todo = [i for i, lk in enumerate(looked) if lk.cached is None or self.verify_all]
+        results: List[Tuple[str, int]] = [(lk.cached or "", lk.ident[0]) for lk in looked]
+
+        t0 = time.perf_counter()
+        jobs = [paths[i] for i in todo]
+        n = max(1, min(workers or default_workers(), len(jobs)))
+        if n == 1:
+            hashed = [sha256_file(p) for p in jobs]
+        else:
+            with ThreadPoolExecutor(max_workers=n) as ex:
+                hashed = list(ex.map(sha256_file, jobs))
+        self.hash_seconds += time.perf_counter() - t0
+
+        for i, (digest, size) in zip(todo, hashed):
+            lk = looked[i]
+            self.misses += 1
+            self.bytes_hashed += size
+            if lk.cached is not None and lk.cached != digest:
+                self.mismatches.append(lk.rel)
+            results[i] = (digest, size)
+        for lk, (digest, _size) in zip(looked, results):
+            self._record(lk, digest)
+        return results
+
+    def sha256(self, p: Path) -> Tuple[str, int]:
+        """(sha256 hex, size) of p, from cache when its identity is unchanged."""
+        return self.hash_many([p], workers=1)[0]
+
+    # -- persistence -----------------------------------------------------------
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            if len(self._blob) > MAX_BLOB_ENTRIES:
+                self._blob = dict(list(self._blob.items())[-MAX_BLOB_ENTRIES:])
+            doc = {"schema": SCHEMA, "stat": dict(sorted(self._stat.items())), "blob": self._blob}
+            atomic_write_text(self.path, json.dumps(doc, separators=(",", ":")) + "\n")
+            self._dirty = False
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "stat_hits": self.stat_hits,
+            "blob_hits": self.blob_hits,
+            "files_hashed": self.misses,
+            "bytes_hashed": self.bytes_hashed,
+            "mismatches": len(self.mismatches),
+        }
+
+    def report(self) -> str:
+        hits = self.stat_hits + self.blob_hits
+        line = f"hash cache: hits={hits} (stat={self.stat_hits}, blob={self.blob_hits}) misses={self.misses}"
+        if self.verify_all:
+            line += f" verify-all mismatches={len(self.mismatches)}"
+        return line
+
+    def bench_report(self, files: int, total_bytes: int, elapsed: float) -> str:
+        """Throughput line for --bench: whole inventory, then the hashing pool alone."""
+        el = max(elapsed, 1e-9)
+        hs = max(self.hash_seconds, 1e-9)
+        return (
+            f"bench: files={files} bytes={total_bytes} elapsed={elapsed:.3f}s "
+            f"-> {total_bytes / el / 1e6:.1f} MB/s, {files / el:.0f} files/s; "
+            f"hashed {self.misses} files / {self.bytes_hashed} bytes in {self.hash_seconds:.3f}s "
+            f"-> {self.bytes_hashed / hs / 1e6:.1f} MB/s"
+        )
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import urllib.parse
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+# Score bonus for items hosted on an allow-listed host (allowlist.hosts).
+ALLOW_HOST_BONUS = 20
+ALLOW_HOST_SIGNAL = "allow_host_bonus"
+MAX_SCORE = 100
+
+# Signals computed from other signals after scoring (see RuleProgram.score).
+DERIVED_SIGNALS = ("tfws_min_bundle",)
+
+
+def url_parts(url: str) -> Tuple[str, str]:
+    """(scheme, host), lowercased; ("", "") for unparsable URLs."""
+    try:
+        p = urllib.parse.urlsplit(url)
+        return (p.scheme or "").lower(), (p.hostname or "").lower()
+    except ValueError:
+        return "", ""
+
+
+@dataclass(frozen=True)
+class HardRule:
+    id: str
+    action: str
+    host_in: Optional[frozenset] = None
+    scheme_in: Optional[frozenset] = None
+    scheme_not_in: Optional[frozenset] = None
+
+    def matches(self, scheme: str, host: str) -> bool:
+        return (
+            (self.host_in is not None and host in self.host_in)
+            or (self.scheme_in is not None and scheme in self.scheme_in)
+            or (self.scheme_not_in is not None and scheme not in self.scheme_not_in)
+        )
+
+
+def _lowered(values: Any) -> Optional[frozenset]:
+    return None if values is None else frozenset(str(v).lower() for v in values)
+
+
+@dataclass(frozen=True)
+class RuleProgram:
+    """heuristics.json compiled once into an immutable scoring program.
+
+    Hard-fail matches are frozensets of lowercased hosts/schemes, soft rules
+    a signal -> points table (the allow-listed host bonus is one more entry),
+    and the decision thresholds plain ints. Scoring a signal vector is then
+    a walk over the table with no parsing, lowercasing or dict lookups into
+    the rule file.
+    """
+
+    hard: Tuple[HardRule, ...]
+    points: Mapping[str, int]
+    allow_hosts: frozenset
+    accept_at: int
+    sandbox_at: int
+    fingerprint: str
+
+    @classmethod
+    def compile(cls, heur: Mapping[str, Any]) -> "RuleProgram":
+        hard = []
+        for rule in heur.get("hard_fail") or []:
+            m = rule.get("match") or {}
+            hard.append(
+                HardRule(
+                    id=str(rule.get("id") or ""),
+                    action=str(rule.get("action") or "reject"),
+                    host_in=_lowered(m.get("url_host_in")),
+                    scheme_in=_lowered(m.get("url_scheme_in")),
+                    scheme_not_in=_lowered(m.get("url_scheme_not_in")),
+                )
+            )
+        points: Dict[str, int] = {ALLOW_HOST_SIGNAL: ALLOW_HOST_BONUS}
+        for rule in heur.get("soft_rules") or []:
+            when = rule.get("when")
+            if when:
+                points[when] = points.get(when, 0) + int(rule.get("score", 0) or 0)
+        d = heur.get("defaults") or {}
+        allow = heur.get("allowlist") or {}
+        scoring = {k: heur.get(k) for k in ("hard_fail", "soft_rules", "defaults", "allowlist")}
+        return cls(
+            hard=tuple(hard),
+            points=MappingProxyType(points),
+            allow_hosts=_lowered(allow.get("hosts") or []),
+            accept_at=int(d.get("min_score_to_accept", 70)),
+            sandbox_at=int(d.get("min_score_to_sandbox", 40)),
+            fingerprint=hashlib.sha256(json.dumps(scoring, sort_keys=True).encode("utf-8")).hexdigest(),
+        )
+
+    def hard_fail(self, url: str) -> Optional[HardRule]:
+        """First hard-fail rule matching `url`, or None."""
+        return self.hard_fail_parts(*url_parts(url))
+
+    def hard_fail_parts(self, scheme: str, host: str) -> Optional[HardRule]:
+        for rule in self.hard:
+            if rule.matches(scheme, host):
+                return rule
+        return None
+
+    def score(self, signals: Mapping[str, Any]) -> int:
+        """Capped sum of points of the truthy signals.
+
+        Derived signals (DERIVED_SIGNALS) are added to the vector after
+        scoring, as the sync script always did, so rules on them never fire;
+        kept so existing decisions do not shift.
+        """
+        total = 0
+        for sig, pts in self.points.items():
+            if sig not in DERIVED_SIGNALS and signals.get(sig):
+                total += pts
+        return min(total, MAX_SCORE)
+
+    def score_batch(self, vectors: Sequence[Mapping[str, Any]]) -> List[int]:
+        """Scores of many signal vectors in one pass over a flattened table."""
+        table = tuple((s, p) for s, p in self.points.items() if s not in DERIVED_SIGNALS)
+        return [min(sum(p for s, p in table if v.get(s)), MAX_SCORE) for v in vectors]
+
+    def decide(self, score: int, hard: Optional[HardRule] = None) -> str:
+        if hard is not None:
+            return "reject"
+        if score >= self.accept_at:
+            return "accept"
+        if score >= self.sandbox_at:
+            return "sandbox"
+        return "reject"
+
+    def decide_batch(self, scores: Sequence[int], hards: Sequence[Optional[HardRule]]) -> List[str]:
+        return [self.decide(s, h) for s, h in zip(scores, hards)]
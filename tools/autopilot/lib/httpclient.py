@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import http.client
+import threading
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .probe import BudgetExhausted, RequestBudget
+
+_RETRYABLE = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError, BrokenPipeError)
+_REDIRECTS = {301, 302, 303, 307, 308}
+_MAX_REDIRECTS = 5
+
+_ConnKey = Tuple[str, str, int]
+
+
+@dataclass
+class HttpResponse:
+    url: str
+    status: int
+    reason: str
+    headers: http.client.HTTPMessage
+    body: bytes
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    handshakes: int = 0
+    reused: int = 0
+    retries: int = 0
+    bytes_read: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, **kw: int) -> None:
+        with self._lock:
+            for k, v in kw.items():
+                setattr(self, k, getattr(self, k) + v)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "handshakes": self.handshakes,
+            "reused": self.reused,
+            "retries": self.retries,
+            "bytes_read": self.bytes_read,
+        }
+
+
+class HttpPool:
+    """Keep-alive HTTP(S) client with a small idle-connection pool per host.
+
+    Connections are checked out for one request/response cycle and returned to
+    the host's idle list only when the response was fully read and the server
+    did not ask to close. A request that fails on a reused (possibly stale)
+    connection is retried once on a fresh one.
+
+    `max_idle_per_host` bounds the idle connections kept per host; `max_hosts`
+    bounds how many hosts keep idle connections at all (oldest host evicted).
+    """
+
+    def __init__(self, *, max_idle_per_host: int = 4, max_hosts: int = 64, user_agent: str = "onetoo-autopilot/0.2") -> None:
+        self.max_idle_per_host = max(0, int(max_idle_per_host))
+        self.max_hosts = max(1, int(max_hosts))
+        self.user_agent = user_agent
+        self.stats = PoolStats()
+        self._idle: Dict[_ConnKey, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    # -- connection management -------------------------------------------------
+
+    def _checkout(self, key: _ConnKey, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=timeout), False
+
+    def _checkin(self, key: _ConnKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.pop(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                conn = None
+            # re-insert to keep dict order = least recently used first
+            if idle:
+                self._idle[key] = idle
+            while len(self._idle) > self.max_hosts:
+                _old_key, old = next(iter(self._idle.items()))
+                del self._idle[_old_key]
+                for c in old:
+                    c.close()
+        if conn is not None:
+            conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle.clear()
+        for idle in pools:
+            for c in idle:
+                c.close()
+
+    # -- requests --------------------------------------------------------------
+
+    def _once(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        timeout: float,
+        max_bytes: Optional[int],
+    ) -> HttpResponse:
+        parts = urllib.parse.urlsplit(url)
+        scheme = (parts.scheme or "").lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"unsupported URL scheme: {url}")
+        host = parts.hostname or ""
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, host, port)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        hdrs = {"Host": parts.netloc.rsplit("@", 1)[-1], "User-Agent": self.user_agent, "Connection": "keep-alive"}
+        hdrs.update(headers)
+
+        for attempt in (0, 1):
+            conn, reused = self._checkout(key, timeout)
+            self.stats.add(requests=1, reused=int(reused), handshakes=int(not reused))
+            try:
+                conn.request(method, target, headers=hdrs)
+                resp = conn.getresponse()
+                if max_bytes is None:
+                    body = resp.read()
+                else:
+                    body = resp.read(max_bytes)
+                drained = resp.isclosed() or method == "HEAD"
+            except _RETRYABLE:
+                conn.close()
+                if reused and attempt == 0:
+                    self.stats.add(retries=1)
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            self.stats.add(bytes_read=len(body))
+            if drained and not resp.will_close:
+                self._checkin(key, conn)
+            else:
+                conn.close()
+            return HttpResponse(url=url, status=resp.status, reason=resp.reason, headers=resp.headers, body=body)
+        raise RuntimeError("unreachable")
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Mapping[str, str]] = None,
+        *,
+        timeout: float = 15,
+        max_bytes: Optional[int] = None,
+        budget: Optional[RequestBudget] = None,
+    ) -> HttpResponse:
+        """Perform a request, following redirects like urllib does.
+
+        `max_bytes` caps how much of the body is read; a partially read
+        response closes its connection instead of returning it to the pool.
+        With a `budget`, every redirect hop takes one unit (the first request
+        is the caller's to pay for) and BudgetExhausted is raised when refused.
+        """
+        headers = dict(headers or {})
+        for hop in range(_MAX_REDIRECTS + 1):
+            if hop and budget is not None and not budget.take():
+                raise BudgetExhausted(url)
+            resp = self._once(method, url, headers, timeout, max_bytes)
+            loc = resp.headers.get("Location")
+            if resp.status not in _REDIRECTS or not loc:
+                return resp
+            url = urllib.parse.urljoin(url, loc)
+            if resp.status == 303 and method != "HEAD":
+                method = "GET"
+        return resp
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from .fsatomic import atomic_write_text
+
+REPORT_SCHEMA = "onetoo-run-report/v1"
+
+# Run reports live next to dumps/autopilot/decisions.json, one file per
+# script (overwritten each run, git-ignored, excluded from the inventories).
+REPORT_DIR = "dumps/autopilot/runs"
+
+# ONETOO_PROFILE=1 profiles the run with cProfile (main thread only) and
+# writes <report>.prof next to the report; the top functions are printed.
+PROFILE_ENV = "ONETOO_PROFILE"
+
+
+def is_report_path(rel: str) -> bool:
+    return rel.startswith(REPORT_DIR + "/")
+
+
+class Run:
+    """Spans, counters and an optional profile for one script run.
+
+    with Run("gen_artifacts", repo_root) as run:
+        with run.span("hash"):
+            ...
+        run.count("files_hashed", n)
+
+    Spans nest ("hash" inside "scan" is reported as "scan/hash") and record
+    wall and CPU time, so a span whose wall time is far above its CPU time
+    waited on network or disk. Counters are plain named integers and are
+    safe to bump from worker threads. On exit the report is written to
+    <repo_root>/dumps/autopilot/runs/<name>.json (also when the run raised)
+    and a summary table is printed. Scripts that report failure through an
+    exit code rather than an exception pass it to `exit_code`.
+    """
+
+    def __init__(self, name: str, repo_root: Path, *, profile: Optional[bool] = None, quiet: bool = False) -> None:
+        self.name = name
+        self.repo_root = Path(repo_root)
+        self.profile = os.environ.get(PROFILE_ENV, "").strip() not in ("", "0") if profile is None else profile
+        self.quiet = quiet
+        self.counters: Dict[str, int] = {}
+        self.info: Dict[str, Any] = {}
+        self.spans: Dict[str, Dict[str, float]] = {}
+        self._order: List[str] = []
+        self._stack = threading.local()
+        self._lock = threading.Lock()
+        self._profiler = None
+        self._rc = 0
+        self._t0 = 0.0
+        self._c0 = 0.0
+        self.started_at = ""
+
+    @property
+    def report_path(self) -> Path:
+        return self.repo_root / REPORT_DIR / f"{self.name}.json"
+
+    # -- recording -------------------------------------------------------------
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        stack = getattr(self._stack, "names", None)
+        if stack is None:
+            stack = self._stack.names = []
+        key = "/".join(stack + [name])
+        stack.append(name)
+        with self._lock:
+            if key not in self.spans:
+                self.spans[key] = {"wall": 0.0, "cpu": 0.0, "calls": 0}
+                self._order.append(key)
+        t0, c0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - t0, time.thread_time() - c0
+            stack.pop()
+            with self._lock:
+                s = self.spans[key]
+                s["wall"] += wall
+                s["cpu"] += cpu
+                s["calls"] += 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def merge(self, prefix: str, values: Mapping[str, Any]) -> None:
+        """Add integer stats from another component (e.g. PoolStats.as_dict())."""
+        for k, v in values.items():
+            if isinstance(v, int) and not isinstance(v, bool):
+                self.count(f"{prefix}.{k}", v)
+
+    def note(self, key: str, value: Any) -> None:
+        """Attach a JSON value to the report (outcome flags, sizes, ...)."""
+        self.info[key] = value
+
+    def exit_code(self, rc: int) -> int:
+        """Record the script's exit code; a non-zero one makes the run an error."""
+        self._rc = int(rc or 0)
+        self.note("exit_code", self._rc)
+        return rc
+
+    # -- lifecycle -------------------------------------------------------------
+
+    def __enter__(self) -> "Run":
+        self.started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self._t0, self._c0 = time.perf_counter(), time.process_time()
+        if self.profile:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if self._profiler is not None:
+            self._profiler.disable()
+        clean = exc_type is None or (exc_type is SystemExit and not getattr(exc, "code", 0))
+        status = "ok" if clean and not self._rc else "error"
+        try:
+            self.finish(status)
+        except OSError as e:  # a report must never fail the run
+            print(f"run report: not written ({e})")
+
+    def report(self, status: str = "ok") -> Dict[str, Any]:
+        wall = time.perf_counter() - self._t0
+        return {
+            "schema": REPORT_SCHEMA,
+            "script": self.name,
+            "started_at": self.started_at,
+            "status": status,
+            "wall_s": round(wall, 6),
+            "cpu_s": round(time.process_time() - self._c0, 6),
+            "spans": [
+                {"name": k, "calls": int(self.spans[k]["calls"]), "wall_s": round(self.spans[k]["wall"], 6), "cpu_s": round(self.spans[k]["cpu"], 6)}
+                for k in self._order
+            ],
+            "counters": dict(sorted(self.counters.items())),
+            "info": self.info,
+        }
+
+    def finish(self, status: str = "ok") -> Dict[str, Any]:
+        doc = self.report(status)
+        if self._profiler is not None:
+            prof = self.report_path.with_suffix(".prof")
+            prof.parent.mkdir(parents=True, exist_ok=True)
+            self._profiler.dump_stats(str(prof))
+            doc["profile"] = prof.relative_to(self.repo_root).as_posix()
+        atomic_write_text(self.report_path, json.dumps(doc, ensure_ascii=False, indent=2) + "\n")
+        if not self.quiet:
+            print(summary_table(doc))
+            if self._profiler is not None:
+                print(_profile_top(self._profiler))
+        return doc
+
+
+def summary_table(doc: Mapping[str, Any]) -> str:
+    """Plain-text table of a run report: spans with their share of the run, then counters."""
+    total = max(float(doc["wall_s"]), 1e-9)
+    lines = [f"run {doc['script']}: {doc['status']} in {doc['wall_s']:.3f}s (cpu {doc['cpu_s']:.3f}s)"]
+    if doc["spans"]:
+        lines.append("  %-32s %6s %10s %10s %6s" % ("span", "calls", "wall s", "cpu s", "wall%"))
+        for s in doc["spans"]:
+            lines.append(
+                "  %-32s %6d %10.3f %10.3f %5.1f%%"
+                % (s["name"], s["calls"], s["wall_s"], s["cpu_s"], 100.0 * s["wall_s"] / total)
+            )
+    if doc["counters"]:
+        lines.append("  counters: " + ", ".join(f"{k}={v}" for k, v in doc["counters"].items()))
+    return "\n".join(lines)
+
+
+def _profile_top(profiler: Any, n: int = 15) -> str:
+    import pstats
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(n)
+    return out.getvalue().rstrip()
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .hashcache import HashCache, walk_files
+
+
+@dataclass(frozen=True)
+class Entry:
+    """One hashed file; `path` is relative to the view it was taken from."""
+
+    path: str
+    sha256: str
+    size: int
+
+
+def parts_key(rel: str) -> Tuple[str, ...]:
+    # Same order as sorting pathlib.Path objects (component-wise).
+    return tuple(rel.split("/"))
+
+
+class Inventory:
+    """One filesystem walk, each file hashed at most once, many views.
+
+    `scan()` lists the tree once. Views (`select`) pick subsets by prefix and
+    exclusions; `hash()` resolves digests for the union of all selected files
+    in a single HashCache.hash_many call. Files written by the same run can
+    be registered from their rendered bytes with `put_bytes()`, so they are
+    never read back.
+    """
+
+    def __init__(self, root: Path, files: Iterable[str]) -> None:
+        self.root = Path(root)
+        self.files: List[str] = sorted(set(files))
+        self._digests: Dict[str, Tuple[str, int]] = {}
+
+    @classmethod
+    def scan(cls, root: Path, exclude_dirs: Iterable[str] = (".git",)) -> "Inventory":
+        root = Path(root)
+        paths = walk_files(root, frozenset(exclude_dirs))
+        return cls(root, (p.relative_to(root).as_posix() for p in paths if p.is_file()))
+
+    # -- selection -------------------------------------------------------------
+
+    def select(
+        self,
+        prefix: str = "",
+        *,
+        exclude_dirs: Iterable[str] = (),
+        exclude_names: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+    ) -> List[str]:
+        """Repo-relative paths under `prefix` (a directory, "" = whole tree)."""
+        pre = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        dirs, names, skip = set(exclude_dirs), set(exclude_names), set(exclude)
+        out = []
+        for rel in self.files:
+            if pre and not rel.startswith(pre):
+                continue
+            if rel in skip:
+                continue
+            parts = rel[len(pre):].split("/")
+            if parts[-1] in names or dirs.intersection(parts[:-1]):
+                continue
+            out.append(rel)
+        return out
+
+    # -- hashing ---------------------------------------------------------------
+
+    def hash(self, cache: HashCache, rels: Iterable[str], jobs: int = 0) -> None:
+        todo = [r for r in dict.fromkeys(rels) if r not in self._digests]
+        for rel, res in zip(todo, cache.hash_many([self.root / r for r in todo], workers=jobs)):
+            self._digests[rel] = res
+
+    def put_bytes(self, rel: str, data: bytes) -> None:
+        """Record a file this run has just written, from its bytes."""
+        if rel not in self._digests and rel not in self.files:
+            self.files = sorted(self.files + [rel])
+        self._digests[rel] = (hashlib.sha256(data).hexdigest(), len(data))
+
+    def digest(self, rel: str) -> Optional[Tuple[str, int]]:
+        return self._digests.get(rel)
+
+    def entries(self, rels: Sequence[str], prefix: str = "") -> List[Entry]:
+        pre = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        out = []
+        for rel in rels:
+            sha, size = self._digests[rel]
+            out.append(Entry(rel[len(pre):] if pre and rel.startswith(pre) else rel, sha, size))
+        return out
+
+
+# -- renderers -----------------------------------------------------------------
+
+
+def render_dumps_sha256(entries: Sequence[Entry], *, generated_at: str, commit: str, working_tree: str) -> Dict[str, Any]:
+    """/schemas/dumps-sha256.schema.json document (files map, sorted by path)."""
+    files = {e.path: e.sha256 for e in sorted(entries, key=lambda e: e.path)}
+    return {
+        "$schema": "/schemas/dumps-sha256.schema.json",
+        "platform": "cloudflare-pages",
+        "operator": "onetoo.eu",
+        "generated_at": generated_at,
+        "algorithm": "sha256",
+        "git": {"commit": commit, "working_tree": working_tree},
+        "count": len(files),
+        "files": files,
+    }
+
+
+def render_inventory_v1(entries: Sequence[Entry], *, updated_at: str, commit: str) -> Dict[str, Any]:
+    """onetoo:sha256-inventory:v1 document (site paths, component-wise order)."""
+    items = [
+        {"path": f"/{e.path}", "sha256": e.sha256, "bytes": e.size}
+        for e in sorted(entries, key=lambda e: parts_key(e.path))
+    ]
+    return {
+        "schema": "onetoo:sha256-inventory:v1",
+        "updated_at": updated_at,
+        "commit": commit,
+        "items": items,
+    }
+
+
+def render_sha256sum(entries: Sequence[Entry], *, binary: bool = False, dot_slash: bool = False) -> str:
+    """coreutils `sha256sum` text: `<sha>  <path>` (or `<sha> *./<path>` in binary/dot-slash form)."""
+    sep = " *" if binary else "  "
+    pre = "./" if dot_slash else ""
+    return "".join(f"{e.sha256}{sep}{pre}{e.path}\n" for e in sorted(entries, key=lambda e: e.path))
+
+
+def render_tfws_inventory(entries: Sequence[Entry]) -> str:
+    """.well-known/tfws/v2/inventory.sha256 (`sha256sum -b` run from the v2 dir)."""
+    return render_sha256sum(entries, binary=True, dot_slash=True)
+
+
+def render_targets(prev: Dict[str, Any], lookup, *, generated_at: str) -> Tuple[Dict[str, Any], List[str]]:
+    """Refresh the digests of an existing targets.json; returns (doc, changed paths).
+
+    The target list itself is curated by hand. `lookup(site_path)` returns the
+    current sha256 or None (missing file / self-reference), which leaves the
+    entry as is. `generated_at` only moves when a digest changed.
+    """
+    changed = []
+    targets = []
+    for t in prev.get("targets", []):
+        t = dict(t)
+        sha = lookup(t.get("path", ""))
+        if sha and sha != t.get("sha256"):
+            t["sha256"] = sha
+            changed.append(t["path"])
+        targets.append(t)
+    doc = dict(prev)
+    doc["targets"] = targets
+    if changed:
+        doc["generated_at"] = generated_at
+    return doc, changed
+
+
+def json_text(doc: Any, **kw: Any) -> str:
+    return json.dumps(doc, ensure_ascii=False, indent=2, **kw) + "\n"
@@ -1,36 +1,96 @@
 from __future__ import annotations
 
 import json
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, Mapping
 
-def dump_canonical_json(
-    path: Path,
-    obj: Any,
-    *,
-    sort_keys: bool = True,
-    compact: bool = True,
-    ensure_ascii: bool = False,
-    newline: bool = True,
-) -> None:
-    # Deterministic JSON dump for stable diffs.
-    if compact:
+from .fsatomic import atomic_write_stream
+
+
+@dataclass(frozen=True)
+class CanonicalJsonOptions:
+    sort_keys: bool = True
+    compact: bool = True
+    ensure_ascii: bool = False
+    newline: bool = True
+
+
+def options_from_config(cfg: Mapping[str, Any]) -> CanonicalJsonOptions:
+    """Options from the `canonical_json` section of tools/autopilot/config.json."""
+    c = cfg.get("canonical_json", {})
+    return CanonicalJsonOptions(
+        sort_keys=bool(c.get("sort_keys", True)),
+        compact=bool(c.get("compact", True)),
+        ensure_ascii=bool(c.get("ensure_ascii", False)),
+        newline=bool(c.get("newline", True)),
+    )
+
+
+def dumps_canonical(obj: Any, *, opt: CanonicalJsonOptions = CanonicalJsonOptions()) -> str:
+    # Deterministic JSON text for stable diffs.
+    if opt.compact:
         text = json.dumps(
             obj,
-            ensure_ascii=ensure_ascii,
-            sort_keys=sort_keys,
+            ensure_ascii=opt.ensure_ascii,
+            sort_keys=opt.sort_keys,
             separators=(",", ":"),
         )
     else:
         text = json.dumps(
             obj,
-            ensure_ascii=ensure_ascii,
-            sort_keys=sort_keys,
+            ensure_ascii=opt.ensure_ascii,
+            sort_keys=opt.sort_keys,
             indent=2,
         )
 
-    if newline and not text.endswith("\n"):
+    if opt.newline and not text.endswith("\n"):
         text += "\n"
+    return text
 
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(text, encoding="utf-8")
+
+def iter_canonical_chunks(obj: Any, *, opt: CanonicalJsonOptions = CanonicalJsonOptions()) -> Iterator[str]:
+    """Yield `dumps_canonical(obj, opt=opt)` in pieces.
+
+    For compact output, list values of a top-level dict (e.g. `items`) are
+    encoded one element at a time, so a huge registry is never rendered as
+    one string. The concatenated chunks are identical to `dumps_canonical`.
+    """
+    if not opt.compact or not isinstance(obj, dict):
+        yield dumps_canonical(obj, opt=opt)
+        return
+
+    def enc(v: Any) -> str:
+        return json.dumps(v, ensure_ascii=opt.ensure_ascii, sort_keys=opt.sort_keys, separators=(",", ":"))
+
+    keys = sorted(obj) if opt.sort_keys else list(obj)
+    yield "{"
+    for i, k in enumerate(keys):
+        yield ("," if i else "") + enc(str(k)) + ":"
+        v = obj[k]
+        if isinstance(v, list) and v:
+            yield "["
+            for j, el in enumerate(v):
+                yield ("," if j else "") + enc(el)
+            yield "]"
+        else:
+            yield enc(v)
+    yield "}"
+    if opt.newline:
+        yield "\n"
+
+
+def dump_canonical_json(
+    path: Path,
+    obj: Any,
+    *,
+    sort_keys: bool = True,
+    compact: bool = True,
+    ensure_ascii: bool = False,
+    newline: bool = True,
+) -> None:
+    # Deterministic JSON dump for stable diffs (streamed, atomic replace).
+    opt = CanonicalJsonOptions(sort_keys=sort_keys, compact=compact, ensure_ascii=ensure_ascii, newline=newline)
+    with atomic_write_stream(path) as f:
+        for chunk in iter_canonical_chunks(obj, opt=opt):
+            f.write(chunk)
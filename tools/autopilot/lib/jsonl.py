@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .fsatomic import atomic_write_text
+
+INDEX_SCHEMA = "onetoo-jsonl-segments/v1"
+
+_PERIOD_FORMATS = {"day": "%Y-%m-%d", "month": "%Y-%m", "": ""}
+
+
+def _period_key(period: str, now: datetime) -> str:
+    fmt = _PERIOD_FORMATS.get(period, "")
+    return now.strftime(fmt) if fmt else ""
+
+
+def _stem(path: Path) -> str:
+    return path.name[: -len(".jsonl")] if path.name.endswith(".jsonl") else path.name
+
+
+def index_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(_stem(path) + ".index.json")
+
+
+def _load_index(path: Path) -> Dict[str, Any]:
+    try:
+        doc = json.loads(index_path(path).read_text(encoding="utf-8"))
+        if isinstance(doc, dict) and isinstance(doc.get("segments"), list):
+            return doc
+    except Exception:
+        pass
+    return {"schema": INDEX_SCHEMA, "active": {"period": ""}, "segments": []}
+
+
+class JsonlLog:
+    """Append-only JSONL log with one open handle per run.
+
+    - records are buffered and flushed + fsync'ed every `flush_every` records
+      and on close (append stays O(1) regardless of log size)
+    - the active file keeps its original name; when it grows past `max_bytes`
+      or the rotation `period` ("day" / "month"; "" disables) rolls over, it
+      is renamed to `<stem>.<period>.<n>.jsonl` and listed in
+      `<stem>.index.json`, so readers can stream only recent segments
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_bytes: int = 1024 * 1024,
+        period: str = "month",
+        flush_every: int = 64,
+        now: Optional[datetime] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self.period = period if period in _PERIOD_FORMATS else "month"
+        self.flush_every = max(1, int(flush_every))
+        self.now = now or datetime.now(timezone.utc)
+        self.index = _load_index(self.path)
+        self.rotated: List[str] = []
+        self._unsynced = 0
+        self._f = None
+        self._size = 0
+        self._index_dirty = False
+        self._open()
+
+    # -- file handling ---------------------------------------------------------
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = self.path.open("a", encoding="utf-8")
+        self._size = os.fstat(self._f.fileno()).st_size
+        period = _period_key(self.period, self.now)
+        active = self.index.setdefault("active", {})
+        if self._size and active.get("period") and active["period"] != period:
+            self._rotate()
+        active = self.index["active"]
+        if not self._size or not active.get("period"):
+            if active.get("period") != period:
+                active["period"] = period
+                self._index_dirty = True
+
+    def _segment_name(self) -> str:
+        period = self.index["active"].get("period") or "seg"
+        n = 1 + sum(1 for s in self.index["segments"] if s.get("period") == period)
+        return f"{_stem(self.path)}.{period}.{n}.jsonl"
+
+    def _rotate(self) -> None:
+        self._sync()
+        self._f.close()
+        name = self._segment_name()
+        os.replace(self.path, self.path.with_name(name))
+        self.index["segments"].append({"file": name, "period": self.index["active"].get("period", ""), "bytes": self._size})
+        self.index["active"] = {"period": _period_key(self.period, self.now)}
+        self._save_index()
+        self.rotated.append(name)
+        self._f = self.path.open("a", encoding="utf-8")
+        self._size = 0
+
+    def _save_index(self) -> None:
+        self.index["schema"] = INDEX_SCHEMA
+        self.index["active"]["file"] = self.path.name
+        atomic_write_text(index_path(self.path), json.dumps(self.index, ensure_ascii=False, indent=2) + "\n")
+
+    def _sync(self) -> None:
+        if self._f is None or not self._unsynced:
+            return
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._unsynced = 0
+
+    # -- public API ------------------------------------------------------------
+
+    def append(self, obj: Any) -> None:
+        line = json.dumps(obj, ensure_ascii=False) + "\n"
+        n = len(line.encode("utf-8"))
+        if self.max_bytes > 0 and self._size and self._size + n > self.max_bytes:
+            self._rotate()
+        self._f.write(line)
+        self._size += n
+        self._unsynced += 1
+        if self._unsynced >= self.flush_every:
+            self._sync()
+
+    def flush(self) -> None:
+        self._sync()
+
+    def close(self) -> None:
+        if self._f is None:
+            return
+        self._sync()
+        self._f.close()
+        self._f = None
+        if self._index_dirty or self.rotated:
+            self._save_index()
+
+    def __enter__(self) -> "JsonlLog":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def recent_segments(path: Path, n: int = 1) -> List[Path]:
+    """The last `n` files of a rotated log (rotated segments, then the active file), oldest first."""
+    path = Path(path)
+    files = [path.with_name(s["file"]) for s in _load_index(path)["segments"] if s.get("file")]
+    if path.exists():
+        files.append(path)
+    return files[-n:] if n > 0 else files
+
+
+def iter_records(path: Path, segments: int = 0) -> Iterator[Any]:
+    """Stream records from the last `segments` files of the log (0 = all)."""
+    for p in recent_segments(path, segments):
+        if not p.exists():
+            continue
+        with p.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
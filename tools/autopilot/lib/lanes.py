@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .deltas import ID_FIELD, DeltaPublisher, items_sha256
+from .fsatomic import atomic_write_bytes, atomic_write_text
+from .mirror import link_or_copy
+
+INDEX_SCHEMA = "onetoo-autopilot-lane-index/v1"
+
+
+@dataclass(frozen=True)
+class LaneSpec:
+    """One published lane: primary snapshot, its mirrors and header fields.
+
+    `header` provides the defaults for a fresh snapshot; `identity` fields are
+    forced on every compaction (never inherited from a stale file). With
+    `deltas` (a repo-relative directory under public/), every rewrite is also
+    published as a numbered delta (lib.deltas).
+    """
+
+    name: str
+    snapshot: str
+    mirrors: Tuple[str, ...] = ()
+    header: Dict[str, Any] = field(default_factory=dict)
+    identity: Dict[str, Any] = field(default_factory=dict)
+    deltas: str = ""
+
+
+def _render(doc: Dict[str, Any]) -> str:
+    return json.dumps(doc, ensure_ascii=False, indent=2) + "\n"
+
+
+class LaneStore:
+    """Append-only lane storage with an id index.
+
+    A run appends new items to `<root>/<lane>.segment.jsonl` (one line per
+    item, O(new items)) and checks membership against the id index in
+    `<root>/index.json`, never against the full lane files. `compact()` then
+    folds the segments into the published snapshots, only for lanes that
+    received items: each snapshot is rendered and written once, its mirrors
+    are hardlinked (or copied) from it, and the segment is cleared. A lane
+    whose items hash is unchanged by its segment (every item already there)
+    is left alone, including its updated_at.
+
+    A crash between snapshot write and segment clear is harmless: compaction
+    skips segment items whose id is already in the snapshot.
+
+    `served` renders a lane document the way it is served (e.g. the bot's
+    canonical JSON, lib.transform.served_registry): mirrors under public/ are
+    written in that form instead of linked, and deltas hash those bytes, so
+    their sha256 values match what clients download. Without it every mirror
+    is a link of the primary file and deltas hash the primary's bytes.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        specs: Iterable[LaneSpec],
+        *,
+        repo_root: Path = Path("."),
+        snapshot_every: int = 50,
+        served: Optional[Callable[[Dict[str, Any]], str]] = None,
+    ) -> None:
+        self.root = Path(root)
+        self.repo_root = Path(repo_root)
+        self.snapshot_every = snapshot_every
+        self.served = served
+        self.published: Dict[str, str] = {}
+        # lane -> (items sha256 before, after) for lanes compaction looked at
+        self.digests: Dict[str, Tuple[str, str]] = {}
+        self.specs: Dict[str, LaneSpec] = {s.name: s for s in specs}
+        self._ids: Dict[str, Set[str]] = {name: set() for name in self.specs}
+        self._pending: Dict[str, List[Dict[str, Any]]] = {name: [] for name in self.specs}
+        self.mirror_modes: Dict[str, str] = {}
+        self._index_dirty = False
+        self._load_index()
+
+    # -- index -----------------------------------------------------------------
+
+    def _segment(self, lane: str) -> Path:
+        return self.root / f"{lane}.segment.jsonl"
+
+    def _index_path(self) -> Path:
+        return self.root / "index.json"
+
+    def _load_index(self) -> None:
+        try:
+            doc = json.loads(self._index_path().read_text(encoding="utf-8"))
+            lanes = doc["lanes"]
+            for name in self.specs:
+                self._ids[name] = set(lanes[name]["ids"])
+        except Exception:
+            # Bootstrap (or unreadable index): derive ids from the snapshots once.
+            self._index_dirty = True
+            for name, spec in self.specs.items():
+                doc = self._read_snapshot(spec)
+                self._ids[name] = {it[ID_FIELD] for it in doc.get("items", []) if isinstance(it, dict) and it.get(ID_FIELD)}
+        # Items left in segments by an interrupted run still count as present.
+        for name in self.specs:
+            for it in self._read_segment(name):
+                if it.get(ID_FIELD):
+                    self._ids[name].add(it[ID_FIELD])
+
+    def _save_index(self) -> None:
+        doc = {
+            "schema": INDEX_SCHEMA,
+            "lanes": {
+                name: {"snapshot": spec.snapshot, "count": len(self._ids[name]), "ids": sorted(self._ids[name])}
+                for name, spec in self.specs.items()
+            },
+        }
+        atomic_write_text(self._index_path(), json.dumps(doc, ensure_ascii=False, indent=1) + "\n")
+
+    # -- reads -----------------------------------------------------------------
+
+    def _read_snapshot(self, spec: LaneSpec) -> Dict[str, Any]:
+        try:
+            doc = json.loads((self.repo_root / spec.snapshot).read_text(encoding="utf-8"))
+        except Exception:
+            doc = None
+        if not isinstance(doc, dict):
+            doc = dict(spec.header)
+        if not isinstance(doc.get("items"), list):
+            doc["items"] = []
+        return doc
+
+    def _read_segment(self, lane: str) -> List[Dict[str, Any]]:
+        p = self._segment(lane)
+        if not p.exists():
+            return []
+        out = []
+        for line in p.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                continue  # torn tail write from an interrupted run
+            if isinstance(obj, dict):
+                out.append(obj)
+        return out
+
+    def items(self, lane: str) -> List[Dict[str, Any]]:
+        """Every item of a lane: its snapshot plus not yet compacted segment items."""
+        return [it for it in self._read_snapshot(self.specs[lane])["items"] if isinstance(it, dict)] + self._read_segment(lane)
+
+    def has(self, pid: str) -> bool:
+        return any(pid in ids for ids in self._ids.values())
+
+    def count(self, lane: str) -> int:
+        return len(self._ids[lane])
+
+    # -- writes ----------------------------------------------------------------
+
+    def append(self, lane: str, item: Dict[str, Any]) -> bool:
+        """Append item to lane's segment; False if its id is already stored."""
+        pid = item.get(ID_FIELD)
+        if pid and self.has(pid):
+            return False
+        seg = self._segment(lane)
+        seg.parent.mkdir(parents=True, exist_ok=True)
+        with seg.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        if pid:
+            self._ids[lane].add(pid)
+        self._pending[lane].append(item)
+        return True
+
+    def changed(self) -> List[str]:
+        """Lanes holding segment items that are not yet in their snapshot."""
+        return [name for name in self.specs if self._pending[name] or self._segment(name).exists()]
+
+    def _publisher(self, spec: LaneSpec) -> DeltaPublisher:
+        return DeltaPublisher(
+            self.repo_root / spec.deltas,
+            spec.name,
+            url_base="/" + spec.deltas.removeprefix("public/"),
+            snapshot_every=self.snapshot_every,
+        )
+
+    def _bootstrap_deltas(self, exclude: Iterable[str]) -> None:
+        """Give every delta-published lane a head: an initial snapshot of its current file."""
+        for name, spec in self.specs.items():
+            if not spec.deltas or name in exclude:
+                continue
+            pub = self._publisher(spec)
+            primary = self.repo_root / spec.snapshot
+            if pub.head() is not None or not primary.exists():
+                continue
+            doc = self._read_snapshot(spec)
+            data = self._published_bytes(primary, doc)
+            if pub.publish(None, [], data, doc["items"], str(doc.get("updated_at") or "")):
+                self.published[name] = "snapshot"
+
+    def _published_bytes(self, primary: Path, doc: Dict[str, Any]) -> bytes:
+        """The bytes clients get for a lane: its served rendering, else the primary file as is."""
+        if self.served is not None:
+            return self.served(doc).encode("utf-8")
+        return primary.read_bytes()
+
+    def compact(self, updated_at: str, lanes: Iterable[str] | None = None) -> List[str]:
+        """Fold segments into snapshots for changed lanes; returns lanes rewritten."""
+        todo = [n for n in (lanes if lanes is not None else self.specs) if n in self.changed()]
+        rewritten = []
+        for name in todo:
+            spec = self.specs[name]
+            primary = self.repo_root / spec.snapshot
+            exists = primary.exists()
+            doc = self._read_snapshot(spec)
+            old_data = self._published_bytes(primary, doc) if exists and spec.deltas else None
+            old_items = list(doc["items"])
+            present = {it.get(ID_FIELD) for it in doc["items"] if isinstance(it, dict)}
+            for it in self._read_segment(name):
+                pid = it.get(ID_FIELD)
+                if pid and pid in present:
+                    continue
+                doc["items"].append(it)
+                present.add(pid)
+            before, after = items_sha256(old_items), items_sha256(doc["items"])
+            self.digests[name] = (before, after)
+            if exists and before == after and all(doc.get(k) == v for k, v in spec.identity.items()):
+                # Segment replayed items the snapshot already holds: nothing to publish.
+                self._segment(name).unlink(missing_ok=True)
+                self._pending[name] = []
+                continue
+            doc.update(spec.identity)
+            doc["updated_at"] = updated_at
+
+            text = _render(doc)
+            atomic_write_text(primary, text)
+            data = self._published_bytes(primary, doc)
+            for m in spec.mirrors:
+                if self.served is not None and m.startswith("public/"):
+                    atomic_write_bytes(self.repo_root / m, data)
+                    self.mirror_modes[m] = "served"
+                else:
+                    self.mirror_modes[m] = link_or_copy(primary, self.repo_root / m)
+            if spec.deltas:
+                kind = self._publisher(spec).publish(
+                    old_data, [it for it in old_items if isinstance(it, dict)], data, doc["items"], updated_at
+                )
+                if kind:
+                    self.published[name] = kind
+
+            self._segment(name).unlink(missing_ok=True)
+            self._pending[name] = []
+            rewritten.append(name)
+        self._bootstrap_deltas(exclude=todo)
+        if rewritten or self._index_dirty:
+            self._save_index()
+            self._index_dirty = False
+        return rewritten
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+ALGORITHM = "sha256-merkle/v1"
+
+# Domain separation (as in RFC 6962): leaves and inner nodes never collide.
+_LEAF = b"\x00"
+_NODE = b"\x01"
+
+
+def leaf_hash(path: str, sha256: str) -> bytes:
+    """Leaf = H(0x00 || path || 0x00 || sha256-hex)."""
+    return hashlib.sha256(_LEAF + path.encode("utf-8") + b"\x00" + sha256.encode("ascii")).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE + left + right).digest()
+
+
+class MerkleTree:
+    """Binary Merkle tree over (path, sha256) leaves, sorted by path.
+
+    An odd node at the end of a level is promoted unchanged (never paired
+    with itself). A proof is the list of sibling hashes from leaf to root;
+    together with the leaf index and the tree size it is enough to recompute
+    the root (see `verify`), i.e. O(log n) hashes per file.
+    """
+
+    def __init__(self, leaves: Iterable[Tuple[str, str]]) -> None:
+        self.leaves: List[Tuple[str, str]] = sorted(leaves)
+        self.index: Dict[str, int] = {p: i for i, (p, _s) in enumerate(self.leaves)}
+        level = [leaf_hash(p, s) for p, s in self.leaves]
+        self.levels: List[List[bytes]] = [level]
+        while len(level) > 1:
+            nxt = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                nxt.append(level[-1])
+            self.levels.append(nxt)
+            level = nxt
+
+    def __len__(self) -> int:
+        return len(self.leaves)
+
+    @property
+    def root(self) -> str:
+        if not self.leaves:
+            return hashlib.sha256(b"").hexdigest()
+        return self.levels[-1][0].hex()
+
+    def proof(self, path: str) -> List[str]:
+        i = self.index[path]
+        out = []
+        for level in self.levels[:-1]:
+            sib = i ^ 1
+            if sib < len(level):
+                out.append(level[sib].hex())
+            i //= 2
+        return out
+
+
+def verify(path: str, sha256: str, index: int, count: int, proof: Sequence[str], root: str) -> bool:
+    """Check an inclusion proof produced by MerkleTree.proof()."""
+    if not 0 <= index < count:
+        return False
+    h = leaf_hash(path, sha256)
+    i, n, k = index, count, 0
+    while n > 1:
+        sib = i ^ 1
+        if sib < n:
+            if k >= len(proof):
+                return False
+            s = bytes.fromhex(proof[k])
+            k += 1
+            h = node_hash(s, h) if i & 1 else node_hash(h, s)
+        i //= 2
+        n = (n + 1) // 2
+    return k == len(proof) and h.hex() == root
+
+
+# Shard ids double as file names under /.well-known/merkle/. Directory shards
+# carry the directory name verbatim behind a prefix, so ids are reversible and
+# no directory (".well-known" vs "well-known", or one named "root") can land
+# in another's shard.
+ROOT_SHARD = "root"
+DIR_SHARD_PREFIX = "dir-"
+
+
+def shard_of(path: str) -> str:
+    """Proof shard for a site path: "dir-<top-level directory>", or "root" for top-level files."""
+    parts = path.strip("/").split("/")
+    if len(parts) < 2:
+        return ROOT_SHARD
+    return DIR_SHARD_PREFIX + parts[0]
+
+
+def shard_dir(shard: str) -> str:
+    """Inverse of shard_of: the top-level directory of a shard ("" for the root shard)."""
+    return shard[len(DIR_SHARD_PREFIX):] if shard.startswith(DIR_SHARD_PREFIX) else ""
+
+
+def proof_shards(tree: MerkleTree) -> Dict[str, List[Dict[str, object]]]:
+    """Per-shard lists of {path, sha256, index, proof} for every leaf."""
+    shards: Dict[str, List[Dict[str, object]]] = {}
+    for i, (p, s) in enumerate(tree.leaves):
+        shards.setdefault(shard_of(p), []).append({"path": p, "sha256": s, "index": i, "proof": tree.proof(p)})
+    return shards
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from . import ed25519
+
+try:  # optional, much faster than the pure-Python fallback
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+except ImportError:  # pragma: no cover - depends on the environment
+    Ed25519PublicKey = None
+
+BACKEND = "cryptography" if Ed25519PublicKey is not None else "pure-python"
+
+
+class MinisignError(ValueError):
+    pass
+
+
+def ed25519_verify(public_key: bytes, message: bytes, signature: bytes) -> bool:
+    if Ed25519PublicKey is None:
+        return ed25519.verify(public_key, message, signature)
+    try:
+        Ed25519PublicKey.from_public_bytes(public_key).verify(signature, message)
+        return True
+    except (InvalidSignature, ValueError):
+        return False
+
+
+def key_id_hex(raw: bytes) -> str:
+    """minisign prints key ids as the little-endian 8 bytes, uppercase hex."""
+    return raw[::-1].hex().upper()
+
+
+def _b64(line: str, what: str) -> bytes:
+    try:
+        return base64.b64decode(line.strip(), validate=True)
+    except ValueError as e:
+        raise MinisignError(f"bad base64 in {what}") from e
+
+
+@dataclass(frozen=True)
+class PublicKey:
+    kid: str
+    key: bytes
+
+
+@dataclass(frozen=True)
+class Signature:
+    algorithm: bytes  # b"Ed" (legacy, raw message) or b"ED" (BLAKE2b-512 prehashed)
+    kid: str
+    signature: bytes
+    trusted_comment: str
+    global_signature: bytes
+
+    @property
+    def hashed(self) -> bool:
+        return self.algorithm == b"ED"
+
+    @property
+    def signed_file(self) -> str:
+        """`file:` field of the trusted comment (as written by the signer), or ""."""
+        for part in self.trusted_comment.split("\t"):
+            if part.startswith("file:"):
+                return part[len("file:"):]
+        return ""
+
+
+def parse_public_key(text: str) -> PublicKey:
+    lines = [ln for ln in text.splitlines() if ln.strip() and not ln.startswith("untrusted comment:")]
+    if not lines:
+        raise MinisignError("empty public key")
+    raw = _b64(lines[0], "public key")
+    if len(raw) != 42 or raw[:2] != b"Ed":
+        raise MinisignError("not a minisign Ed25519 public key")
+    return PublicKey(kid=key_id_hex(raw[2:10]), key=raw[10:])
+
+
+def parse_signature(text: str) -> Signature:
+    lines = text.splitlines()
+    if len(lines) < 4 or not lines[0].startswith("untrusted comment:") or not lines[2].startswith("trusted comment: "):
+        raise MinisignError("not a minisign signature file")
+    raw = _b64(lines[1], "signature")
+    if len(raw) != 74 or raw[:2] not in (b"Ed", b"ED"):
+        raise MinisignError("unsupported signature algorithm")
+    glob = _b64(lines[3], "global signature")
+    if len(glob) != 64:
+        raise MinisignError("bad global signature length")
+    return Signature(
+        algorithm=raw[:2],
+        kid=key_id_hex(raw[2:10]),
+        signature=raw[10:],
+        trusted_comment=lines[2][len("trusted comment: "):],
+        global_signature=glob,
+    )
+
+
+def _blake2b_file(path: Path) -> bytes:
+    h = hashlib.blake2b(digest_size=64)
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def verify_file(path: Path, sig: Signature, key: PublicKey) -> Optional[str]:
+    """None if `sig` is a valid signature of `path` by `key`, else the reason."""
+    if sig.kid != key.kid:
+        return f"key id mismatch ({sig.kid} != {key.kid})"
+    message = _blake2b_file(path) if sig.hashed else path.read_bytes()
+    if not ed25519_verify(key.key, message, sig.signature):
+        return "signature mismatch"
+    if not ed25519_verify(key.key, sig.signature + sig.trusted_comment.encode("utf-8"), sig.global_signature):
+        return "trusted comment signature mismatch"
+    return None
+
+
+def load_keyring(repo_root: Path) -> Dict[str, Dict[str, object]]:
+    """kid -> {"key": PublicKey | None, "status": ..., "source": ...} from the published trust root.
+
+    Keys come from .well-known/minisign.pub and .well-known/keys/minisign/*.pub;
+    their status ("active" / "retired") from .well-known/key-history.json.
+    Kids listed in the history without a published key get `key` None.
+    """
+    root = Path(repo_root)
+    ring: Dict[str, Dict[str, object]] = {}
+    sources = [root / ".well-known" / "minisign.pub", *sorted((root / ".well-known" / "keys" / "minisign").glob("*.pub"))]
+    for p in sources:
+        try:
+            k = parse_public_key(p.read_text(encoding="utf-8"))
+        except (OSError, MinisignError):
+            continue
+        ring.setdefault(k.kid, {"key": k, "status": "unknown", "source": p.relative_to(root).as_posix()})
+    try:
+        history = json.loads((root / ".well-known" / "key-history.json").read_text(encoding="utf-8"))
+        for entry in history.get("keys", []):
+            kid = entry.get("kid")
+            if kid:
+                ring.setdefault(kid, {"key": None, "source": ""})["status"] = entry.get("status", "unknown")
+    except (OSError, ValueError):
+        pass
+    return ring
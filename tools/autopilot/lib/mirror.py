@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List
+
+from .hashcache import sha256_file
+
+# Linux FICLONE ioctl: copy-on-write clone (btrfs, xfs with reflink=1, ...).
+_FICLONE = 0x40049409
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with src.open("rb") as s, dst.open("wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError:
+        dst.unlink(missing_ok=True)
+        return False
+
+
+def link_or_copy(src: Path, dst: Path, *, hardlink: bool = True) -> str:
+    """Atomically make dst an exact copy of src; returns "link", "reflink" or "copy".
+
+    Hardlink when allowed, else a reflink clone, else a plain copy (with
+    metadata). The new file is staged under a tmp name and renamed over dst,
+    so an existing dst (and any file hardlinked to it) is never written in
+    place.
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(dst.name + ".link-tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        if hardlink:
+            try:
+                os.link(src, tmp)
+                os.replace(tmp, dst)
+                return "link"
+            except OSError:
+                tmp.unlink(missing_ok=True)
+        if _reflink(src, tmp):
+            os.replace(tmp, dst)
+            return "reflink"
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+        return "copy"
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def same_file(src: Path, dst: Path) -> bool:
+    """True when dst already mirrors src: same inode, or same size and mtime, or same bytes."""
+    try:
+        s, d = src.stat(), dst.stat()
+    except FileNotFoundError:
+        return False
+    if (s.st_dev, s.st_ino) == (d.st_dev, d.st_ino):
+        return True
+    if s.st_size != d.st_size:
+        return False
+    if s.st_mtime_ns == d.st_mtime_ns:
+        return True
+    return sha256_file(src)[0] == sha256_file(dst)[0]
+
+
+@dataclass
+class SyncReport:
+    unchanged: int = 0
+    linked: List[str] = field(default_factory=list)
+    reflinked: List[str] = field(default_factory=list)
+    copied: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.linked or self.reflinked or self.copied or self.removed)
+
+    def summary(self) -> str:
+        return (
+            f"unchanged={self.unchanged} linked={len(self.linked)} reflinked={len(self.reflinked)} "
+            f"copied={len(self.copied)} removed={len(self.removed)}"
+        )
+
+
+def sync_tree(
+    src_root: Path,
+    dst_root: Path,
+    *,
+    skip: Iterable[str] = (),
+    keep: Iterable[str] = (),
+    hardlink: bool = True,
+) -> SyncReport:
+    """Mirror src_root into dst_root, touching only files that differ.
+
+    `skip` lists src-relative paths not mirrored at all (e.g. files the
+    caller regenerates on both sides). Files under dst_root without a source
+    are removed, except `keep` entries: exact relative paths, or directory
+    prefixes ending in "/".
+    """
+    src_root, dst_root = Path(src_root), Path(dst_root)
+    skip_set = set(skip)
+    keep_files = {k for k in keep if not k.endswith("/")}
+    keep_dirs = tuple(k for k in keep if k.endswith("/"))
+    report = SyncReport()
+    wanted = set()
+
+    for dirpath, _dirnames, filenames in os.walk(src_root):
+        for name in filenames:
+            src = Path(dirpath) / name
+            rel = src.relative_to(src_root).as_posix()
+            if rel in skip_set:
+                continue
+            wanted.add(rel)
+            dst = dst_root / rel
+            if same_file(src, dst):
+                report.unchanged += 1
+                s, d = src.stat(), dst.stat()
+                if s.st_mtime_ns != d.st_mtime_ns:
+                    # Same bytes: align mtime so the next run decides on stat alone.
+                    os.utime(dst, ns=(d.st_atime_ns, s.st_mtime_ns))
+                continue
+            mode = link_or_copy(src, dst, hardlink=hardlink)
+            {"link": report.linked, "reflink": report.reflinked, "copy": report.copied}[mode].append(rel)
+
+    if dst_root.is_dir():
+        for dirpath, _dirnames, filenames in os.walk(dst_root, topdown=False):
+            for name in filenames:
+                rel = (Path(dirpath) / name).relative_to(dst_root).as_posix()
+                if rel in wanted or rel in skip_set or rel in keep_files or rel.startswith(keep_dirs):
+                    continue
+                (dst_root / rel).unlink()
+                report.removed.append(rel)
+            d = Path(dirpath)
+            if d != dst_root and not any(d.iterdir()):
+                d.rmdir()
+    return report
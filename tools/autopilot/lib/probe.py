@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class BudgetExhausted(Exception):
+    """Raised (as a result value) for calls refused by the global request budget."""
+
+
+class RequestBudget:
+    """Global HTTP request budget shared by one autopilot run.
+
+    A limit of 0 (or below) means unlimited.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = int(limit or 0)
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self, n: int = 1) -> bool:
+        with self._lock:
+            if self.limit > 0 and self.used + n > self.limit:
+                return False
+            self.used += n
+            return True
+
+    @property
+    def remaining(self) -> Optional[int]:
+        if self.limit <= 0:
+            return None
+        return max(self.limit - self.used, 0)
+
+
+def host_key(url: str) -> str:
+    try:
+        return (urllib.parse.urlparse(url).hostname or "").lower()
+    except Exception:
+        return ""
+
+
+class ProbeEngine:
+    """Bounded-concurrency executor for blocking HTTP calls.
+
+    - at most `max_workers` calls in flight overall
+    - at most `per_host` calls in flight against the same host
+    - every call consumes one unit of the shared `RequestBudget`
+
+    Budget is reserved at submission time, in submission order, so which calls
+    get refused does not depend on thread scheduling. That unit pays for the
+    call's first request only: a call that issues more (a fallback GET,
+    redirect hops) must take them from the same budget itself and raise
+    BudgetExhausted when refused, which becomes its result like any error. Results are returned in
+    the order the calls were given (deterministic regardless of completion order).
+    """
+
+    def __init__(self, *, max_workers: int = 8, per_host: int = 2, budget: Optional[RequestBudget] = None) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.per_host = max(1, int(per_host))
+        self.budget = budget or RequestBudget(0)
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._host_slots.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.per_host)
+                self._host_slots[host] = sem
+            return sem
+
+    def _call(self, url: str, fn: Callable[..., Any], args: Tuple[Any, ...]) -> Any:
+        with self._slot(host_key(url)):
+            return fn(*args)
+
+    def run(self, calls: Sequence[Tuple[str, Callable[..., Any], Tuple[Any, ...]]]) -> List[Any]:
+        """Run `(url, fn, args)` calls concurrently; return results in input order.
+
+        A call whose function raises yields the exception object as its result;
+        a call refused by the budget yields a `BudgetExhausted` instance.
+        """
+        results: List[Any] = [None] * len(calls)
+        if not calls:
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(calls))) as pool:
+            futures: List[Tuple[int, Future]] = []
+            for i, (url, fn, args) in enumerate(calls):
+                if not self.budget.take():
+                    results[i] = BudgetExhausted(url)
+                    continue
+                futures.append((i, pool.submit(self._call, url, fn, args)))
+
+            for i, fut in futures:
+                try:
+                    results[i] = fut.result()
+                except Exception as e:
+                    results[i] = e
+        return results
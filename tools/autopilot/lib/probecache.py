@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .fsatomic import atomic_write_text
+
+SCHEMA = "onetoo-autopilot-probe-cache/v1"
+
+ProbeResult = Tuple[bool, int, str]
+
+
+class ProbeCache:
+    """On-disk probe results keyed by URL, shared across autopilot runs.
+
+    Each entry keeps the last status plus the ETag / Last-Modified validators.
+    Within `ttl` (or `negative_ttl` for failed probes) the entry is answered
+    without any network; after that the caller revalidates with a conditional
+    request and a 304 simply refreshes the entry. Transport errors (code 0)
+    and 304s (which carry no result of their own) are never cached.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        ttl: int = 86400,
+        negative_ttl: int = 3600,
+        max_entries: int = 5000,
+        now: Optional[float] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl = int(ttl)
+        self.negative_ttl = int(negative_ttl)
+        self.max_entries = max(1, int(max_entries))
+        self.now = int(now if now is not None else time.time())
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.dirty = False
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            doc = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            return
+        entries = doc.get("entries") if isinstance(doc, dict) else None
+        if isinstance(entries, dict):
+            self._entries = {k: v for k, v in entries.items() if isinstance(v, dict)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def fresh(self, url: str) -> Optional[ProbeResult]:
+        """Cached result if still within TTL, else None."""
+        with self._lock:
+            e = self._entries.get(url)
+            if not e:
+                return None
+            ttl = self.ttl if e.get("ok") else self.negative_ttl
+            if self.now - int(e.get("checked_at", 0)) >= ttl:
+                return None
+            self.hits += 1
+            return bool(e.get("ok")), int(e.get("status", 0)), "cache"
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        with self._lock:
+            e = self._entries.get(url) or {}
+        h: Dict[str, str] = {}
+        if e.get("etag"):
+            h["If-None-Match"] = e["etag"]
+        if e.get("last_modified"):
+            h["If-Modified-Since"] = e["last_modified"]
+        return h
+
+    def revalidate(self, url: str) -> Optional[ProbeResult]:
+        """Handle a 304 for url: refresh the entry and return its stored result."""
+        with self._lock:
+            e = self._entries.get(url)
+            if not e:
+                return None
+            e["checked_at"] = self.now
+            self.revalidated += 1
+            self.dirty = True
+            return bool(e.get("ok")), int(e.get("status", 0)), "cache-304"
+
+    def store(self, url: str, ok: bool, status: int, method: str, headers: Optional[Mapping[str, str]]) -> None:
+        with self._lock:
+            self.misses += 1
+            if not status or status == 304:
+                self._entries.pop(url, None)
+                return
+            headers = headers or {}
+            self._entries[url] = {
+                "ok": bool(ok),
+                "status": int(status),
+                "method": method,
+                "etag": headers.get("ETag") or "",
+                "last_modified": headers.get("Last-Modified") or "",
+                "checked_at": self.now,
+            }
+            self.dirty = True
+
+    def save(self) -> None:
+        """Persist (only if something changed), evicting the oldest entries beyond max_entries."""
+        with self._lock:
+            if not self.dirty:
+                return
+            items = sorted(self._entries.items(), key=lambda kv: (-int(kv[1].get("checked_at", 0)), kv[0]))
+            self._entries = dict(sorted(items[: self.max_entries]))
+            doc = {"schema": SCHEMA, "updated_at": self.now, "entries": self._entries}
+            atomic_write_text(self.path, json.dumps(doc, ensure_ascii=False, sort_keys=True, indent=1) + "\n")
+            self.dirty = False
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .heuristics import ALLOW_HOST_SIGNAL, DERIVED_SIGNALS, RuleProgram, url_parts
+
+DECISIONS = ("accept", "sandbox", "reject")
+
+
+@dataclass
+class ReplayReport:
+    records: int = 0
+    skipped: int = 0
+    url_resolved: int = 0
+    recorded: Dict[str, int] = field(default_factory=dict)
+    baseline: Dict[str, int] = field(default_factory=dict)
+    candidate: Dict[str, int] = field(default_factory=dict)
+    # (baseline decision, candidate decision) -> count, changed pairs only
+    transitions: Dict[Tuple[str, str], int] = field(default_factory=dict)
+    # [(id, baseline decision, candidate decision, baseline score, candidate score)]
+    changed: List[Tuple[str, str, str, int, int]] = field(default_factory=list)
+    # records whose recorded decision the baseline program does not reproduce
+    drift: int = 0
+
+    def as_dict(self, max_changed: int = 100) -> Dict[str, Any]:
+        return {
+            "records": self.records,
+            "skipped": self.skipped,
+            "url_resolved": self.url_resolved,
+            "counts": {
+                "recorded": dict(sorted(self.recorded.items())),
+                "baseline": dict(sorted(self.baseline.items())),
+                "candidate": dict(sorted(self.candidate.items())),
+            },
+            "transitions": {f"{a}->{b}": n for (a, b), n in sorted(self.transitions.items())},
+            "changed": [
+                {"id": i, "baseline": a, "candidate": b, "baseline_score": sa, "candidate_score": sb}
+                for i, a, b, sa, sb in self.changed[:max_changed]
+            ],
+            "changed_total": len(self.changed),
+            "drift": self.drift,
+        }
+
+
+def latest_by_id(records: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+    """Decision records keyed by item id, later records replacing earlier ones."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for rec in records:
+        if isinstance(rec, dict) and rec.get("event", "decision") == "decision":
+            rid = rec.get("id")
+            if isinstance(rid, str):
+                out[rid] = rec
+    return out
+
+
+def replay(
+    records: Iterable[Mapping[str, Any]],
+    baseline: RuleProgram,
+    candidate: RuleProgram,
+    urls: Optional[Mapping[str, str]] = None,
+) -> ReplayReport:
+    """Re-decide recorded signal vectors under `baseline` and `candidate`; no network.
+
+    `urls` (item id -> url) lets hard-fail rules and the allow-listed host
+    bonus be re-evaluated when the candidate changes either; otherwise (or
+    for ids without a url) the recorded hard-fail id and signals are used as
+    they are, which skips URL parsing in the common threshold-tuning case.
+
+    Only the scored signals matter, and recorded vectors repeat a lot, so
+    both programs' verdicts are memoized per (hard-fail ids, scored signal
+    values): a replay costs one tuple build and one dict lookup per record.
+    """
+    same_url_rules = baseline.hard == candidate.hard and baseline.allow_hosts == candidate.allow_hosts
+    urls = {} if same_url_rules else (urls or {})
+    rep = ReplayReport()
+    names = tuple(sorted((set(baseline.points) | set(candidate.points)) - set(DERIVED_SIGNALS)))
+    try:
+        bonus_at = names.index(ALLOW_HOST_SIGNAL)
+    except ValueError:
+        bonus_at = -1
+    b_ids = {r.id for r in baseline.hard}
+    c_ids = {r.id for r in candidate.hard}
+    memo: Dict[Tuple[Any, ...], Tuple[str, str, int, int]] = {}
+    recorded: Dict[str, int] = {}
+    pairs: Dict[Tuple[str, str], int] = {}
+    for rec in records:
+        rid = rec.get("id")
+        signals = rec.get("signals")
+        if not isinstance(rid, str) or not isinstance(signals, dict):
+            rep.skipped += 1
+            continue
+        rep.records += 1
+        dec = rec.get("decision") or ""
+        recorded[dec] = recorded.get(dec, 0) + 1
+        values = tuple(map(signals.get, names))
+        url = urls.get(rid)
+        if url is None:
+            hf = rec.get("hard_fail")
+            key = (hf in b_ids and hf, hf in c_ids and hf, values, values)
+        else:
+            rep.url_resolved += 1
+            key = _url_key(baseline, candidate, url, values, bonus_at)
+        v = memo.get(key)
+        if v is None:
+            v = memo[key] = _verdicts(baseline, candidate, names, key)
+        b, c, sb, sc = v
+        pairs[(b, c)] = pairs.get((b, c), 0) + 1
+        if dec in DECISIONS and dec != b:
+            rep.drift += 1
+        if b != c:
+            rep.changed.append((rid, b, c, sb, sc))
+    rep.recorded = recorded
+    for (b, c), n in pairs.items():
+        rep.baseline[b] = rep.baseline.get(b, 0) + n
+        rep.candidate[c] = rep.candidate.get(c, 0) + n
+        if b != c:
+            rep.transitions[(b, c)] = n
+    return rep
+
+
+def _url_key(baseline: RuleProgram, candidate: RuleProgram, url: str, values: Tuple[Any, ...], bonus_at: int) -> Tuple[Any, ...]:
+    # Hard-fail rules and the host bonus are re-evaluated from the URL; the
+    # candidate may have changed either. (The sync script matches hard-fail
+    # rules on the raw URL and the host bonus on the stripped one.)
+    raw = url_parts(url)
+    b_rule = baseline.hard_fail_parts(*raw)
+    c_rule = candidate.hard_fail_parts(*raw)
+    b_vals = c_vals = values
+    if bonus_at >= 0:
+        host = raw[1] if url == url.strip() else url_parts(url.strip())[1]
+        b_bonus = bool(host) and host in baseline.allow_hosts
+        c_bonus = bool(host) and host in candidate.allow_hosts
+        if b_bonus != bool(values[bonus_at]):
+            b_vals = values[:bonus_at] + (b_bonus,) + values[bonus_at + 1:]
+        if c_bonus != bool(values[bonus_at]):
+            c_vals = values[:bonus_at] + (c_bonus,) + values[bonus_at + 1:]
+    return (b_rule.id if b_rule else False, c_rule.id if c_rule else False, b_vals, c_vals)
+
+
+def _verdicts(baseline: RuleProgram, candidate: RuleProgram, names: Tuple[str, ...], key: Tuple[Any, ...]) -> Tuple[str, str, int, int]:
+    b_hard, c_hard, b_vals, c_vals = key
+    sb = baseline.score(dict(zip(names, b_vals)))
+    sc = candidate.score(dict(zip(names, c_vals)))
+    return (
+        "reject" if b_hard else baseline.decide(sb),
+        "reject" if c_hard else candidate.decide(sc),
+        sb,
+        sc,
+    )
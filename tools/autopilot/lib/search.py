@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import unicodedata
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+from urllib.parse import urlsplit
+
+_WORD = re.compile(r"[^\W_]+")
+
+# Field -> term-frequency weight (a cheap BM25F: weighted tf, one length norm).
+FIELD_WEIGHTS: Dict[str, int] = {"title": 3, "topics": 2, "url": 1, "languages": 1}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, accent-stripped word tokens ("Výskum" -> "vyskum").
+
+    Mirrors tokenize() in assets/ai-search.js, which picks the static token
+    shards: NFKD, lower() (not casefold(): JS has no casefold, "ß" stays "ß"),
+    drop every mark (category M), then letter/digit runs.
+    """
+    folded = unicodedata.normalize("NFKD", text).lower()
+    folded = "".join(c for c in folded if not unicodedata.category(c).startswith("M"))
+    return _WORD.findall(folded)
+
+
+def url_tokens(url: str) -> List[str]:
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return tokenize(host.replace(".", " ") + " " + parts.path) + ([host] if host else [])
+
+
+def item_fields(it: Dict[str, Any]) -> Dict[str, List[str]]:
+    def joined(v: Any) -> str:
+        return " ".join(x for x in v if isinstance(x, str)) if isinstance(v, list) else ""
+
+    return {
+        "title": tokenize(str(it.get("title") or "")),
+        "topics": tokenize(joined(it.get("topics"))),
+        "url": url_tokens(str(it.get("url") or "")),
+        "languages": tokenize(joined(it.get("languages"))),
+    }
+
+
+@dataclass(frozen=True)
+class Hit:
+    doc: int
+    score: float
+
+
+class SearchIndex:
+    """In-memory BM25 inverted index over accepted-set items.
+
+    Postings are stored per term as two parallel `array('I')`s (doc ids
+    ascending, weighted term frequencies), document lengths as one more;
+    nothing per (term, doc) is a Python object, so the index stays compact
+    and cheap to build for every lane on start-up.
+    """
+
+    def __init__(self, items: Iterable[Dict[str, Any]], *, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.docs: List[Dict[str, Any]] = [it for it in items if isinstance(it, dict) and it.get("url")]
+        self.doc_len = array("I")
+        acc: Dict[str, Tuple[array, array]] = {}
+        for d, it in enumerate(self.docs):
+            tf: Dict[str, int] = {}
+            for field, toks in item_fields(it).items():
+                w = FIELD_WEIGHTS[field]
+                for t in toks:
+                    tf[t] = tf.get(t, 0) + w
+            self.doc_len.append(sum(tf.values()))
+            for t, n in tf.items():
+                ids, tfs = acc.setdefault(t, (array("I"), array("I")))
+                ids.append(d)
+                tfs.append(n)
+        self.postings: Dict[str, Tuple[array, array]] = acc
+        n = len(self.docs)
+        self.avgdl = (sum(self.doc_len) / n) if n else 0.0
+        # Lucene's BM25 idf: log(1 + (N - df + 0.5) / (df + 0.5)), always positive.
+        self.idf: Dict[str, float] = {
+            t: math.log(1.0 + (n - len(ids) + 0.5) / (len(ids) + 0.5)) for t, (ids, _tfs) in acc.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def search(self, query: str, limit: int = 10) -> List[Hit]:
+        """Top `limit` documents for `query` by BM25 score (ties: lower doc id first)."""
+        terms = set(tokenize(query))
+        scores: Dict[int, float] = {}
+        k1, b, avgdl = self.k1, self.b, self.avgdl or 1.0
+        for t in terms:
+            post = self.postings.get(t)
+            if post is None:
+                continue
+            idf = self.idf[t]
+            ids, tfs = post
+            for d, f in zip(ids, tfs):
+                norm = k1 * (1.0 - b + b * self.doc_len[d] / avgdl)
+                scores[d] = scores.get(d, 0.0) + idf * f * (k1 + 1.0) / (f + norm)
+        best = heapq.nsmallest(limit, scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [Hit(doc=d, score=s) for d, s in best]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "docs": len(self.docs),
+            "terms": len(self.postings),
+            "postings": sum(len(ids) for ids, _tfs in self.postings.values()),
+        }
+
+
+def trust_state(it: Dict[str, Any], *, lane: str, generated_at: str) -> Dict[str, Any]:
+    """trust-state-v2 for one result: stable (accepted) items are verified, sandbox ones partial."""
+    signals = [f"lane:{lane}"]
+    for field in ("kind", "wellKnown", "repo", "contact"):
+        if it.get(field):
+            signals.append(f"{field}:{it[field]}")
+    return {
+        "version": "2.0",
+        "generated_at": generated_at,
+        "subject": str(it["url"]),
+        "state": "verified" if lane == "stable" else "partial",
+        "signals": signals,
+    }
+
+
+def search_response(
+    index: SearchIndex,
+    query: str,
+    *,
+    lane: str,
+    proof: Dict[str, Any],
+    limit: int = 10,
+) -> Dict[str, Any]:
+    """search-response-v2 document for `query` against one lane's index."""
+    results = []
+    for hit in index.search(query, limit):
+        it = index.docs[hit.doc]
+        r: Dict[str, Any] = {
+            "url": str(it["url"]),
+            "title": str(it.get("title") or it["url"]),
+            "score": round(hit.score, 6),
+            "trust_state": trust_state(it, lane=lane, generated_at=proof["generated_at"]),
+        }
+        if it.get("description"):
+            r["snippet"] = str(it["description"])
+        results.append(r)
+    return {"version": "2.0", "query": query, "lane": lane, "results": results, "proof": proof}
+
+
+def percentiles(samples: Sequence[float], qs: Sequence[int] = (50, 90, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles, e.g. {"p50": ..., "p90": ..., "p99": ...}."""
+    s = sorted(samples)
+    if not s:
+        return {f"p{q}": 0.0 for q in qs}
+    return {f"p{q}": s[max(0, math.ceil(q / 100 * len(s)) - 1)] for q in qs}
+
+
+TOKENS_SCHEMA = "onetoo-ai-search-tokens/v1"
+
+_SAFE_PREFIX = re.compile(r"[a-z0-9]+")
+
+
+def prefix_id(term: str, prefix_len: int) -> str:
+    """Shard id for a term: its first `prefix_len` chars, hex-escaped (`_…`) unless [a-z0-9]."""
+    p = term[:prefix_len]
+    return p if _SAFE_PREFIX.fullmatch(p) else "_" + p.encode("utf-8").hex()
+
+
+def static_index(index: SearchIndex, *, prefix_len: int = 2) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """Split `index` into a static, prefix-sharded form for client-side search.
+
+    Returns (docs, shards): `docs` holds per-document metadata and lengths
+    (BM25 needs them), `shards` maps a prefix id to {term: {idf, ids, tf}}
+    for every term with that prefix. A client tokenizes the query like
+    `tokenize`, fetches the shard(s) for its terms' prefixes and scores
+    with the parameters in the root document (see `static_root`).
+    """
+    docs = {
+        "schema": TOKENS_SCHEMA,
+        "count": len(index.docs),
+        "docs": [
+            {k: v for k, v in (("url", str(it["url"])), ("title", str(it.get("title") or it["url"])), ("snippet", str(it.get("description") or ""))) if v}
+            for it in index.docs
+        ],
+        "len": index.doc_len.tolist(),
+    }
+    shards: Dict[str, Dict[str, Any]] = {}
+    for term in sorted(index.postings):
+        ids, tfs = index.postings[term]
+        sid = prefix_id(term, prefix_len)
+        shard = shards.setdefault(sid, {"schema": TOKENS_SCHEMA, "prefix": term[:prefix_len], "terms": {}})
+        shard["terms"][term] = {"idf": round(index.idf[term], 6), "ids": ids.tolist(), "tf": tfs.tolist()}
+    return docs, shards
+
+
+def static_root(
+    index: SearchIndex,
+    *,
+    prefix_len: int,
+    generated_at: str,
+    accepted_ref: Dict[str, str],
+    docs_ref: Dict[str, str],
+    shard_refs: Dict[str, Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Root dictionary: BM25 parameters, docs file and prefix id -> {url, sha256, terms}."""
+    return {
+        "schema": TOKENS_SCHEMA,
+        "generated_at": generated_at,
+        "accepted_set_ref": accepted_ref,
+        "tokenizer": "nfkd-casefold-strip-marks/words",
+        "field_weights": FIELD_WEIGHTS,
+        "bm25": {"k1": index.k1, "b": index.b, "avgdl": round(index.avgdl, 6), "n": len(index.docs)},
+        "prefix_len": prefix_len,
+        "docs": docs_ref,
+        "shards": shard_refs,
+    }
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from .jsoncanon import CanonicalJsonOptions, dumps_canonical
+from .merkle import MerkleTree
+
+SHARD_SCHEMA = "onetoo-ai-search-shard/v1"
+
+PARTITIONS = ("language", "topic", "domain")
+
+_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+def _slug(s: str) -> str:
+    return _SLUG.sub("-", s.lower()).strip("-") or "und"
+
+
+def item_domain(it: Dict[str, Any]) -> str:
+    host = (urlsplit(str(it.get("url") or "")).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _first(it: Dict[str, Any], field: str) -> str:
+    v = it.get(field)
+    if isinstance(v, list) and v and isinstance(v[0], str):
+        return v[0]
+    return ""
+
+
+PARTITION_KEYS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "language": lambda it: _slug(_first(it, "languages")),
+    "topic": lambda it: _slug(_first(it, "topics")),
+    "domain": lambda it: _slug(item_domain(it)),
+}
+
+
+@dataclass(frozen=True)
+class Shard:
+    name: str
+    key: str
+    items: Tuple[Dict[str, Any], ...]
+    text: str  # canonical JSON, as written
+
+    @property
+    def sha256(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+
+def partition(
+    items: Sequence[Dict[str, Any]],
+    *,
+    by: str = "language",
+    max_items: int = 500,
+    max_bytes: int = 256 * 1024,
+    lane: str = "stable",
+    opt: CanonicalJsonOptions = CanonicalJsonOptions(),
+) -> List[Shard]:
+    """Split items into size-bounded shards, grouped by the `by` key.
+
+    Within a group, items are ordered by (topic, domain, url) so related
+    entries land in the same shard; a shard is closed when adding the next
+    item would exceed `max_items` or `max_bytes` (a single oversized item
+    still gets its own shard). Names are `<key>-<n>` and the output depends
+    only on the input items, so unchanged input gives byte-identical shards.
+    """
+    keyf = PARTITION_KEYS[by]
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for it in items:
+        if isinstance(it, dict):
+            groups.setdefault(keyf(it), []).append(it)
+
+    def order(it: Dict[str, Any]) -> Tuple[str, str, str]:
+        return (_first(it, "topics").lower(), item_domain(it), str(it.get("url") or ""))
+
+    enc = CanonicalJsonOptions(sort_keys=opt.sort_keys, compact=True, ensure_ascii=opt.ensure_ascii, newline=False)
+    shards: List[Shard] = []
+    for key in sorted(groups):
+        chunk: List[Dict[str, Any]] = []
+        size = 0
+        chunks: List[List[Dict[str, Any]]] = []
+        for it in sorted(groups[key], key=order):
+            n = len(dumps_canonical(it, opt=enc).encode("utf-8")) + 1
+            if chunk and (len(chunk) >= max_items or size + n > max_bytes):
+                chunks.append(chunk)
+                chunk, size = [], 0
+            chunk.append(it)
+            size += n
+        if chunk:
+            chunks.append(chunk)
+        for i, c in enumerate(chunks, 1):
+            name = f"{key}-{i:03d}"
+            doc = {"schema": SHARD_SCHEMA, "name": name, "lane": lane, "partition": {"by": by, "key": key}, "count": len(c), "items": c}
+            shards.append(Shard(name=name, key=key, items=tuple(c), text=dumps_canonical(doc, opt=opt)))
+    return shards
+
+
+def build_manifest(
+    shards: Sequence[Shard],
+    *,
+    shard_url: Callable[[str], str],
+    accepted_ref: Dict[str, str],
+    generated_at: str,
+    lane: str = "stable",
+    signature: Dict[str, str],
+) -> Dict[str, Any]:
+    """ai-search-index v2 manifest; merkle_root commits to every (shard url, sha256)."""
+    entries = [{"name": s.name, "url": shard_url(s.name), "sha256": s.sha256, "count": len(s.items)} for s in shards]
+    tree = MerkleTree((e["url"], e["sha256"]) for e in entries)
+    return {
+        "version": "2.0",
+        "generated_at": generated_at,
+        "lane": lane,
+        "accepted_set_ref": accepted_ref,
+        "sources": [accepted_ref["url"]],
+        "shards": entries,
+        "merkle_root": tree.root,
+        "signature": signature,
+    }
@@ -1,17 +1,68 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from itertools import islice
+from operator import le
+from typing import Any, Callable, Dict, List, Sequence, Tuple
 
+from .jsoncanon import CanonicalJsonOptions, dumps_canonical
 
-def _sort_items(items: List[Dict[str, Any]], keys: List[str]) -> List[Dict[str, Any]]:
-    def k(it: Dict[str, Any]):
-        for key in keys:
-            if key in it and isinstance(it[key], str):
-                return (key, it[key])
-        # fallback: stable string of dict keys
-        return ("__fallback__", str(sorted(it.keys())))
+SortKey = Callable[[Any], Tuple[str, str]]
 
-    return sorted(items, key=k)
+NO_KEY: Tuple[str, str] = ("", "")
+
+
+def compile_sort_key(sort_items_by: Sequence[str], *, fallback: str = "keys") -> SortKey:
+    """Build the item sort key once from the `sort_items_by` config.
+
+    The key is `(name, value)` for the first configured field holding a
+    string. Items without one get:
+      - fallback="keys": ("__fallback__", str(sorted(item.keys())))
+        (memoized per key layout, since registry items share a few layouts)
+      - fallback="none": ("", "")  (also used for non-dict items)
+    """
+    names = tuple(sort_items_by)
+    use_keys = fallback == "keys"
+    layouts: Dict[Tuple[str, ...], Tuple[str, str]] = {}
+
+    def key(it: Any) -> Tuple[str, str]:
+        if not isinstance(it, dict):
+            return NO_KEY
+        for name in names:
+            v = it.get(name)
+            if isinstance(v, str):
+                return (name, v)
+        if not use_keys:
+            return NO_KEY
+        layout = tuple(it)
+        fb = layouts.get(layout)
+        if fb is None:
+            fb = layouts[layout] = ("__fallback__", str(sorted(layout)))
+        return fb
+
+    return key
+
+
+def sort_items(items: List[Any], key: SortKey, *, require_key: bool = False) -> List[Any]:
+    """Return `items` in `sorted(items, key=key)` order, exploiting existing order.
+
+    Keys are computed exactly once per item. An already sorted list is
+    detected with one C-level pass and returned as is (same object), which
+    is the common case for registries. Otherwise item positions are sorted
+    by the precomputed keys: timsort keeps the existing ordered runs and
+    merges the few new / out-of-order items into them (galloping merge),
+    i.e. close to O(n + k log k) for k strays, without a Python-level merge
+    loop. Stable, so the result equals `sorted(items, key=key)`.
+
+    With `require_key`, a list where no item has a usable key (see NO_KEY)
+    is left unchanged.
+    """
+    keys = [key(it) for it in items]
+    if require_key and all(k == NO_KEY for k in keys):
+        return items
+    if all(map(le, keys, islice(keys, 1, None))):
+        return items
+    order = sorted(range(len(items)), key=keys.__getitem__)
+    return [items[i] for i in order]
 
 
 def normalize_registry(obj: Any, *, sort_items_by: List[str], max_items: int) -> Any:
@@ -23,13 +74,16 @@ def normalize_registry(obj: Any, *, sort_items_by: List[str], max_items: int) ->
 
     If shape is unknown, returns input unchanged.
     """
+    key = compile_sort_key(sort_items_by)
     if isinstance(obj, dict) and isinstance(obj.get("items"), list):
         items = obj["items"]
         if len(items) > max_items:
             raise ValueError(f"items too large: {len(items)} > {max_items}")
         if all(isinstance(x, dict) for x in items):
-            obj = dict(obj)
-            obj["items"] = _sort_items(items, sort_items_by)
+            ordered = sort_items(items, key)
+            if ordered is not items:
+                obj = dict(obj)
+                obj["items"] = ordered
             return obj
         return obj
 
@@ -37,7 +91,25 @@ def normalize_registry(obj: Any, *, sort_items_by: List[str], max_items: int) ->
         if len(obj) > max_items:
             raise ValueError(f"list too large: {len(obj)} > {max_items}")
         if all(isinstance(x, dict) for x in obj):
-            return _sort_items(obj, sort_items_by)
+            return sort_items(obj, key)
         return obj
 
     return obj
+
+
+def served_order(obj: Any, key: SortKey) -> Any:
+    """`obj` with its items in the order tools/autopilot/run.py serves them
+    (see its maybe_sort_items): sorted by `key` (a fallback="none" key), and
+    only when some item has one."""
+    if isinstance(obj, dict) and isinstance(obj.get("items"), list):
+        ordered = sort_items(obj["items"], key, require_key=True)
+        if ordered is not obj["items"]:
+            obj = dict(obj, items=ordered)
+    return obj
+
+
+def served_registry(sort_items_by: Sequence[str], opt: CanonicalJsonOptions) -> Callable[[Any], str]:
+    """Renderer producing exactly what tools/autopilot/run.py writes for an
+    allow-listed registry: `served_order`, then canonical JSON."""
+    key = compile_sort_key(sort_items_by, fallback="none")
+    return lambda obj: dumps_canonical(served_order(obj, key), opt=opt)
@@ -15,16 +15,21 @@ Hook your real pipeline (pending->sandbox->accepted) in `apply_domain_rules()`.
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import sys
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
+from lib.canonstate import CanonicalHashes, fingerprint, sha256_bytes
 from lib.guard import fail, require_repo_root
-from lib.jsoncanon import dump_canonical_json
+from lib.instrument import Run
+from lib.jsonl import JsonlLog
+from lib.jsoncanon import CanonicalJsonOptions, dump_canonical_json, iter_canonical_chunks, options_from_config
+from lib.transform import SortKey, compile_sort_key, sort_items
 
 
 @dataclass(frozen=True)
@@ -33,6 +38,10 @@ class Config:
     allowlist: List[str]
     sort_item_keys: Tuple[str, ...]
     max_items: int
+    canonical: CanonicalJsonOptions = CanonicalJsonOptions()
+    state_path: str = "tools/autopilot/.state/canonical-hashes.json"
+    log_max_bytes: int = 1024 * 1024
+    log_rotate: str = "month"
 
 
 def load_config(repo_root: Path) -> Config:
@@ -49,29 +58,52 @@ def load_config(repo_root: Path) -> Config:
     sort_keys = cfg.get("rules", {}).get("sort_items_by", ["id", "domain", "url"])
     max_items = int(cfg.get("rules", {}).get("max_items", 200000))
 
+    canonical = options_from_config(cfg)
+    log_cfg = cfg.get("log", {})
+
     return Config(
         repo_root=repo_root,
         allowlist=allowlist,
         sort_item_keys=tuple(sort_keys),
         max_items=max_items,
+        canonical=canonical,
+        state_path=str(cfg.get("state_path", "tools/autopilot/.state/canonical-hashes.json")),
+        log_max_bytes=int(log_cfg.get("max_bytes", 1024 * 1024)),
+        log_rotate=str(log_cfg.get("rotate", "month")),
     )
 
 
-def read_json(path: Path) -> Any:
+def read_json(path: Path, raw: bytes | None = None) -> Any:
     try:
+        if raw is not None:
+            return json.loads(raw.decode("utf-8"))
         return json.loads(path.read_text(encoding="utf-8"))
     except Exception as e:
         fail(f"JSON parse failed: {path} :: {e}")
 
 
-def maybe_sort_items(obj: Any, sort_keys: Tuple[str, ...], max_items: int, src: Path) -> Any:
+def canonical_sha256(obj: Any, opt: CanonicalJsonOptions) -> str:
+    """sha256 of the canonical rendering, computed chunk by chunk (never one big string)."""
+    h = hashlib.sha256()
+    for chunk in iter_canonical_chunks(obj, opt=opt):
+        h.update(chunk.encode("utf-8"))
+    return h.hexdigest()
+
+
+def maybe_sort_items(obj: Any, sort_key: SortKey, max_items: int, src: Path) -> Any:
     """If obj looks like {items:[...]}, sort items deterministically.
 
     Sorting strategy:
     - If item is dict and contains any of sort_keys, use first existing as primary.
     - Otherwise keep original order.
 
+    `sort_key` is compiled once per run (`compile_sort_key(..., fallback="none")`);
+    already ordered lists are detected and only new / out-of-order items are
+    merged in (see lib.transform.sort_items).
+
     This is intentionally conservative to avoid changing semantics.
+    lib.transform.served_registry mirrors this ordering (the sync script
+    renders the served lanes with it), so keep the two in step.
     """
 
     if not isinstance(obj, dict):
@@ -83,24 +115,16 @@ def maybe_sort_items(obj: Any, sort_keys: Tuple[str, ...], max_items: int, src:
     if len(items) > max_items:
         fail(f"Refusing to process {src}: items length {len(items)} exceeds max_items={max_items}")
 
-    # Determine a stable key function.
-    def key_fn(x: Any):
-        if isinstance(x, dict):
-            for k in sort_keys:
-                v = x.get(k)
-                if isinstance(v, str):
-                    return (k, v)
-        return ("", "")
-
     # Only sort if it *actually* gives a deterministic, meaningful order:
     # at least one element must have a usable key.
-    if any(isinstance(i, dict) and any(isinstance(i.get(k), str) for k in sort_keys) for i in items):
+    ordered = sort_items(items, sort_key, require_key=True)
+    if ordered is not items:
         obj = dict(obj)
-        obj["items"] = sorted(items, key=key_fn)
+        obj["items"] = ordered
     return obj
 
 
-def apply_domain_rules(repo_root: Path, cfg: Config) -> None:
+def apply_domain_rules(repo_root: Path, cfg: Config, run: Run) -> None:
     """PLACEHOLDER for real autopilot logic.
 
     In your production version, this function should:
@@ -110,8 +134,20 @@ def apply_domain_rules(repo_root: Path, cfg: Config) -> None:
       - write results via atomic writes
 
     In this template, we only canonicalize allow-listed JSON files.
+
+    Each file is read once and hashed; if the hash matches the canonical hash
+    recorded by a previous run, it is skipped without parsing. Otherwise the
+    canonical form is hashed while streaming, and only when it differs from
+    the current bytes is it stream-written via an atomic replace.
     """
 
+    opt = cfg.canonical
+    sort_key = compile_sort_key(cfg.sort_item_keys, fallback="none")
+    state = CanonicalHashes(
+        repo_root / cfg.state_path,
+        fingerprint({"canonical": asdict(opt), "sort_items_by": cfg.sort_item_keys, "max_items": cfg.max_items}),
+    )
+
     for rel in cfg.allowlist:
         # JSONL is allowed in allowlist, but this template only canonicalizes JSON.
         if rel.endswith(".jsonl"):
@@ -122,25 +158,39 @@ def apply_domain_rules(repo_root: Path, cfg: Config) -> None:
             # Fail-closed: if a target is missing, we abort (prevents accidental partial updates).
             fail(f"Missing allow-listed target: {rel}")
 
-        data = read_json(p)
-        data = maybe_sort_items(data, cfg.sort_item_keys, cfg.max_items, p)
-
-        before = p.read_text(encoding="utf-8")
-
-        # Render canonical JSON deterministically and write only if changed (anti-churn)
-        canonical = (
-            json.dumps(
-                data,
-                ensure_ascii=False,
-                sort_keys=True,
-                separators=(",", ":"),
-            )
-            + "\n"
-        )
+        with run.span("hash"):
+            raw = p.read_bytes()
+            current = sha256_bytes(raw)
+        run.count("files_hashed")
+        run.count("bytes_read", len(raw))
+        if state.get(rel) == current:
+            run.count("state_hits")
+            continue
 
-        if canonical != before:
-            p.write_text(canonical, encoding="utf-8")
+        with run.span("parse"):
+            data = read_json(p, raw)
+        del raw
+        with run.span("sort"):
+            data = maybe_sort_items(data, sort_key, cfg.max_items, p)
+
+        # Write only if the canonical form differs (anti-churn)
+        with run.span("canonical_hash"):
+            canonical = canonical_sha256(data, opt)
+        if canonical != current:
+            with run.span("write"):
+                dump_canonical_json(
+                    p,
+                    data,
+                    sort_keys=opt.sort_keys,
+                    compact=opt.compact,
+                    ensure_ascii=opt.ensure_ascii,
+                    newline=opt.newline,
+                )
+            run.count("files_updated")
             print(f"[autopilot] updated: {rel}")
+        state.put(rel, canonical)
+
+    state.save()
 
 
 def main() -> int:
@@ -153,13 +203,17 @@ def main() -> int:
     if mode not in {"ci", "local"}:
         fail("Set ONETOO_MODE=ci (in Actions) or ONETOO_MODE=local (manual run)")
 
-    apply_domain_rules(repo_root, cfg)
-
-    # Optional: write a minimal log line (JSONL) only if file exists.
-    log_path = repo_root / "public" / "dumps" / "autopilot-log.jsonl"
-    if log_path.exists():
-        now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-        log_path.write_text(log_path.read_text(encoding="utf-8") + json.dumps({"ts": now, "ok": True}) + "\n", encoding="utf-8")
+    with Run("autopilot_run", repo_root) as run:
+        with run.span("canonicalize"):
+            apply_domain_rules(repo_root, cfg, run)
+
+        # Optional: write a minimal log line (JSONL) only if file exists.
+        # Appends through the shared rotating writer (O(1), no read-modify-write).
+        log_path = repo_root / "public" / "dumps" / "autopilot-log.jsonl"
+        if log_path.exists():
+            now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+            with run.span("log"), JsonlLog(log_path, max_bytes=cfg.log_max_bytes, period=cfg.log_rotate) as log:
+                log.append({"ts": now, "ok": True})
 
     return 0
 
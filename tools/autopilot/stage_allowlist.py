@@ -4,48 +4,44 @@
 This script is called by the workflow before commit.
 It prevents accidental 'git add .' and fails closed if
 anything outside allowlist is modified.
+
+Costs two git invocations regardless of how many paths are allow-listed:
+one `git status --porcelain=v2 -z` (scoped by the optional `stage_scope`
+pathspec list in config.json; whole worktree by default) and one
+`git add --pathspec-from-file` for every changed allow-listed path.
 """
 
 from __future__ import annotations
 
 import json
-import subprocess
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
 
+from lib.gitstage import GitError, stage, status
 from lib.guard import fail, require_repo_root
 
 
-def sh(cmd: List[str]) -> str:
-    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if p.returncode != 0:
-        fail(f"Command failed ({' '.join(cmd)}): {p.stderr.strip()}")
-    return p.stdout
-
-
-def load_allowlist(repo_root: Path) -> List[str]:
+def load_config(repo_root: Path) -> Tuple[List[str], List[str]]:
+    """(allowlist, stage_scope) from config.json."""
     cfg_path = repo_root / "tools" / "autopilot" / "config.json"
     cfg = json.loads(cfg_path.read_text(encoding="utf-8"))
     allow = cfg.get("allowlist", [])
     if not allow:
         fail("config.json allowlist is empty")
-    return list(allow)
+    return list(allow), list(cfg.get("stage_scope", []))
 
 
 def main() -> int:
     repo_root = require_repo_root()
-    allowlist = set(load_allowlist(repo_root))
+    allow, scope = load_config(repo_root)
+    allowlist = set(allow)
 
-    # Detect working-tree changes (including unstaged)
-    porcelain = sh(["git", "status", "--porcelain"])
-    changed_paths = []
-    for line in porcelain.splitlines():
-        if not line:
-            continue
-        # Format: XY <path>
-        path = line[3:].strip()
-        if path:
-            changed_paths.append(path)
+    # Detect working-tree changes (including unstaged and untracked)
+    try:
+        entries = status(repo_root, scope)
+    except GitError as e:
+        fail(str(e))
+    changed_paths = [p for e in entries for p in e.paths]
 
     # Fail closed if anything changed outside allowlist.
     outside = sorted({p for p in changed_paths if p not in allowlist})
@@ -55,12 +51,12 @@ def main() -> int:
             + "\n".join(f"  - {p}" for p in outside)
         )
 
-    # Stage allow-listed paths that exist.
-    for rel in sorted(allowlist):
-        p = repo_root / rel
-        if p.exists():
-            sh(["git", "add", rel])
-
+    # Stage every changed allow-listed path (deletions included) in one call.
+    try:
+        n = stage(repo_root, changed_paths)
+    except GitError as e:
+        fail(str(e))
+    print(f"[autopilot] staged {n} allow-listed path(s)")
     return 0
 
 